@@ -0,0 +1,170 @@
+# archive.py
+# Fotoğraflardan anında (on the fly) ZIP arşivi üretimi.
+# Arşiv hiçbir zaman bellekte veya diskte bütün olarak oluşturulmaz: zipfile, konumlanamayan
+# (unseekable) bir yazıcıya yazar ve üretilen baytlar hemen istemciye gönderilir.
+# Sıradaki birkaç obje arka plan thread'lerinde önceden okunur (prefetch); böylece
+# depolamadan okuma gecikmesi ağ aktarımıyla örtüşür. Kuyruklar sınırlı olduğu için
+# bellek kullanımı ARCHIVE_PREFETCH_OBJECTS * ARCHIVE_PREFETCH_CHUNKS * parça boyutu ile sınırlıdır.
+
+import logging
+import os
+import posixpath
+import queue
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterator, List, NamedTuple, Optional
+
+from storage import stream_file
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_PREFETCH_OBJECTS = int(os.getenv("ARCHIVE_PREFETCH_OBJECTS", "4")) # Aynı anda okunan obje sayısı
+ARCHIVE_PREFETCH_CHUNKS = int(os.getenv("ARCHIVE_PREFETCH_CHUNKS", "4")) # Obje başına bekletilen en fazla parça
+ARCHIVE_FLUSH_SIZE = 256 * 1024 # İstemciye gönderilmeden önce biriktirilen en az bayt
+
+# Zaten sıkıştırılmış formatlar tekrar sıkıştırılmaz (ZIP_STORED)
+STORED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".heif", ".avif"}
+
+_END = object() # Obje okumasının bittiğini gösteren işaret
+
+
+class ArchiveEntry(NamedTuple):
+    object_name: str
+    uploaded_at: Optional[datetime]
+
+
+class _ChunkWriter:
+    """
+    zipfile'ın yazdığı baytları toplayan, konumlanamayan dosya benzeri nesne.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self.size = 0
+
+    def write(self, data) -> int:
+        if data:
+            self._chunks.append(bytes(data))
+            self.size += len(data)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+class _Prefetcher:
+    """
+    Objeleri sırayla, en fazla ARCHIVE_PREFETCH_OBJECTS tanesi önden olacak şekilde okur.
+    Her obje kendi sınırlı kuyruğuna parça parça yazılır.
+    """
+
+    def __init__(self, entries: List[ArchiveEntry], workers: int = ARCHIVE_PREFETCH_OBJECTS):
+        self.entries = entries
+        self.cancelled = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="archive-prefetch")
+        self._window = workers
+        self._queues: List[Optional[queue.Queue]] = [None] * len(entries)
+        self._next_to_submit = 0
+
+    def _fill_window(self, current: int):
+        while self._next_to_submit < len(self.entries) and self._next_to_submit < current + self._window:
+            index = self._next_to_submit
+            self._queues[index] = queue.Queue(maxsize=ARCHIVE_PREFETCH_CHUNKS)
+            self._executor.submit(self._fetch, self.entries[index].object_name, self._queues[index])
+            self._next_to_submit += 1
+
+    def _put(self, chunks: queue.Queue, item) -> bool:
+        # Tüketici bağlantıyı kapattıysa bekleyen thread'ler takılı kalmasın
+        while not self.cancelled.is_set():
+            try:
+                chunks.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _fetch(self, object_name: str, chunks: queue.Queue):
+        try:
+            stream = stream_file(object_name)
+            if stream is None:
+                self._put(chunks, None) # Obje yok veya okunamadı
+                return
+            for chunk in stream:
+                if not self._put(chunks, chunk):
+                    return
+            self._put(chunks, _END)
+        except Exception as e:
+            logger.error(f"Failed to read '{object_name}' for archive: {e}")
+            self._put(chunks, e)
+
+    def chunks(self, index: int) -> Optional[Iterator[bytes]]:
+        """
+        index'teki objenin parçalarını döndürür; obje okunamadıysa None.
+        """
+        self._fill_window(index)
+        chunks = self._queues[index]
+        first = chunks.get()
+        self._queues[index] = None
+        if first is None or isinstance(first, Exception):
+            return None
+        return self._iter(first, chunks)
+
+    def _iter(self, first, chunks: queue.Queue) -> Iterator[bytes]:
+        item = first
+        while item is not _END:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+            item = chunks.get()
+
+    def close(self):
+        self.cancelled.set()
+        self._executor.shutdown(wait=False)
+
+
+def archive_name(entry: ArchiveEntry) -> str:
+    return posixpath.basename(entry.object_name)
+
+
+def stream_zip(entries: List[ArchiveEntry]) -> Iterator[bytes]:
+    """
+    Verilen objelerden ZIP arşivi üreten senkron generator.
+    StreamingResponse onu thread havuzunda tüketir; istemci bağlantıyı keserse
+    generator kapatılır ve önden okuma thread'leri durdurulur.
+    """
+    writer = _ChunkWriter()
+    prefetcher = _Prefetcher(entries)
+    missing = []
+    try:
+        with zipfile.ZipFile(writer, mode="w", allowZip64=True) as archive:
+            for index, entry in enumerate(entries):
+                chunks = prefetcher.chunks(index)
+                if chunks is None:
+                    logger.warning(f"Skipping missing object '{entry.object_name}' in archive.")
+                    missing.append(entry.object_name)
+                    continue
+
+                name = archive_name(entry)
+                info = zipfile.ZipInfo(name, date_time=(entry.uploaded_at or datetime.utcnow()).timetuple()[:6])
+                stored = posixpath.splitext(name)[1].lower() in STORED_EXTENSIONS
+                info.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+                with archive.open(info, mode="w", force_zip64=True) as destination:
+                    for chunk in chunks:
+                        destination.write(chunk)
+                        if writer.size >= ARCHIVE_FLUSH_SIZE:
+                            yield writer.pop()
+
+            if missing:
+                # Eksik objeler arşivin içinde bildirilir (yanıt başlıkları çoktan gönderildi)
+                archive.writestr("MISSING.txt", "\n".join(missing) + "\n")
+        yield writer.pop()
+    finally:
+        prefetcher.close()
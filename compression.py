@@ -0,0 +1,161 @@
+# compression.py
+# Yanıt sıkıştırma ara katmanı (middleware): istemcinin Accept-Encoding başlığına göre
+# brotli (paket kuruluysa) veya gzip kullanır. Küçük yanıtlar ve zaten sıkıştırılmış
+# içerikler (resimler, zip) olduğu gibi gönderilir. Akan (streaming) yanıtlar her
+# parçada flush edilerek sıkıştırılır, böylece istemci veriyi bekletilmeden alır.
+
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli # İsteğe bağlı bağımlılık
+except ImportError: # pragma: no cover - brotli kurulu değilse sadece gzip kullanılır
+    brotli = None
+
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024")) # Bu boyuttan küçük yanıtlar sıkıştırılmaz
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4")) # Dinamik yanıtlar için hız/oran dengesi
+
+# Sıkıştırılmayacak içerik tipleri (önek eşleşmesi)
+EXCLUDED_MEDIA_TYPES = (
+    "image/", "video/", "audio/",
+    "application/zip", "application/gzip", "application/x-gzip",
+    "text/event-stream", # SSE olayları anında iletilmeli
+)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Accept-Encoding başlığına göre kullanılacak sıkıştırmayı seçer (br > gzip).
+    """
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) # wbits=31: gzip başlığı
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        if self.encoding == "br":
+            output = self._brotli.process(data)
+            return output + (self._brotli.flush() if flush else b"")
+        output = self._zlib.compress(data)
+        return output + (self._zlib.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    Saf ASGI sıkıştırma ara katmanı.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressionResponder:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # Başlıkları, ilk gövde parçasını görüp karar verene kadar beklet
+            self.start_message = message
+            headers = Headers(raw=message["headers"])
+            media_type = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or media_type.startswith(EXCLUDED_MEDIA_TYPES)
+            )
+            return
+
+        if message_type != "http.response.body":
+            # Örn. http.response.zerocopysend: başlıkları olduğu gibi gönder ve aradan çekil
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+                self.passthrough = True
+            await self.send(message)
+            return
+
+        if self.compressor is None and not self.passthrough:
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+            else:
+                self.compressor = _Compressor(self.encoding)
+                headers = MutableHeaders(raw=self.start_message["headers"])
+                headers["Content-Encoding"] = self.encoding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    compressed = self.compressor.finish(body)
+                    headers["Content-Length"] = str(len(compressed))
+                    await self.send(self.start_message)
+                    self.start_message = None
+                    await self.send({"type": "http.response.body", "body": compressed, "more_body": False})
+                    return
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                await self.send(self.start_message)
+                self.start_message = None
+
+        if self.passthrough:
+            if self.start_message is not None:
+                await self.send(self.start_message)
+                self.start_message = None
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if more_body:
+            data = self.compressor.compress(body, flush=True)
+            if data:
+                await self.send({"type": "http.response.body", "body": data, "more_body": True})
+        else:
+            await self.send({"type": "http.response.body", "body": self.compressor.finish(body), "more_body": False})
@@ -40,4 +40,23 @@ def get_db():
     try:
         yield db # Oturumu istek işleyiciye (route handler) gönder
     finally:
-        db.close() # İstek tamamlandığında oturumu kapat
\ No newline at end of file
+        db.close() # İstek tamamlandığında oturumu kapat
+# Mevcut tablolara sonradan eklenen sütunlar için şema adımı.
+# create_all var olan tabloları değiştirmez (ALTER TABLE yapmaz); projede migration aracı olmadığı
+# için modele sonradan eklenen, boş bırakılabilir sütunlar ve indeksleri başlangıçta burada eklenir.
+# Eksik olmayan sütun/indeks için hiçbir şey yapmaz, bu yüzden her başlangıçta güvenle çalışır.
+def add_missing_columns(*tables):
+    from sqlalchemy import inspect, text
+    with engine.begin() as connection:
+        inspector = inspect(connection)
+        for table in tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} to an existing table automatically.")
+                column_type = column.type.compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            for index in table.indexes:
+                index.create(bind=connection, checkfirst=True)
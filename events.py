@@ -0,0 +1,243 @@
+# events.py
+# Fotoğraf olaylarının (oluşturuldu/silindi) abonelere anlık iletilmesi için
+# süreç içi yayın/abone (pub/sub) aracısı ve isteğe bağlı PostgreSQL LISTEN/NOTIFY köprüsü.
+#
+# Her abone yalnızca küçük bir asyncio.Queue'dan ibarettir; boşta bekleyen binlerce
+# bağlantı neredeyse hiç kaynak tüketmez. Birden çok worker çalıştırılıyorsa
+# EVENTS_PG_BRIDGE=true ile olaylar PostgreSQL üzerinden tüm worker'lara dağıtılır.
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import select
+import threading
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100")) # Abone başına bekleyen en fazla olay
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15")) # Proxy'lerin bağlantıyı kapatmaması için
+EVENTS_PG_BRIDGE = os.getenv("EVENTS_PG_BRIDGE", "false").lower() in ("1", "true", "yes")
+EVENTS_PG_CHANNEL = os.getenv("EVENTS_PG_CHANNEL", "photo_events")
+
+
+class Subscription:
+    """
+    Tek bir SSE bağlantısının aboneliği. Olaylar sınırlı bir kuyrukta bekletilir;
+    istemci yetişemezse kuyruk taşar ve istemciye 'resync' olayı gönderilir.
+    """
+    __slots__ = ("user_id", "is_admin", "queue", "overflowed")
+
+    def __init__(self, user_id: int, is_admin: bool):
+        self.user_id = user_id
+        self.is_admin = is_admin
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+def format_sse(event: dict) -> str:
+    """
+    Olayı Server-Sent Events formatına çevirir.
+    """
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+class EventBroker:
+    """
+    Olayları sahiplerine ve adminlere dağıtan süreç içi aracı.
+    Aboneler sahip ID'sine göre indekslenir, böylece yayın maliyeti sadece
+    ilgili abone sayısı kadardır.
+    """
+
+    def __init__(self):
+        self._by_owner: Dict[int, Set[Subscription]] = {}
+        self._admins: Set[Subscription] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._bridge: Optional["PostgresEventBridge"] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._admins) + sum(len(subs) for subs in self._by_owner.values())
+
+    def start(self, engine=None):
+        """
+        Uygulama başlarken çağrılır. Olay döngüsünü kaydeder ve yapılandırılmışsa
+        PostgreSQL köprüsünü başlatır.
+        """
+        self._loop = asyncio.get_running_loop()
+        if EVENTS_PG_BRIDGE:
+            if engine is None or engine.dialect.name != "postgresql":
+                logger.warning("EVENTS_PG_BRIDGE is enabled but the database is not PostgreSQL. Using in-process events only.")
+            else:
+                self._bridge = PostgresEventBridge(engine, EVENTS_PG_CHANNEL, self._dispatch_threadsafe)
+                self._bridge.start()
+
+    def stop(self):
+        if self._bridge is not None:
+            self._bridge.stop()
+            self._bridge = None
+
+    def subscribe(self, user_id: int, is_admin: bool) -> Subscription:
+        subscription = Subscription(user_id, is_admin)
+        if is_admin:
+            self._admins.add(subscription)
+        else:
+            self._by_owner.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription.is_admin:
+            self._admins.discard(subscription)
+            return
+        subs = self._by_owner.get(subscription.user_id)
+        if subs is not None:
+            subs.discard(subscription)
+            if not subs:
+                del self._by_owner[subscription.user_id]
+
+    def publish(self, event_type: str, owner_id: int, **data):
+        """
+        Bir olay yayınlar. Köprü etkinse olay PostgreSQL NOTIFY ile tüm worker'lara
+        (bu worker dahil) gider; değilse doğrudan yerel abonelere dağıtılır.
+        Veritabanı commit'inden SONRA çağrılmalıdır.
+        """
+        event = {"type": event_type, "owner_id": owner_id, **data}
+        if self._bridge is not None:
+            self._bridge.notify(event)
+        else:
+            self._dispatch_threadsafe(event)
+
+    def _dispatch_threadsafe(self, event: dict):
+        if self._loop is None:
+            return # Henüz başlatılmadı (ör. komut satırı betikleri); dinleyen de yok
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._dispatch(event)
+        else:
+            self._loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event: dict):
+        for subscription in self._by_owner.get(event.get("owner_id"), ()):
+            subscription.offer(event)
+        for subscription in self._admins:
+            subscription.offer(event)
+
+    async def stream(self, subscription: Subscription):
+        """
+        Abonelik için SSE akışı üreten async generator.
+        Bağlantı kapandığında (Starlette görevi iptal eder) abonelik temizlenir.
+        """
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                if subscription.overflowed:
+                    # İstemci geride kaldı: bekleyenleri at ve baştan senkronize olmasını iste
+                    while not subscription.queue.empty():
+                        subscription.queue.get_nowait()
+                    subscription.overflowed = False
+                    yield format_sse({"type": "resync"})
+                    continue
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=EVENTS_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            self.unsubscribe(subscription)
+
+
+class PostgresEventBridge:
+    """
+    Olayları PostgreSQL LISTEN/NOTIFY üzerinden worker'lar arasında taşır.
+    Biri NOTIFY göndermek, diğeri LISTEN için iki ayrı bağlantı ve iki arka plan thread'i kullanır.
+    """
+
+    def __init__(self, engine, channel: str, on_event):
+        self.channel = channel
+        self.on_event = on_event
+        # Bağlantı parametreleri SQLAlchemy'nin kendi bağlantılarıyla aynı şekilde üretilir; böylece
+        # URL'deki sorgu parametreleri (sslmode, connect_timeout vb.) köprüde de geçerli olur
+        self._connect_args, self._connect_kwargs = engine.dialect.create_connect_args(engine.url)
+        self._outbox: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=10000)
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for target in (self._listen_loop, self._notify_loop):
+            thread = threading.Thread(target=target, name=f"pg-events-{target.__name__}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"PostgreSQL event bridge started on channel '{self.channel}'.")
+
+    def stop(self):
+        self._stopping.set()
+        self._outbox.put(None)
+
+    def notify(self, event: dict):
+        try:
+            self._outbox.put_nowait(event)
+        except queue.Full:
+            logger.error("PostgreSQL event bridge outbox is full. Dropping event.")
+
+    def _connect(self):
+        import psycopg2 # PostgreSQL sürücüsü; sadece köprü etkinse gerekir
+        connection = psycopg2.connect(*self._connect_args, **self._connect_kwargs)
+        connection.autocommit = True
+        return connection
+
+    def _notify_loop(self):
+        connection = None
+        while not self._stopping.is_set():
+            event = self._outbox.get()
+            if event is None:
+                break
+            try:
+                if connection is None or connection.closed:
+                    connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, json.dumps(event, default=str)))
+            except Exception as e:
+                logger.error(f"Failed to send event notification: {e}")
+                connection = None
+        if connection is not None:
+            connection.close()
+
+    def _listen_loop(self):
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN "{self.channel}"')
+                while not self._stopping.is_set():
+                    if select.select([connection], [], [], 5.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notification = connection.notifies.pop(0)
+                        try:
+                            self.on_event(json.loads(notification.payload))
+                        except ValueError:
+                            logger.warning(f"Ignoring malformed event payload: {notification.payload!r}")
+            except Exception as e:
+                logger.error(f"PostgreSQL event listener failed, reconnecting: {e}")
+                self._stopping.wait(2.0)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+# Uygulama genelinde paylaşılan aracı
+event_broker = EventBroker()
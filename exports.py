@@ -0,0 +1,137 @@
+# exports.py
+# photos, users ve words tablolarının NDJSON/CSV olarak akış halinde dışa aktarımı.
+# Satırlar sunucu taraflı imleç (yield_per => stream_results) ile gruplar halinde okunur
+# ve her grup hemen yanıta yazılır; bellek kullanımı tablo boyutundan bağımsızdır.
+# Sadece gerekli sütunlar seçilir, ORM nesnesi oluşturulmaz.
+
+import csv
+import io
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import select
+
+from database import SessionLocal
+from models.user import User
+from models.photo import Photo
+from models.word import Word
+from storage import get_media_url
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000")) # Veritabanından tek seferde okunan satır
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class ExportSpec(NamedTuple):
+    columns: list # (alan adı, sütun) çiftleri
+    id_column: object # Sıralama için birincil anahtar
+    owner_column: Optional[object] # owner_id filtresinin uygulanacağı sütun
+    date_column: Optional[object] # since/until filtrelerinin uygulanacağı sütun
+
+
+EXPORT_SPECS = {
+    "photos": ExportSpec(
+        columns=[("id", Photo.id), ("object_name", Photo.object_name), ("size", Photo.size),
+                 ("uploaded_at", Photo.uploaded_at), ("owner_id", Photo.owner_id)],
+        id_column=Photo.id, owner_column=Photo.owner_id, date_column=Photo.uploaded_at,
+    ),
+    "users": ExportSpec(
+        # hashed_password bilerek dışa aktarılmaz
+        columns=[("id", User.id), ("username", User.username), ("email", User.email),
+                 ("is_admin", User.is_admin), ("is_active", User.is_active)],
+        id_column=User.id, owner_column=None, date_column=None,
+    ),
+    "words": ExportSpec(
+        columns=[("id", Word.id), ("word", Word.word), ("create_date", Word.create_date),
+                 ("created_by_user_id", Word.created_by_user_id), ("change_seq", Word.change_seq)],
+        id_column=Word.id, owner_column=Word.created_by_user_id, date_column=Word.create_date,
+    ),
+}
+
+
+def export_field_names(resource: str, include_urls: bool = False) -> List[str]:
+    names = [name for name, _ in EXPORT_SPECS[resource].columns]
+    return names + ["url"] if include_urls else names
+
+
+def build_export_query(resource: str, owner_id: Optional[int] = None,
+                       since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Dışa aktarım sorgusunu oluşturur. Filtre desteklenmiyorsa ValueError fırlatır.
+    """
+    spec = EXPORT_SPECS[resource]
+    query = select(*[column for _, column in spec.columns]).order_by(spec.id_column)
+    if owner_id is not None:
+        if spec.owner_column is None:
+            raise ValueError(f"owner_id filter is not supported for {resource}.")
+        query = query.where(spec.owner_column == owner_id)
+    if since is not None or until is not None:
+        if spec.date_column is None:
+            raise ValueError(f"Date filters are not supported for {resource}.")
+        if since is not None:
+            query = query.where(spec.date_column >= since)
+        if until is not None:
+            query = query.where(spec.date_column < until)
+    return query
+
+
+def _iter_batches(query, field_names: List[str], include_urls: bool) -> Iterator[List[dict]]:
+    # İstek oturumundan bağımsız, dışa aktarım boyunca açık kalan kendi oturumu
+    db = SessionLocal()
+    try:
+        result = db.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            rows = [dict(zip(field_names, row)) for row in partition]
+            if include_urls:
+                for row in rows:
+                    row["url"] = get_media_url(row["object_name"])
+            yield rows
+    finally:
+        db.close()
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_export(resource: str, export_format: str, owner_id: Optional[int] = None,
+                  since: Optional[datetime] = None, until: Optional[datetime] = None,
+                  include_urls: bool = False) -> Iterator[bytes]:
+    """
+    Dışa aktarımı bayt parçaları halinde üretir; her parça bir satır grubudur.
+    Senkron bir generator'dır, StreamingResponse onu thread havuzunda tüketir.
+    Sorgu hemen oluşturulur ki geçersiz filtreler yanıt başlamadan hata versin.
+    """
+    query = build_export_query(resource, owner_id, since, until)
+    field_names = export_field_names(resource)
+    header = export_field_names(resource, include_urls)
+
+    def generate() -> Iterator[bytes]:
+        exported = 0
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=header)
+            writer.writeheader()
+            yield buffer.getvalue().encode("utf-8")
+        for rows in _iter_batches(query, field_names, include_urls):
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=header)
+                writer.writerows(rows)
+                chunk = buffer.getvalue()
+            else:
+                chunk = "".join(json.dumps(row, default=_json_default) + "\n" for row in rows)
+            exported += len(rows)
+            yield chunk.encode("utf-8")
+        logger.info(f"Exported {exported} {resource} rows as {export_format}.")
+
+    return generate()
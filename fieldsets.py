@@ -0,0 +1,55 @@
+# fieldsets.py
+# Liste/detay endpoint'leri için seyrek alan seçimi (sparse fieldsets): `?fields=id,url`
+# İstenmeyen alanlar yanıta eklenmez ve hesaplanmaz (ör. url istenmezse presign yapılmaz).
+
+from typing import Any, Callable, Dict, Optional, Set, Type
+
+from fastapi import HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Endpoint'lerde kullanılacak ortak sorgu parametresi
+FIELDS_QUERY = Query(
+    None,
+    description="Comma-separated list of fields to include in the response (e.g. 'id,url'). Omit for all fields."
+)
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[Set[str]]:
+    """
+    `fields` parametresini ayrıştırır ve yanıt modelindeki alanlara karşı doğrular.
+    Parametre verilmemişse None döndürür (tüm alanlar).
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(model.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(model.model_fields)}"
+        )
+    return requested
+
+
+def wants(selected: Optional[Set[str]], field: str) -> bool:
+    """
+    Alanın yanıtta istenip istenmediğini döndürür.
+    """
+    return selected is None or field in selected
+
+
+def select_fields(obj: Any, getters: Dict[str, Callable[[Any], Any]], selected: Optional[Set[str]]) -> Dict[str, Any]:
+    """
+    Sadece istenen alanların getter'larını çalıştırarak bir sözlük oluşturur.
+    """
+    return {name: getter(obj) for name, getter in getters.items() if wants(selected, name)}
+
+
+def sparse_response(items: Any) -> JSONResponse:
+    """
+    Seçili alanlardan oluşan sözlük(ler)i doğrudan JSON olarak döndürür.
+    response_model doğrulaması eksik alanlar yüzünden başarısız olacağı için atlanır.
+    """
+    return JSONResponse(jsonable_encoder(items))
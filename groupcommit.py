@@ -0,0 +1,208 @@
+# groupcommit.py
+# Eşzamanlı isteklerden gelen INSERT'leri birleştiren (group commit) isteğe bağlı katman.
+# Yoğun yükleme anlarında her istek kendi transaction'ını commit ettiğinde PostgreSQL her satır
+# için ayrı bir fsync bekler. Bu katman kısa bir pencere (GROUP_COMMIT_WINDOW_MS) boyunca veya
+# GROUP_COMMIT_MAX_ROWS satır birikene kadar gelen satırları toplar ve tek bir transaction'da,
+# tek bir çok satırlı INSERT ... RETURNING ile yazar. Her istek kendi satırını (veya hatasını) alır.
+#
+# Toplu yazım hata verirse (ör. bir satır benzersizlik kısıtını ihlal ederse) grup geri alınır ve
+# satırlar tek tek, her biri kendi SAVEPOINT'i içinde tekrar denenir; böylece sadece hatalı satırın
+# sahibi hata alır. GROUP_COMMIT_ENABLED=true ile etkinleştirilir.
+
+import asyncio
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+GROUP_COMMIT_ENABLED = os.getenv("GROUP_COMMIT_ENABLED", "false").lower() in ("1", "true", "yes")
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "2")) # İlk satırdan sonra beklenecek en uzun süre
+GROUP_COMMIT_MAX_ROWS = int(os.getenv("GROUP_COMMIT_MAX_ROWS", "100")) # Bu kadar satır birikince beklemeden yaz
+
+
+class GroupCommitter:
+    """
+    Tek bir tablo için satır biriktirip toplu yazan yardımcı.
+    `before_insert(db, rows)` INSERT'ten önce tüm satırlar için çalışır (ör. sıra numarası ayırma);
+    `after_insert(db, rows, returned)` sadece yazılan satırlar ve onların RETURNING satırlarıyla
+    aynı transaction içinde çalışır (ör. sayaç güncellemesi, iş kuyruğuna ekleme);
+    `after_commit(rows)` commit'ten sonra RETURNING satırlarıyla çağrılır.
+    """
+
+    def __init__(self, model, returning: List,
+                 before_insert: Optional[Callable[[Session, List[dict]], None]] = None,
+                 after_insert: Optional[Callable[[Session, List[dict], List[Any]], None]] = None,
+                 after_commit: Optional[Callable[[List[Any]], None]] = None,
+                 window_ms: float = GROUP_COMMIT_WINDOW_MS, max_rows: int = GROUP_COMMIT_MAX_ROWS):
+        self.model = model
+        self.returning = returning
+        self.before_insert = before_insert
+        self.after_insert = after_insert
+        self.after_commit = after_commit
+        self.window = window_ms / 1000
+        self.max_rows = max_rows
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0 # Yazılan grup sayısı
+        self.rows = 0 # Yazılan satır sayısı
+        self.fallbacks = 0 # Satır satır tekrar denenen grup sayısı
+
+    async def submit(self, values: dict):
+        """
+        Satırı bir sonraki gruba ekler ve yazılmasını bekler. RETURNING ile dönen satırı döndürür;
+        satır yazılamadıysa veritabanı hatasını fırlatır.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((dict(values), future))
+        if len(self._pending) >= self.max_rows:
+            self._flush_now()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush_now)
+        return await future
+
+    def _flush_now(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._write(batch))
+
+    async def _write(self, batch: List[Tuple[dict, asyncio.Future]]):
+        values = [row for row, _ in batch]
+        try:
+            results = await run_in_threadpool(self._write_batch, values)
+        except Exception as e: # Oturum açılamadı vb.; gruptaki herkes hatayı alır
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done(): # İstek bu arada iptal edildi
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _insert_statement(self):
+        return insert(self.model).returning(*self.returning, sort_by_parameter_order=True)
+
+    def _write_batch(self, values: List[dict]) -> List[Any]:
+        db = SessionLocal()
+        try:
+            try:
+                if self.before_insert is not None:
+                    self.before_insert(db, values)
+                results: List[Any] = db.execute(self._insert_statement(), values).all()
+                if self.after_insert is not None:
+                    self.after_insert(db, values, results)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                if len(values) == 1:
+                    return [e]
+                logger.warning(f"Group insert of {len(values)} {self.model.__tablename__} rows failed ({e}); retrying row by row.")
+                self.fallbacks += 1
+                results = self._write_rows(db, values)
+            written = [result for result in results if not isinstance(result, Exception)]
+            self.batches += 1
+            self.rows += len(written)
+            if written and self.after_commit is not None:
+                self.after_commit(written)
+            return results
+        finally:
+            db.close()
+
+    def _write_rows(self, db: Session, values: List[dict]) -> List[Any]:
+        # Her satır kendi SAVEPOINT'inde; hatalı satırlar geri alınır, diğerleri tek commit ile yazılır.
+        # Geri alınan ilk denemede ayrılan değerler (ör. sıra numaraları) geçersiz olduğu için yeniden ayrılır.
+        if self.before_insert is not None:
+            self.before_insert(db, values)
+        results: List[Any] = []
+        written: List[dict] = []
+        returned: List[Any] = []
+        for row in values:
+            try:
+                with db.begin_nested():
+                    result = db.execute(self._insert_statement(), [row]).one()
+                results.append(result)
+                written.append(row)
+                returned.append(result)
+            except Exception as e:
+                results.append(e)
+        if written and self.after_insert is not None:
+            self.after_insert(db, written, returned)
+        db.commit()
+        return results
+
+
+def _photo_after_insert(db: Session, rows: List[dict], returned: List[Any]):
+    from stats import apply_photo_delta
+    from jobs import enqueue
+    # Sahip başına tek bir sayaç güncellemesi
+    deltas: Dict[int, List[int]] = {}
+    for row in rows:
+        delta = deltas.setdefault(row["owner_id"], [0, 0])
+        delta[0] += 1
+        delta[1] += row.get("size") or 0
+    for owner_id in sorted(deltas): # Sabit sıra: eşzamanlı gruplar arasında kilitlenmeyi önler
+        apply_photo_delta(db, owner_id, deltas[owner_id][0], deltas[owner_id][1])
+    # Hash'i olmayan fotoğraflar için yükleme sonrası işleme (bkz. jobs.py), aynı transaction'da
+    for row, result in zip(rows, returned):
+        if row.get("phash") is None:
+            enqueue(db, "photo.process", {"photo_id": result.id})
+
+
+def _publish_photos(rows: List[Any]):
+    from events import event_broker
+    for row in rows:
+        event_broker.publish("photo.created", owner_id=row.owner_id, photo_id=row.id,
+                             object_name=row.object_name, uploaded_at=row.uploaded_at)
+
+
+def _word_change_seqs(db: Session, rows: List[dict]):
+    from wordsync import next_change_seq
+    # Grubun tamamı için tek seferde bir sıra numarası bloğu ayrılır
+    last_seq = next_change_seq(db, len(rows))
+    for offset, row in enumerate(rows):
+        row["change_seq"] = last_seq - len(rows) + 1 + offset
+
+
+def photo_committer(**options) -> GroupCommitter:
+    """
+    Fotoğraf kayıtları için gruplayıcı: kullanıcı sayaçları aynı transaction'da sahip başına
+    tek güncellemeyle artırılır ve yükleme sonrası işleme işleri kuyruğa eklenir,
+    commit sonrası 'photo.created' olayları yayınlanır.
+    """
+    from models.photo import Photo
+    return GroupCommitter(
+        Photo,
+        returning=[Photo.id, Photo.object_name, Photo.size, Photo.uploaded_at, Photo.owner_id],
+        after_insert=_photo_after_insert,
+        after_commit=_publish_photos,
+        **options
+    )
+
+
+def word_committer(**options) -> GroupCommitter:
+    """
+    Kelime kayıtları için gruplayıcı: grubun sıra numaraları (change_seq) tek seferde ayrılır.
+    """
+    from models.word import Word
+    return GroupCommitter(
+        Word,
+        returning=[Word.id, Word.word, Word.create_date, Word.created_by_user_id, Word.change_seq],
+        before_insert=_word_change_seqs,
+        **options
+    )
+
+
+# Uygulama genelinde paylaşılan gruplayıcılar (GROUP_COMMIT_ENABLED ise kullanılır)
+photo_group_commit = photo_committer()
+word_group_commit = word_committer()
@@ -0,0 +1,341 @@
+# jobs.py
+# PostgreSQL üzerinde kalıcı arka plan iş kuyruğu.
+# Yavaş yan etkiler (depolamadan silme, yükleme sonrası işleme, kullanıcı temizliği) istek
+# içinde beklenmez; tetikleyen veritabanı değişikliğiyle AYNI transaction içinde jobs tablosuna
+# bir satır eklenir (enqueue). Commit olduysa iş de kaydedilmiştir, kaybolmaz.
+#
+# Worker'lar sırası gelmiş işleri `SELECT ... FOR UPDATE SKIP LOCKED` ile alır; böylece birden
+# fazla worker (aynı süreçte coroutine'ler veya ayrı süreçler) aynı işi almadan paralel çalışır.
+# Bu yüzden kuyruk PostgreSQL gerektirir. SQLite satır kilidi desteklemez; orada da bir işin iki
+# kez alınmaması koşullu UPDATE ile sağlanır, ancak yarışı kaybeden worker o turda boş döner.
+# Alınan iş JOB_LEASE_SECONDS boyunca kilitlidir; worker çökerse süre dolunca başka worker alır
+# (en az bir kez çalıştırma: işleyiciler tekrar çalıştırılmaya dayanıklı yazılmalıdır).
+# Hata veren iş jitter'lı üstel geri çekilmeyle tekrar denenir; deneme hakkı biterse 'dead'
+# olarak bekletilir (dead letter) ve GET /admin/jobs/dead ile görülüp tekrar kuyruğa alınabilir.
+#
+# Uygulama içinde JOB_WORKERS kadar worker coroutine'i çalışır (0 ise hiç);
+# ayrı süreç olarak: python jobs.py worker
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, func, or_
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.job import Job, JOB_QUEUED, JOB_RUNNING, JOB_DEAD
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2")) # Uygulama içinde çalışan worker coroutine sayısı
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "10")) # Bir worker'ın tek seferde aldığı en fazla iş
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1")) # Kuyruk boşken sorgulama aralığı
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300")) # Alınan işin kilit süresi
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "8")) # Bu kadar denemeden sonra iş 'dead' olur
+JOB_BACKOFF_BASE_SECONDS = float(os.getenv("JOB_BACKOFF_BASE_SECONDS", "2")) # İlk tekrar denemeden önceki bekleme
+JOB_BACKOFF_MAX_SECONDS = float(os.getenv("JOB_BACKOFF_MAX_SECONDS", "600")) # Tekrar denemeler arası en uzun bekleme
+USER_PURGE_CHUNK = 500 # Bir kullanıcı temizleme işindeki en fazla obje sayısı
+
+# İş türü -> işleyici(db, payload). İşleyici hata fırlatırsa iş tekrar denenir.
+JOB_HANDLERS: Dict[str, Callable[[Session, dict], None]] = {}
+
+
+def job_handler(kind: str):
+    """
+    Bir fonksiyonu verilen iş türünün işleyicisi olarak kaydeder.
+    """
+    def register(function: Callable[[Session, dict], None]):
+        JOB_HANDLERS[kind] = function
+        return function
+    return register
+
+
+def enqueue(db: Session, kind: str, payload: dict, delay_seconds: float = 0, max_attempts: int = JOB_MAX_ATTEMPTS) -> Job:
+    """
+    İşi çağıranın transaction'ına ekler. Commit ETMEZ; iş, tetikleyen değişiklikle birlikte commit edilir.
+    """
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+    job = Job(
+        kind=kind,
+        payload=payload,
+        status=JOB_QUEUED,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay_seconds),
+    )
+    db.add(job)
+    return job
+
+
+def backoff_seconds(attempts: int) -> float:
+    """
+    `attempts`. denemeden sonra beklenecek süre: üstel artış, üst sınır ve tam jitter.
+    """
+    ceiling = min(JOB_BACKOFF_MAX_SECONDS, JOB_BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class JobMetrics:
+    """
+    Bu süreçteki worker'ların iş türü bazında sayaçları.
+    """
+
+    def __init__(self):
+        self.kinds: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, outcome: str, duration: float):
+        with self._lock:
+            entry = self.kinds.setdefault(kind, {"succeeded": 0, "retried": 0, "dead": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            entry[outcome] += 1
+            entry["total_seconds"] += duration
+            entry["max_seconds"] = max(entry["max_seconds"], duration)
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {kind: dict(entry, total_seconds=round(entry["total_seconds"], 3), max_seconds=round(entry["max_seconds"], 3))
+                    for kind, entry in self.kinds.items()}
+
+
+# Uygulama genelinde paylaşılan sayaçlar
+job_metrics = JobMetrics()
+
+
+def claim_jobs(db: Session, worker_id: str, limit: int = JOB_BATCH_SIZE) -> List[Tuple[int, str, dict, int, int]]:
+    """
+    Sırası gelmiş (veya kilidi süresi dolmuş) işleri kilitleyerek alır ve 'running' yapar.
+    Diğer worker'ların kilitlediği satırlar atlanır (SKIP LOCKED). Kilidi dolan işin deneme hakkı
+    bittiyse tekrar çalıştırılmaz, 'dead' olur. (id, tür, payload, deneme, en fazla deneme) döndürür.
+    """
+    now = datetime.utcnow()
+    jobs = (
+        db.query(Job)
+        .filter(or_(
+            and_(Job.status == JOB_QUEUED, Job.run_at <= now),
+            and_(Job.status == JOB_RUNNING, Job.locked_until < now), # Çöken worker'ın işi
+        ))
+        .order_by(Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    claimed = []
+    for job in jobs:
+        # Koşullu UPDATE: satır okunduktan sonra başka bir worker işi aldıysa (SKIP LOCKED olmayan
+        # SQLite'ta mümkün) durumu veya deneme sayısı değişmiştir ve hiçbir satır güncellenmez.
+        unchanged = db.query(Job).filter(Job.id == job.id, Job.status == job.status, Job.attempts == job.attempts)
+        if job.status == JOB_RUNNING and job.attempts >= job.max_attempts:
+            # Son denemede worker çöktü (veya iş her seferinde worker'ı düşürüyor); tekrar alınmaz
+            values = {"status": JOB_DEAD, "locked_until": None, "locked_by": None,
+                      "last_error": f"Lease expired after {job.attempts} attempts (last worker: {job.locked_by})."}
+            if unchanged.update(values, synchronize_session=False):
+                logger.error(f"Job {job.id} ({job.kind}) lease expired on its last attempt ({job.attempts}/{job.max_attempts}), marked dead.")
+                job_metrics.record(job.kind, "dead", 0.0)
+            continue
+        values = {"status": JOB_RUNNING, "attempts": job.attempts + 1,
+                  "locked_until": now + timedelta(seconds=JOB_LEASE_SECONDS), "locked_by": worker_id}
+        if unchanged.update(values, synchronize_session=False):
+            claimed.append((job.id, job.kind, job.payload, job.attempts + 1, job.max_attempts))
+    db.commit()
+    return claimed
+
+
+def run_job(job_id: int, kind: str, payload: dict, attempts: int, max_attempts: int) -> bool:
+    """
+    İşi kendi oturumunda çalıştırır. Başarılıysa iş satırı, işleyicinin değişiklikleriyle aynı
+    transaction'da silinir. Hata olursa iş geri çekilmeyle tekrar kuyruğa alınır veya 'dead' olur.
+    """
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        try:
+            handler = JOB_HANDLERS.get(kind)
+            if handler is None:
+                raise RuntimeError(f"No handler registered for job kind '{kind}'.")
+            handler(db, payload)
+            db.query(Job).filter(Job.id == job_id).delete(synchronize_session=False)
+            db.commit()
+            job_metrics.record(kind, "succeeded", time.perf_counter() - started)
+            return True
+        except Exception as e:
+            db.rollback()
+            dead = attempts >= max_attempts
+            values = {"last_error": f"{type(e).__name__}: {e}"[:2000], "locked_until": None, "locked_by": None}
+            if dead:
+                values["status"] = JOB_DEAD
+                logger.error(f"Job {job_id} ({kind}) failed permanently after {attempts} attempts: {e}")
+            else:
+                delay = backoff_seconds(attempts)
+                values.update(status=JOB_QUEUED, run_at=datetime.utcnow() + timedelta(seconds=delay))
+                logger.warning(f"Job {job_id} ({kind}) failed (attempt {attempts}/{max_attempts}), retrying in {delay:.0f} s: {e}")
+            db.query(Job).filter(Job.id == job_id).update(values, synchronize_session=False)
+            db.commit()
+            job_metrics.record(kind, "dead" if dead else "retried", time.perf_counter() - started)
+            return False
+    finally:
+        db.close()
+
+
+def _claim(worker_id: str) -> List[Tuple[int, str, dict, int, int]]:
+    db = SessionLocal()
+    try:
+        return claim_jobs(db, worker_id)
+    finally:
+        db.close()
+
+
+async def run_worker(worker_id: str):
+    """
+    İşleri alıp sırayla çalıştıran worker döngüsü. Veritabanı ve depolama çağrıları
+    olay döngüsünü bloklamasın diye thread havuzunda yapılır. Görev iptal edilene kadar çalışır.
+    """
+    logger.info(f"Job worker {worker_id} started.")
+    while True:
+        try:
+            claimed = await run_in_threadpool(_claim, worker_id)
+            for job in claimed:
+                await run_in_threadpool(run_job, *job)
+        except Exception as e:
+            logger.error(f"Job worker {worker_id} failed to process the queue: {e}")
+            claimed = []
+        if len(claimed) < JOB_BATCH_SIZE: # Kuyruk boşaldı; dolu bir grup aldıysak hemen devam
+            await asyncio.sleep(JOB_POLL_SECONDS)
+
+
+def start_workers(count: int = JOB_WORKERS) -> List[asyncio.Task]:
+    """
+    Uygulama başlarken (olay döngüsü içinden) worker coroutine'lerini başlatır.
+    """
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    return [asyncio.create_task(run_worker(f"{prefix}:{index}")) for index in range(count)]
+
+
+def queue_summary(db: Session) -> dict:
+    """
+    İzleme için kuyruk durumu: durum ve tür bazında iş sayıları, bekleyen en eski işin yaşı
+    ve bu süreçteki worker sayaçları.
+    """
+    counts: Dict[str, Dict[str, int]] = {}
+    for kind, status, count in db.query(Job.kind, Job.status, func.count()).group_by(Job.kind, Job.status).all():
+        counts.setdefault(kind, {})[status] = count
+    oldest = db.query(func.min(Job.run_at)).filter(Job.status == JOB_QUEUED).scalar()
+    return {
+        "queue": counts,
+        "oldest_queued_seconds": round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0.0,
+        "workers_in_process": JOB_WORKERS,
+        "processed": job_metrics.snapshot(),
+    }
+
+
+def retry_dead_job(db: Session, job_id: int) -> Optional[Job]:
+    """
+    'dead' durumundaki işi deneme sayacını sıfırlayarak hemen tekrar kuyruğa alır.
+    """
+    job = db.query(Job).filter(Job.id == job_id, Job.status == JOB_DEAD).first()
+    if job is None:
+        return None
+    job.status = JOB_QUEUED
+    job.attempts = 0
+    job.run_at = datetime.utcnow()
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+# İş işleyicileri
+
+@job_handler("storage.delete")
+def delete_object_job(db: Session, payload: dict):
+    """
+    Objeyi depolamadan siler. Obje zaten yoksa başarılı sayılır.
+    """
+    from storage import delete_file
+    if not delete_file(payload["object_name"]):
+        raise RuntimeError(f"Could not delete '{payload['object_name']}' from storage.")
+
+
+@job_handler("photo.process")
+def process_photo_job(db: Session, payload: dict):
+    """
+    Yükleme sonrası işleme: fotoğrafın algısal hash'ini hesaplar (bkz. phash.py).
+    Fotoğraf bu arada silindiyse veya hash zaten hesaplandıysa yapacak iş yoktur.
+    """
+    from models.photo import Photo
+    from phash import Image, compute_dhash, photo_hash_columns
+    from storage import get_file
+
+    photo = db.query(Photo).filter(Photo.id == payload["photo_id"]).first()
+    if photo is None or photo.phash is not None or Image is None:
+        return
+    data = get_file(photo.object_name)
+    if data is None:
+        raise RuntimeError(f"Could not read '{photo.object_name}' from storage.")
+    for column, value in photo_hash_columns(compute_dhash(data)).items():
+        setattr(photo, column, value)
+
+
+@job_handler("user.purge")
+def purge_user_job(db: Session, payload: dict):
+    """
+    Silinen kullanıcının depolamadaki objelerini siler ve yarım kalan parçalı yüklemelerini iptal eder.
+    Veritabanı kayıtları kullanıcı silinirken aynı transaction'da silinmiştir.
+    İş tekrar çalıştırılırsa zaten silinmiş objeler sorun çıkarmaz.
+    """
+    from storage import abort_multipart_upload, delete_file
+    failed = [name for name in payload.get("object_names", []) if not delete_file(name)]
+    failed += [name for name, upload_id in payload.get("uploads", []) if not abort_multipart_upload(name, upload_id)]
+    if failed:
+        raise RuntimeError(f"Could not clean up {len(failed)} objects of user {payload.get('user_id')}, e.g. '{failed[0]}'.")
+
+
+def enqueue_user_purge(db: Session, user_id: int, object_names: List[str], uploads: List[Tuple[str, str]]):
+    """
+    Kullanıcının objelerini USER_PURGE_CHUNK'lık işlere bölerek kuyruğa ekler (commit ETMEZ).
+    """
+    for start in range(0, len(object_names), USER_PURGE_CHUNK):
+        enqueue(db, "user.purge", {"user_id": user_id, "object_names": object_names[start:start + USER_PURGE_CHUNK]})
+    if uploads:
+        enqueue(db, "user.purge", {"user_id": user_id, "uploads": [list(upload) for upload in uploads]})
+
+
+if __name__ == "__main__":
+    # Kullanım: python jobs.py worker --workers 4
+    #           python jobs.py stats
+    parser = argparse.ArgumentParser(description="Background job queue")
+    parser.add_argument("command", choices=["worker", "stats"], help="worker: process jobs until interrupted; stats: print queue summary")
+    parser.add_argument("--workers", type=int, default=max(JOB_WORKERS, 1), help="Number of worker coroutines")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from database import Base, engine
+    import models.user, models.photo, models.word, models.album, models.upload_session, models.user_stats  # noqa: F401 - ilişkilerin çözülmesi için
+    Base.metadata.create_all(bind=engine)
+
+    if args.command == "stats":
+        db = SessionLocal()
+        try:
+            print(queue_summary(db))
+        finally:
+            db.close()
+    else:
+        from storage import initialize_storage, ensure_storage_ready
+        if not (initialize_storage() and ensure_storage_ready()):
+            logger.warning("Storage backend failed to initialize; jobs will retry until it is available.")
+
+        async def main():
+            await asyncio.gather(*start_workers(args.workers))
+
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            logger.info("Job workers stopped.")
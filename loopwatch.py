@@ -0,0 +1,153 @@
+# loopwatch.py
+# Olay döngüsü (event loop) bloklanma bekçisi.
+# `async def` handler'lar içindeki senkron SQLAlchemy, boto3 ve bcrypt çağrıları olay döngüsünü
+# durdurur; bu sırada diğer tüm istekler bekler. Bekçi iki parçadan oluşur:
+#   - Döngü içinde düzenli aralıklarla uyanan bir kalp atışı (heartbeat) coroutine'i
+#   - Kalp atışı eşikten uzun süre gecikirse döngü thread'inin o anki yığınını
+#     sys._current_frames() ile yakalayan bir izleme thread'i
+# Yakalanan yığın, route handler'larının code nesneleri ile eşleştirilerek bloklayan route bulunur;
+# olay loglanır ve route bazında sayaçlara eklenir (GET /admin/loop-stalls).
+# LOOPWATCH_ENABLED=true ile etkinleştirilir.
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LOOPWATCH_ENABLED = os.getenv("LOOPWATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+LOOPWATCH_THRESHOLD_MS = float(os.getenv("LOOPWATCH_THRESHOLD_MS", "100")) # Bu süreden uzun bloklanmalar raporlanır
+LOOPWATCH_INTERVAL_MS = float(os.getenv("LOOPWATCH_INTERVAL_MS", "20")) # Kalp atışı aralığı
+LOOPWATCH_STACK_LIMIT = 30 # Loglanan yığındaki en fazla çerçeve sayısı
+
+UNKNOWN_ROUTE = "<unknown>"
+
+
+class LoopWatchdog:
+    """
+    Olay döngüsünün bloklandığı anları tespit eder ve bloklayan route'a göre sayar.
+    """
+
+    def __init__(self, threshold_ms: float = LOOPWATCH_THRESHOLD_MS, interval_ms: float = LOOPWATCH_INTERVAL_MS):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.stall_count = 0 # Toplam bloklanma sayısı (sayaç metriği)
+        self.routes: Dict[str, dict] = {}
+        self._code_routes: Dict[object, str] = {}
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._pending: Optional[dict] = None # İzleme thread'inin yakaladığı, henüz bitmemiş bloklanma
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def register_routes(self, app):
+        """
+        Route handler'larının ve bağımlılıklarının code nesnelerini route adlarıyla eşleştirir.
+        """
+        for route in app.routes:
+            endpoint = getattr(route, "endpoint", None)
+            code = getattr(endpoint, "__code__", None)
+            if code is None:
+                continue
+            methods = ",".join(sorted(getattr(route, "methods", None) or ()))
+            self._code_routes[code] = f"{methods} {route.path}".strip()
+            dependant = getattr(route, "dependant", None)
+            if dependant is not None:
+                self._register_dependencies(dependant)
+
+    def _register_dependencies(self, dependant):
+        for dependency in dependant.dependencies:
+            code = getattr(dependency.call, "__code__", None)
+            if code is not None and code not in self._code_routes:
+                self._code_routes[code] = f"dependency {dependency.call.__name__}"
+            self._register_dependencies(dependency)
+
+    def start(self, app=None):
+        """
+        Uygulama başlarken (olay döngüsü içinden) çağrılır.
+        """
+        if app is not None:
+            self.register_routes(app)
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._monitor, name="loopwatch", daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop watchdog started (threshold: {self.threshold * 1000:.0f} ms).")
+
+    def stop(self):
+        self._stopping.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = now - expected
+            if lag >= self.threshold:
+                self._record_stall(lag)
+
+    def _monitor(self):
+        while not self._stopping.wait(self.interval):
+            blocked_for = time.monotonic() - self._last_beat
+            if blocked_for < self.threshold + self.interval or self._pending is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            route = self._route_for(frame)
+            stack = "".join(traceback.format_stack(frame, limit=LOOPWATCH_STACK_LIMIT))
+            with self._lock:
+                self._pending = {"route": route, "stack": stack}
+            logger.warning(f"Event loop blocked for more than {blocked_for * 1000:.0f} ms in {route}:\n{stack}")
+
+    def _route_for(self, frame) -> str:
+        # Bloklayan koda en yakın (en içteki) handler/bağımlılık çerçevesi seçilir
+        while frame is not None:
+            route = self._code_routes.get(frame.f_code)
+            if route is not None:
+                return route
+            frame = frame.f_back
+        return UNKNOWN_ROUTE
+
+    def _record_stall(self, lag: float):
+        with self._lock:
+            pending, self._pending = self._pending, None
+            route = pending["route"] if pending else UNKNOWN_ROUTE
+            self.stall_count += 1
+            entry = self.routes.setdefault(route, {"route": route, "count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_stack": None})
+            entry["count"] += 1
+            entry["total_ms"] += lag * 1000
+            entry["max_ms"] = max(entry["max_ms"], lag * 1000)
+            if pending:
+                entry["last_stack"] = pending["stack"]
+        logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms by {route}.")
+
+    def summary(self) -> dict:
+        """
+        Döngüyü en çok bloklayan route'ları toplam bloklanma süresine göre döndürür.
+        """
+        with self._lock:
+            routes = [dict(entry, total_ms=round(entry["total_ms"], 1), max_ms=round(entry["max_ms"], 1)) for entry in self.routes.values()]
+        return {
+            "enabled": self._task is not None,
+            "threshold_ms": self.threshold * 1000,
+            "stall_count": self.stall_count,
+            "routes": sorted(routes, key=lambda entry: entry["total_ms"], reverse=True),
+        }
+
+
+# Uygulama genelinde paylaşılan bekçi
+loop_watchdog = LoopWatchdog()
@@ -1,26 +1,39 @@
 # main.py
 # FastAPI uygulamasının ana giriş noktası
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware # CORS yönetimi için
+from compression import CompressionMiddleware # gzip/brotli yanıt sıkıştırma için
+from profiling import ProfilingMiddleware # Adminler için istek bazında profilleme
 
-from database import Base, engine # Veritabanı modelimizin temeli ve motoru
+from database import Base, engine, SessionLocal, add_missing_columns # Veritabanı modelimizin temeli, motoru, oturum fabrikası ve şema adımı
 # Tüm SQLAlchemy modellerini içe aktarın ki Base.metadata.create_all onları tanısın
 import models.user # User modelini içe aktarır
 import models.photo # Photo modelini içe aktarır
 import models.word # Word modelini içe aktarır
+import models.user_stats # UserStats modelini içe aktarır
+import models.upload_session # UploadSession modellerini içe aktarır
+import models.album # Album modellerini içe aktarır
+import models.job # Job (arka plan iş kuyruğu) modelini içe aktarır
 
 # Router'ları içe aktarın
-from routers import auth, users, photos, words
+from routers import auth, users, photos, words, media, uploads, albums, admin
 
-# MinIO istemcisini başlatmak ve bucket oluşturmak için storage modülünü import edin
-# s3_client'ı artık doğrudan import ETMİYORUZ. Onun yerine get_s3_client kullanacağız.
-from storage import initialize_minio_client, create_bucket_if_not_exists, get_s3_client
+# Depolama katmanını başlatmak ve bucket/dizin oluşturmak için storage modülünü import edin
+from storage import initialize_storage, ensure_storage_ready, StorageUnavailableError
+from events import event_broker # Fotoğraf olayları aracısı (SSE)
+from loopwatch import loop_watchdog, LOOPWATCH_ENABLED # Olay döngüsü bloklanma bekçisi
+from jobs import start_workers, JOB_WORKERS # Kalıcı arka plan iş kuyruğu worker'ları
+from wordsync import backfill_change_seq # Eski kelimelere senkronizasyon sıra numarası vermek için
+import asyncio # Arka plan görevleri için
 import logging # Loglama için
-import os # Ortam değişkenleri için (MINIO_BUCKET_NAME için)
 
 logger = logging.getLogger(__name__) # main.py için bir logger oluştur
 
+# Uygulama ömrü boyunca çalışan arka plan görevleri (kapanışta iptal edilir)
+background_tasks = []
+
 app = FastAPI(
     title="Photo Gallery API", # API başlığı
     description="A simple photo gallery API with user authentication and photo management.", # API açıklaması
@@ -46,42 +59,88 @@ app.add_middleware(
     allow_headers=["*"], # Tüm başlıklara izin ver
 )
 
+# İstek bazında profilleme (X-Profile başlığı, sadece adminler). Tetiklenmediğinde ek iş yapmaz.
+app.add_middleware(ProfilingMiddleware)
+
+# Yanıt sıkıştırma (gzip/brotli). Küçük yanıtlar, resimler ve SSE akışları sıkıştırılmaz.
+app.add_middleware(CompressionMiddleware)
+
 # Router'ları ana FastAPI uygulamasına dahil et
 app.include_router(auth.router) # Kimlik doğrulama router'ı
 app.include_router(users.router) # Kullanıcı router'ı
 app.include_router(photos.router) # Fotoğraf router'ı
 app.include_router(words.router) # Kelime router'ı
+app.include_router(media.router) # Yerel depolama dosya servisi router'ı
+app.include_router(uploads.router) # Parçalı yükleme router'ı
+app.include_router(albums.router) # Albüm router'ı
+app.include_router(admin.router) # Yönetim router'ı
+
+@app.exception_handler(StorageUnavailableError)
+async def storage_unavailable_handler(request: Request, exc: StorageUnavailableError):
+    """
+    Depolama sağlıksızken (devre açık, zaman aşımı, başlatılamadı) istemciye 503 döndürür.
+    """
+    headers = {"Retry-After": str(max(1, int(exc.retry_after + 0.5)))} if exc.retry_after else None
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Storage is temporarily unavailable. Please retry later."},
+        headers=headers
+    )
 
 @app.on_event("startup")
 async def startup_event():
     """
     Uygulama başladığında çalışacak olay.
-    Veritabanı tablolarını oluşturur ve MinIO istemcisini başlatır/bucket'ı kontrol eder.
+    Veritabanı tablolarını oluşturur ve depolama arka ucunu başlatır/bucket'ı kontrol eder.
     """
     logger.info("Application startup: Creating database tables if they don't exist...")
     Base.metadata.create_all(bind=engine)
     logger.info("Database tables created (or already existed).")
+    # create_all var olan tablolara sonradan eklenen sütunları eklemez; onları burada ekle
+    add_missing_columns(models.word.Word.__table__, models.photo.Photo.__table__)
 
-    logger.info("Application startup: Initializing MinIO client and ensuring bucket...")
-    initialize_minio_client() # MinIO istemcisini başlatma fonksiyonunu çağır
+    db = SessionLocal()
+    try:
+        backfill_change_seq(db) # Sıra numarası olmayan kelimeleri numaralandır (yoksa tek bir sorgu)
+    finally:
+        db.close()
 
-    # Şimdi s3_client'ın durumunu kontrol etmek için get_s3_client() kullanıyoruz.
-    if get_s3_client() is None:
-        logger.critical("MinIO client failed to initialize. File upload/management will not function.")
-        # Uygulamanın MinIO olmadan çalışmasını istemiyorsanız burada bir hata fırlatabilirsiniz:
-        # raise RuntimeError("MinIO client initialization failed.")
+    logger.info("Application startup: Initializing storage backend and ensuring bucket...")
+    if not initialize_storage(): # Yapılandırılmış depolama arka ucunu başlat
+        logger.critical("Storage backend failed to initialize. Storage calls will return 503 and retry initialization with backoff.")
+        # Uygulamanın depolama olmadan çalışmasını istemiyorsanız burada bir hata fırlatabilirsiniz:
+        # raise RuntimeError("Storage initialization failed.")
     else:
-        logger.info("MinIO client successfully initialized. Checking/creating bucket...")
-        bucket_name = os.getenv("MINIO_BUCKET_NAME")
-        if bucket_name:
-            # create_bucket_if_not_exists artık içeride get_s3_client() kullandığı için
-            # burada ekstra bir parametre geçmeye gerek yok.
-            if not create_bucket_if_not_exists():
-                logger.critical(f"Failed to ensure MinIO bucket '{bucket_name}' exists. File operations may fail.")
-            else:
-                logger.info(f"MinIO bucket '{bucket_name}' confirmed.")
+        logger.info("Storage backend successfully initialized. Checking/creating bucket...")
+        if not ensure_storage_ready():
+            logger.critical("Failed to ensure storage bucket/directory exists. File operations may fail.")
         else:
-            logger.critical("MINIO_BUCKET_NAME environment variable is not set. Cannot ensure bucket exists.")
+            logger.info("Storage bucket/directory confirmed.")
+
+    # Fotoğraf olayları aracısını başlat (yapılandırılmışsa PostgreSQL köprüsü dahil)
+    event_broker.start(engine)
+
+    # Tamamlanmamış parçalı yükleme oturumlarını periyodik olarak temizle
+    background_tasks.append(asyncio.create_task(uploads.run_upload_session_sweeper()))
+
+    # Kuyruktaki arka plan işlerini (depolama silme, yükleme sonrası işleme, kullanıcı temizliği) çalıştır.
+    # JOB_WORKERS=0 ise işler yalnızca ayrı worker süreçlerinde çalışır (python jobs.py worker).
+    background_tasks.extend(start_workers(JOB_WORKERS))
+
+    # Olay döngüsünü bloklayan handler'ları tespit et (LOOPWATCH_ENABLED=true ise)
+    if LOOPWATCH_ENABLED:
+        loop_watchdog.start(app)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Uygulama kapanırken çalışacak olay. Arka plan bağlantılarını kapatır.
+    """
+    for task in background_tasks:
+        task.cancel()
+    event_broker.stop()
+    loop_watchdog.stop()
 
 
 @app.get("/", summary="Root endpoint")
@@ -0,0 +1,94 @@
+# mediaauth.py
+# Traefik forwardAuth ile medya yetkilendirmesi için yardımcılar.
+# MEDIA_URL_MODE=stable iken fotoğraf URL'leri imzasızdır: https://media.../{bucket}/uploads/{username}/...
+# Traefik bu adrese gelen her istekte /auth/media-verify'a sorar; endpoint JWT'deki kullanıcının
+# yol önekindeki kullanıcı olup olmadığına (veya admin olduğuna) bakar. Kararlar kısa süre
+# bellekte tutulur; böylece aynı sayfadaki onlarca resim için veritabanına tek sorgu gider.
+
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+MEDIA_AUTH_CACHE_SECONDS = float(os.getenv("MEDIA_AUTH_CACHE_SECONDS", "60")) # Bir kararın geçerlilik süresi
+MEDIA_AUTH_CACHE_MAX_ENTRIES = int(os.getenv("MEDIA_AUTH_CACHE_MAX_ENTRIES", "100000"))
+# Tarayıcılar <img> isteklerine Authorization başlığı ekleyemediği için token çerezle de kabul edilir
+MEDIA_AUTH_COOKIE = os.getenv("MEDIA_AUTH_COOKIE", "media_token")
+MEDIA_COOKIE_DOMAIN = os.getenv("MEDIA_COOKIE_DOMAIN") or None # örn: .superisi.net (API ve medya alt alan adları için)
+MEDIA_COOKIE_SECURE = os.getenv("MEDIA_COOKIE_SECURE", "true").lower() in ("1", "true", "yes")
+
+MEDIA_PREFIX = "uploads"
+
+
+class MediaPath(NamedTuple):
+    bucket: str
+    username: str
+    object_name: str
+
+
+def parse_media_path(uri: str) -> Optional[MediaPath]:
+    """
+    Traefik'in X-Forwarded-Uri başlığındaki yolu /{bucket}/uploads/{username}/... olarak çözer.
+    Biçim uymuyorsa (veya yol '..' içeriyorsa) None döndürür.
+    """
+    path = unquote(urlsplit(uri).path)
+    parts = path.lstrip("/").split("/")
+    if len(parts) < 4 or parts[1] != MEDIA_PREFIX or not all(parts) or ".." in parts:
+        return None
+    return MediaPath(bucket=parts[0], username=parts[2], object_name="/".join(parts[1:]))
+
+
+def token_digest(token: str) -> str:
+    # Önbellekte token'ın kendisi değil özeti tutulur
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class DecisionCache:
+    """
+    (token özeti, yol kullanıcısı) -> (HTTP durum kodu, kullanıcı adı) kararlarını süreli tutan önbellek.
+    """
+
+    def __init__(self, ttl: float = MEDIA_AUTH_CACHE_SECONDS, max_entries: int = MEDIA_AUTH_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, str], Tuple[float, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str]) -> Optional[Tuple[int, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def put(self, key: Tuple[str, str], status_code: int, username: str, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[key] = (time.monotonic() + ttl, status_code, username)
+
+    def _evict(self):
+        # Önce süresi dolmuş kayıtlar, hâlâ doluysa en eski eklenenler atılır (dict ekleme sırasını korur)
+        now = time.monotonic()
+        for key in [key for key, entry in self._entries.items() if entry[0] <= now]:
+            del self._entries[key]
+        if len(self._entries) >= self.max_entries:
+            for key in list(self._entries)[: len(self._entries) // 10 or 1]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Uygulama genelinde paylaşılan karar önbelleği
+media_decisions = DecisionCache()
@@ -0,0 +1,83 @@
+# models/album.py
+# Albüm veritabanı modelleri (SQLAlchemy) ve Pydantic şemaları
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.orm import relationship # İlişkileri tanımlamak için
+from pydantic import BaseModel, Field # Pydantic modelleri için
+from datetime import datetime # Tarih ve saat objeleri için
+from typing import List, Optional # Tip ipuçları için
+
+from database import Base # Veritabanı modelimizin temel sınıfı
+
+# SQLAlchemy Album modeli (Veritabanı tablosu için)
+class Album(Base):
+    __tablename__ = "albums" # Veritabanındaki tablo adı
+
+    id = Column(Integer, primary_key=True, index=True) # Benzersiz ID, birincil anahtar
+    name = Column(String(100), nullable=False) # Albüm adı
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True) # Albümün sahibi
+    created_at = Column(DateTime, default=datetime.utcnow) # Oluşturulma zamanı (UTC)
+
+    owner = relationship("User")
+
+    def __repr__(self):
+        return f"<Album(id={self.id}, name='{self.name}', owner_id={self.owner_id})>"
+
+# Albüm ile fotoğraf arasındaki sıralı çoka-çok ilişki tablosu.
+# Benzersiz (album_id, position) indeksi sayesinde bir albümün sayfası tek bir indeks taramasıyla okunur;
+# benzersizlik, pozisyon imleciyle sayfalamada aynı pozisyondaki satırların atlanmasını önler.
+class AlbumPhoto(Base):
+    __tablename__ = "album_photos" # Veritabanındaki tablo adı
+
+    album_id = Column(Integer, ForeignKey("albums.id", ondelete="CASCADE"), primary_key=True)
+    photo_id = Column(Integer, ForeignKey("photos.id", ondelete="CASCADE"), primary_key=True, index=True)
+    position = Column(Integer, nullable=False) # Albüm içindeki sıra
+    added_at = Column(DateTime, default=datetime.utcnow) # Albüme eklenme zamanı (UTC)
+
+    __table_args__ = (
+        UniqueConstraint("album_id", "position", name="uq_album_photos_album_position"),
+    )
+
+# Pydantic Şemaları (API istek ve yanıtları için)
+
+# Yeni albüm oluşturma isteği şeması
+class AlbumCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "name": "Tatil 2023"
+            }
+        }
+
+# Albüme fotoğraf ekleme isteği şeması (verilen sırayla albümün sonuna eklenir)
+class AlbumPhotosAdd(BaseModel):
+    photo_ids: List[int] = Field(..., min_length=1, max_length=500)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "photo_ids": [12, 15, 18]
+            }
+        }
+
+# API yanıtı için albüm şeması
+class AlbumResponse(BaseModel):
+    id: int
+    name: str
+    owner_id: int
+    created_at: datetime
+    photo_count: Optional[int] = None
+
+    class Config:
+        from_attributes = True # SQLAlchemy modellerinden Pydantic modellerine dönüşüm için
+        json_schema_extra = {
+            "example": {
+                "id": 1,
+                "name": "Tatil 2023",
+                "owner_id": 1,
+                "created_at": "2023-10-27T10:30:00.000000",
+                "photo_count": 24
+            }
+        }
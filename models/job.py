@@ -0,0 +1,68 @@
+# models/job.py
+# Kalıcı arka plan iş kuyruğu modeli (SQLAlchemy) ve Pydantic şemaları
+
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Text, Index
+from pydantic import BaseModel # Pydantic modelleri için
+from datetime import datetime # Tarih ve saat objeleri için
+from typing import Any, Dict, Optional # Tip ipuçları için
+
+from database import Base # Veritabanı modelimizin temel sınıfı
+
+# İş durumları
+JOB_QUEUED = "queued" # Çalışmayı bekliyor (run_at zamanı gelince)
+JOB_RUNNING = "running" # Bir worker tarafından alındı (locked_until zamanına kadar)
+JOB_DEAD = "dead" # Deneme hakkı bitti; elle tekrar kuyruğa alınana kadar bekler (dead letter)
+
+# SQLAlchemy Job modeli (Veritabanı tablosu için)
+# İşler, tetikleyen veritabanı değişikliğiyle aynı transaction içinde eklenir; böylece
+# değişiklik commit edildiyse iş de kaybolmaz. Başarıyla biten işler tablodan silinir.
+class Job(Base):
+    __tablename__ = "jobs" # Veritabanındaki tablo adı
+
+    id = Column(Integer, primary_key=True, index=True) # Benzersiz ID, birincil anahtar
+    kind = Column(String(50), nullable=False) # İş türü (örn: 'storage.delete'), bkz. jobs.py
+    payload = Column(JSON, nullable=False) # İşin parametreleri
+    status = Column(String(10), nullable=False, default=JOB_QUEUED)
+    attempts = Column(Integer, nullable=False, default=0) # Şimdiye kadar yapılan deneme sayısı
+    max_attempts = Column(Integer, nullable=False) # Bu sayıya ulaşınca iş 'dead' olur
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow) # En erken çalışma zamanı (geri çekilme için)
+    locked_until = Column(DateTime, nullable=True) # Çalışan işin kilidi; süresi dolarsa iş tekrar alınabilir
+    locked_by = Column(String(100), nullable=True) # İşi alan worker
+    last_error = Column(Text, nullable=True) # Son hatanın açıklaması
+    created_at = Column(DateTime, default=datetime.utcnow) # Oluşturulma zamanı (UTC)
+
+    # Worker'ların "sırası gelmiş işler" sorgusu için
+    __table_args__ = (Index("ix_jobs_status_run_at", "status", "run_at"),)
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind='{self.kind}', status='{self.status}', attempts={self.attempts})>"
+
+# Pydantic Şemaları (API yanıtları için)
+
+# API yanıtı için iş şeması (dead letter listesi vb.)
+class JobResponse(BaseModel):
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    status: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True # SQLAlchemy modellerinden Pydantic modellerine dönüşüm için
+        json_schema_extra = {
+            "example": {
+                "id": 12,
+                "kind": "storage.delete",
+                "payload": {"object_name": "uploads/testuser/a1b2c3d4.jpg"},
+                "status": "dead",
+                "attempts": 8,
+                "max_attempts": 8,
+                "run_at": "2023-10-27T10:30:00.000000",
+                "last_error": "StorageUnavailableError: Storage delete failed.",
+                "created_at": "2023-10-27T10:00:00.000000"
+            }
+        }
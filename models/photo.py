@@ -1,11 +1,11 @@
 # models/photo.py
 # Fotoğraf veritabanı modeli (SQLAlchemy) ve Pydantic şemaları
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship # İlişkileri tanımlamak için
-from pydantic import BaseModel, HttpUrl # Pydantic modelleri ve URL doğrulama için
+from pydantic import BaseModel, Field, HttpUrl # Pydantic modelleri ve URL doğrulama için
 from datetime import datetime # Tarih ve saat objeleri için
-from typing import Optional # Tip ipuçları için
+from typing import Dict, List, Optional # Tip ipuçları için
 
 from database import Base # Veritabanı modelimizin temel sınıfı
 
@@ -23,6 +23,13 @@ class Photo(Base):
     # Eğer isterseniz, burada doğrudan bir 'url' sütunu da tutabilirsiniz.
     # url = Column(String, nullable=False)
 
+    size = Column(BigInteger, nullable=True) # Dosya boyutu (bayt); kullanıcı istatistikleri için
+    # Algısal hash (64 bit dHash, işaretli olarak saklanır) ve Hamming araması için 16 bitlik bantları (bkz. phash.py)
+    phash = Column(BigInteger, nullable=True)
+    phash_band0 = Column(Integer, nullable=True, index=True)
+    phash_band1 = Column(Integer, nullable=True, index=True)
+    phash_band2 = Column(Integer, nullable=True, index=True)
+    phash_band3 = Column(Integer, nullable=True, index=True)
     uploaded_at = Column(DateTime, default=datetime.utcnow) # Yükleme tarihi ve saati (UTC)
     owner_id = Column(Integer, ForeignKey("users.id")) # Fotoğrafın sahibi olan kullanıcının ID'si
 
@@ -30,9 +37,28 @@ class Photo(Base):
     # 'User' modeline bir referans oluşturur ve 'owner' adıyla erişilmesini sağlar.
     owner = relationship("User", back_populates="photos")
 
+    __table_args__ = (
+        # Bir kullanıcının fotoğraflarını id sırasıyla okuyan sorgular (listeleme, arşiv) için;
+        # mevcut veritabanlarına başlangıçta add_missing_columns ile eklenir
+        Index("ix_photos_owner_id_id", "owner_id", "id"),
+    )
+
     def __repr__(self):
         return f"<Photo(id={self.id}, object_name='{self.object_name}', owner_id={self.owner_id})>"
 
+# Fotoğraf etiketleri (normalize edilmiş tablo).
+# Birincil anahtar (tag, photo_id) olduğu için "şu etiketlere sahip fotoğraflar" sorgusu
+# doğrudan bu indeksten cevaplanır; photo_id indeksi de bir fotoğrafın etiketlerini okumak içindir.
+class PhotoTag(Base):
+    __tablename__ = "photo_tags" # Veritabanındaki tablo adı
+
+    tag = Column(String(50), primary_key=True) # Etiket (küçük harfe çevrilmiş)
+    photo_id = Column(Integer, ForeignKey("photos.id", ondelete="CASCADE"), primary_key=True)
+
+    __table_args__ = (
+        Index("ix_photo_tags_photo_id", "photo_id"),
+    )
+
 # Pydantic Şemaları (API istek ve yanıtları için)
 
 # Fotoğraf yükleme/oluşturma şeması
@@ -69,4 +95,73 @@ class PhotoResponse(BaseModel):
                 "owner_id": 1,
                 "owner_username": "testuser"
             }
-        }
\ No newline at end of file
+        }
+
+# Fotoğraf etiketlerini değiştirme isteği şeması (mevcut etiketlerin yerine geçer)
+class PhotoTagsUpdate(BaseModel):
+    tags: List[str] = Field(..., max_length=50)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "tags": ["deniz", "tatil", "2023"]
+            }
+        }
+
+# Benzer fotoğraf yanıt şeması
+class SimilarPhotoResponse(BaseModel):
+    id: int
+    object_name: str
+    uploaded_at: datetime
+    distance: int # Algısal hash'ler arasındaki Hamming mesafesi (0 = aynı)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": 42,
+                "object_name": "uploads/testuser/a1b2c3d4.jpg",
+                "uploaded_at": "2023-10-27T10:30:00.000000",
+                "distance": 3
+            }
+        }
+
+# Kullanıcının yakın kopya fotoğraf grupları raporu
+class DuplicateGroupsResponse(BaseModel):
+    owner_id: int
+    max_distance: int
+    groups: List[List[int]] # Her grup birbirinin kopyası olan fotoğrafların ID'leri
+
+# Toplu fotoğraf sorgulama isteği şeması (uzun ID listeleri için POST /photos/batch)
+class PhotoBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ids": [1, 2, 3]
+            }
+        }
+
+# Toplu fotoğraf sorgulama yanıt şeması
+class PhotoBatchResponse(BaseModel):
+    photos: Dict[int, PhotoResponse] # Fotoğraf ID'sine göre, istek sırasıyla
+    not_found: List[int] # Bulunamayan ID'ler
+    forbidden: List[int] # Var olan ama kullanıcının göremeyeceği ID'ler
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "photos": {
+                    "1": {
+                        "id": 1,
+                        "object_name": "uploads/user1/my_image_123.jpg",
+                        "url": "https://minio.superisi.net/photo-gallery/uploads/user1/my_image_123.jpg?X-Amz...",
+                        "uploaded_at": "2023-10-27T10:30:00.000000",
+                        "owner_id": 1,
+                        "owner_username": "testuser"
+                    }
+                },
+                "not_found": [2],
+                "forbidden": [3]
+            }
+        }
@@ -0,0 +1,89 @@
+# models/upload_session.py
+# Devam ettirilebilir (resumable) parçalı yükleme oturumu modelleri (SQLAlchemy) ve Pydantic şemaları
+
+import os
+
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey
+from sqlalchemy.orm import relationship # İlişkileri tanımlamak için
+from pydantic import BaseModel, Field # Pydantic modelleri için
+from datetime import datetime # Tarih ve saat objeleri için
+from typing import List, Optional # Tip ipuçları için
+
+from database import Base # Veritabanı modelimizin temel sınıfı
+
+# Bir yükleme oturumunda bildirilebilecek en büyük dosya boyutu (bayt); oturum ve depolamadaki
+# multipart yükleme bu boyut için ayrıldığından üst sınır olmadan istemci sınırsız yer tutabilirdi.
+MAX_UPLOAD_SIZE = int(os.getenv("UPLOAD_MAX_SIZE", str(1024 * 1024 * 1024))) # 1 GiB
+
+# SQLAlchemy UploadSession modeli (Veritabanı tablosu için)
+# Her oturum, depolamadaki bir multipart upload'a karşılık gelir.
+class UploadSession(Base):
+    __tablename__ = "upload_sessions" # Veritabanındaki tablo adı
+
+    id = Column(String(36), primary_key=True) # Oturum ID'si (UUID)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True) # Yüklemeyi yapan kullanıcı
+    object_name = Column(String, nullable=False) # Tamamlandığında oluşacak objenin adı
+    content_type = Column(String, nullable=False) # Dosyanın MIME tipi
+    total_size = Column(BigInteger, nullable=False) # Dosyanın toplam boyutu (bayt)
+    chunk_size = Column(Integer, nullable=False) # Son parça hariç her parçanın boyutu (bayt)
+    storage_upload_id = Column(String, nullable=False) # Depolamadaki multipart upload ID'si
+    created_at = Column(DateTime, default=datetime.utcnow) # Oluşturulma zamanı (UTC)
+    expires_at = Column(DateTime, nullable=False, index=True) # Bu zamana kadar tamamlanmazsa iptal edilir
+
+    owner = relationship("User")
+    parts = relationship("UploadSessionPart", cascade="all, delete-orphan", order_by="UploadSessionPart.part_number")
+
+    def __repr__(self):
+        return f"<UploadSession(id='{self.id}', object_name='{self.object_name}', owner_id={self.owner_id})>"
+
+# Oturuma ait, depolamaya yüklenmiş parçalar.
+# Parçalar paralel yüklenebildiği için oturum satırı güncellenmez, her parça kendi satırını ekler.
+class UploadSessionPart(Base):
+    __tablename__ = "upload_session_parts" # Veritabanındaki tablo adı
+
+    session_id = Column(String(36), ForeignKey("upload_sessions.id", ondelete="CASCADE"), primary_key=True)
+    part_number = Column(Integer, primary_key=True) # 1'den başlayan parça numarası
+    etag = Column(String, nullable=False) # Depolamanın parça için döndürdüğü ETag
+    size = Column(Integer, nullable=False) # Parçanın boyutu (bayt)
+
+# Pydantic Şemaları (API istek ve yanıtları için)
+
+# Yeni yükleme oturumu oluşturma isteği şeması
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str
+    total_size: int = Field(..., gt=0, le=MAX_UPLOAD_SIZE)
+    chunk_size: Optional[int] = None # Verilmezse sunucu varsayılanı kullanılır
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "filename": "holiday.jpg",
+                "content_type": "image/jpeg",
+                "total_size": 26214400,
+                "chunk_size": 8388608
+            }
+        }
+
+# API yanıtı için yükleme oturumu şeması
+class UploadSessionResponse(BaseModel):
+    id: str
+    total_size: int
+    chunk_size: int
+    offset: int # Baştan itibaren kesintisiz alınmış bayt sayısı
+    received_parts: List[int] # Alınan parça numaraları
+    missing_parts: List[int] # Henüz alınmamış parça numaraları
+    expires_at: datetime
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "id": "5f0c6a52-3c1e-4c55-9a61-7d2b1c8b9a10",
+                "total_size": 26214400,
+                "chunk_size": 8388608,
+                "offset": 16777216,
+                "received_parts": [1, 2],
+                "missing_parts": [3, 4],
+                "expires_at": "2023-10-28T10:30:00.000000"
+            }
+        }
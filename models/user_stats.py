@@ -0,0 +1,48 @@
+# models/user_stats.py
+# Kullanıcı başına fotoğraf sayısı ve depolama kullanımı sayaçları (SQLAlchemy) ve Pydantic şemaları
+
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.orm import relationship # İlişkileri tanımlamak için
+from pydantic import BaseModel # Pydantic modelleri için
+from datetime import datetime # Tarih ve saat objeleri için
+from typing import Optional # Tip ipuçları için
+
+from database import Base # Veritabanı modelimizin temel sınıfı
+
+# SQLAlchemy UserStats modeli (Veritabanı tablosu için)
+# Sayaçlar, photos tablosu üzerinde COUNT(*)/SUM(size) çalıştırmamak için
+# upload_photo ve delete_photo ile aynı transaction içinde güncellenir.
+class UserStats(Base):
+    __tablename__ = "user_stats" # Veritabanındaki tablo adı
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True) # Kullanıcı ID'si, birincil anahtar
+    photo_count = Column(Integer, nullable=False, default=0) # Kullanıcının fotoğraf sayısı
+    total_bytes = Column(BigInteger, nullable=False, default=0, index=True) # Toplam depolama kullanımı (bayt), sıralama için indeksli
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) # Son güncellenme zamanı (UTC)
+
+    user = relationship("User")
+
+    def __repr__(self):
+        return f"<UserStats(user_id={self.user_id}, photo_count={self.photo_count}, total_bytes={self.total_bytes})>"
+
+# Pydantic Şemaları (API yanıtları için)
+
+# API yanıtı için kullanıcı istatistikleri şeması
+class UserStatsResponse(BaseModel):
+    user_id: int
+    username: Optional[str] = None
+    photo_count: int = 0
+    total_bytes: int = 0
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True # SQLAlchemy modellerinden Pydantic modellerine dönüşüm için
+        json_schema_extra = {
+            "example": {
+                "user_id": 1,
+                "username": "testuser",
+                "photo_count": 42,
+                "total_bytes": 104857600,
+                "updated_at": "2023-10-27T10:30:00.000000"
+            }
+        }
@@ -1,11 +1,11 @@
 # models/word.py
 # Kelime veritabanı modeli (SQLAlchemy) ve Pydantic şemaları
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey
 from sqlalchemy.orm import relationship # İlişkileri tanımlamak için
 from pydantic import BaseModel # Pydantic modelleri için
 from datetime import datetime # Tarih ve saat objeleri için
-from typing import Optional # Tip ipuçları için
+from typing import List, Optional # Tip ipuçları için
 
 from database import Base # Veritabanı modelimizin temel sınıfı
 
@@ -17,6 +17,8 @@ class Word(Base):
     word = Column(String(15), unique=True, index=True, nullable=False) # Kelime, benzersiz ve boş olamaz
     create_date = Column(DateTime, default=datetime.utcnow) # Oluşturulma tarihi ve saati (UTC)
     created_by_user_id = Column(Integer, ForeignKey("users.id")) # Kelimeyi oluşturan kullanıcının ID'si
+    # Son ekleme/güncellemenin değişiklik sıra numarası (bkz. wordsync.py); /words/changes bu indeksten okur
+    change_seq = Column(BigInteger, nullable=True, index=True)
 
     # User modeli ile ilişki
     # 'User' modeline bir referans oluşturur ve 'created_by_user' adıyla erişilmesini sağlar.
@@ -25,6 +27,27 @@ class Word(Base):
     def __repr__(self):
         return f"<Word(id={self.id}, word='{self.word}', created_by_user_id={self.created_by_user_id})>"
 
+# Silinen kelimelerin izleri (tombstone). Çevrimdışı istemciler silmeleri
+# /words/changes üzerinden bu tablodan öğrenir.
+class WordTombstone(Base):
+    __tablename__ = "word_tombstones" # Veritabanındaki tablo adı
+
+    word_id = Column(Integer, primary_key=True) # Silinen kelimenin ID'si
+    word = Column(String(15), nullable=False) # Silinen kelimenin son değeri
+    change_seq = Column(BigInteger, nullable=False, index=True) # Silme işleminin sıra numarası
+    deleted_at = Column(DateTime, default=datetime.utcnow) # Silinme zamanı (UTC)
+
+    def __repr__(self):
+        return f"<WordTombstone(word_id={self.word_id}, change_seq={self.change_seq})>"
+
+# Kelime değişiklik sayacı. Tek satırlık bu tablo son verilen sıra numarasını tutar;
+# aynı zamanda kelime dağarcığının sürüm numarasıdır.
+class WordSyncState(Base):
+    __tablename__ = "word_sync_state" # Veritabanındaki tablo adı
+
+    id = Column(Integer, primary_key=True) # Her zaman 1
+    last_seq = Column(BigInteger, nullable=False, default=0) # Son verilen sıra numarası
+
 # Pydantic Şemaları (API istek ve yanıtları için)
 
 # Yeni kelime oluşturma isteği şeması
@@ -56,4 +79,40 @@ class WordResponse(BaseModel):
                 "created_by_user_id": 1,
                 "created_by_username": "testuser"
             }
-        }
\ No newline at end of file
+        }
+
+# Senkronizasyon için tek bir kelime değişikliği. `deleted` true ise kelime silinmiştir
+# ve sadece `id`, `word` ve `change_seq` doludur.
+class WordChange(BaseModel):
+    id: int
+    word: str
+    change_seq: int
+    deleted: bool = False
+    create_date: Optional[datetime] = None
+    created_by_user_id: Optional[int] = None
+
+# /words/changes yanıtı. İstemci bir sonraki istekte `since` olarak `next_since` gönderir.
+class WordChangesResponse(BaseModel):
+    changes: List[WordChange]
+    next_since: int
+    has_more: bool
+    version: int # Kelime dağarcığının güncel sürümü
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "changes": [
+                    {"id": 7, "word": "Elma", "change_seq": 41, "deleted": False,
+                     "create_date": "2023-10-27T10:30:00.000000", "created_by_user_id": 1},
+                    {"id": 3, "word": "Armut", "change_seq": 42, "deleted": True}
+                ],
+                "next_since": 42,
+                "has_more": False,
+                "version": 42
+            }
+        }
+
+# /words/snapshot yanıtı: tüm kelimeler ve anlık görüntünün sürümü
+class WordSnapshotResponse(BaseModel):
+    version: int
+    words: List[WordChange]
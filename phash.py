@@ -0,0 +1,248 @@
+# phash.py
+# Yakın kopya (yeniden boyutlandırılmış / yeniden kodlanmış) fotoğraf tespiti için algısal hash.
+#
+# Hash: 64 bitlik dHash. Resim 9x8 gri tonlamaya küçültülür ve her satırda yan yana
+# piksellerin parlaklık farkının yönü bir bit olur. Benzer resimlerin hash'leri arasındaki
+# Hamming mesafesi küçüktür.
+#
+# İndeks: multi-index hashing. 64 bit dört adet 16 bitlik banda bölünür ve her bant
+# photos tablosunda ayrı, indeksli bir sütunda tutulur. İki hash arasındaki mesafe d ise
+# güvercin yuvası ilkesine göre en az bir bandın mesafesi d // 4 veya daha azdır. Bu yüzden
+# her bant için d // 4 mesafedeki tüm değerler indeksten aranır, gelen az sayıdaki aday için
+# tam mesafe hesaplanır. Tablo taranmaz.
+#
+# Pillow isteğe bağlıdır; kurulu değilse hash hesaplanmaz ve benzerlik aramaları boş döner.
+#
+# Hash sütunları ve bant indeksleri mevcut photos tablosuna başlangıçta (ve `python phash.py backfill`
+# çalışmadan önce) database.add_missing_columns ile eklenir; eski fotoğraflar için hash'ler backfill ile hesaplanır.
+
+import argparse
+import io
+import logging
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+try:
+    from PIL import Image # İsteğe bağlı bağımlılık
+except ImportError: # pragma: no cover - Pillow kurulu değilse hash hesaplanmaz
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+BAND_COUNT = 4
+BAND_BITS = HASH_BITS // BAND_COUNT
+BAND_MASK = (1 << BAND_BITS) - 1
+DEFAULT_MAX_DISTANCE = 6 # Bu mesafeye kadar olan hash'ler aynı fotoğrafın kopyası sayılır
+MAX_DISTANCE_LIMIT = 11 # Bant başına en fazla 2 bit fark; üstü indeksten çok fazla değer arar
+
+
+def compute_dhash(data: bytes) -> Optional[int]:
+    """
+    Resim verisinden 64 bitlik dHash hesaplar. Pillow yoksa veya resim okunamazsa None döndürür.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image.draft("L", (64, 64)) # JPEG'lerde küçük boyutta çöz (tam çözünürlük gerekmez)
+            pixels = list(image.convert("L").resize((9, 8), Image.LANCZOS).getdata())
+    except Exception as e:
+        logger.warning(f"Could not compute perceptual hash: {e}")
+        return None
+    value = 0
+    for row in range(8):
+        for column in range(8):
+            value = (value << 1) | (pixels[row * 9 + column] > pixels[row * 9 + column + 1])
+    return value
+
+
+def to_signed(value: int) -> int:
+    """
+    64 bitlik işaretsiz hash'i BIGINT sütununa sığacak şekilde işaretli sayıya çevirir.
+    """
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def hash_bands(value: int) -> List[int]:
+    return [(value >> (BAND_BITS * index)) & BAND_MASK for index in range(BAND_COUNT)]
+
+
+def hamming(first: int, second: int) -> int:
+    return bin(to_unsigned(first) ^ to_unsigned(second)).count("1")
+
+
+def photo_hash_columns(value: Optional[int]) -> dict:
+    """
+    Photo modelinin phash sütunlarına yazılacak değerleri döndürür.
+    """
+    if value is None:
+        return {}
+    bands = hash_bands(value)
+    return {"phash": to_signed(value), **{f"phash_band{index}": band for index, band in enumerate(bands)}}
+
+
+def _band_neighbours(band: int, radius: int) -> List[int]:
+    # Bant değerine `radius` bit veya daha az mesafedeki tüm 16 bitlik değerler
+    values = [band]
+    for distance in range(1, radius + 1):
+        for bits in combinations(range(BAND_BITS), distance):
+            flipped = band
+            for bit in bits:
+                flipped ^= 1 << bit
+            values.append(flipped)
+    return values
+
+
+def _check_distance(max_distance: int):
+    if not 0 <= max_distance <= MAX_DISTANCE_LIMIT:
+        raise ValueError(f"max_distance must be between 0 and {MAX_DISTANCE_LIMIT}.")
+
+
+def find_similar(db: Session, value: int, max_distance: int = DEFAULT_MAX_DISTANCE,
+                 owner_id: Optional[int] = None, exclude_id: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Hash'e `max_distance` veya daha yakın fotoğrafları (photo_id, mesafe) olarak, yakından uzağa döndürür.
+    """
+    from models.photo import Photo
+
+    _check_distance(max_distance)
+    radius = max_distance // BAND_COUNT
+    band_columns = [getattr(Photo, f"phash_band{index}") for index in range(BAND_COUNT)]
+    conditions = [
+        column.in_(_band_neighbours(band, radius))
+        for column, band in zip(band_columns, hash_bands(to_unsigned(value)))
+    ]
+    query = db.query(Photo.id, Photo.phash).filter(or_(*conditions))
+    if owner_id is not None:
+        query = query.filter(Photo.owner_id == owner_id)
+    if exclude_id is not None:
+        query = query.filter(Photo.id != exclude_id)
+
+    matches = []
+    for photo_id, candidate in query.all():
+        distance = hamming(value, candidate)
+        if distance <= max_distance:
+            matches.append((photo_id, distance))
+    return sorted(matches, key=lambda match: (match[1], match[0]))
+
+
+class HashIndex:
+    """
+    Bellek içi multi-index hashing yapısı; bir kullanıcının tüm fotoğraflarını gruplamak için.
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, int]]):
+        self.hashes: Dict[int, int] = {}
+        self.bands: List[Dict[int, List[int]]] = [{} for _ in range(BAND_COUNT)]
+        for photo_id, value in items:
+            value = to_unsigned(value)
+            self.hashes[photo_id] = value
+            for index, band in enumerate(hash_bands(value)):
+                self.bands[index].setdefault(band, []).append(photo_id)
+
+    def neighbours(self, photo_id: int, max_distance: int) -> Set[int]:
+        value = self.hashes[photo_id]
+        candidates: Set[int] = set()
+        for index, band in enumerate(hash_bands(value)):
+            for neighbour in _band_neighbours(band, max_distance // BAND_COUNT):
+                candidates.update(self.bands[index].get(neighbour, ()))
+        candidates.discard(photo_id)
+        return {candidate for candidate in candidates if hamming(value, self.hashes[candidate]) <= max_distance}
+
+
+def duplicate_groups(db: Session, owner_id: int, max_distance: int = DEFAULT_MAX_DISTANCE) -> List[List[int]]:
+    """
+    Kullanıcının birbirine `max_distance` veya daha yakın fotoğraflarını gruplar (birleşim-bul ile).
+    Sadece en az iki fotoğraflı gruplar, en büyükten küçüğe döndürülür.
+    """
+    from models.photo import Photo
+
+    _check_distance(max_distance)
+    rows = db.query(Photo.id, Photo.phash).filter(Photo.owner_id == owner_id, Photo.phash.isnot(None)).all()
+    index = HashIndex(rows)
+
+    parents = {photo_id: photo_id for photo_id, _ in rows}
+
+    def find(photo_id: int) -> int:
+        while parents[photo_id] != photo_id:
+            parents[photo_id] = parents[parents[photo_id]]
+            photo_id = parents[photo_id]
+        return photo_id
+
+    for photo_id, _ in rows:
+        for neighbour in index.neighbours(photo_id, max_distance):
+            parents[find(neighbour)] = find(photo_id)
+
+    groups: Dict[int, List[int]] = {}
+    for photo_id, _ in rows:
+        groups.setdefault(find(photo_id), []).append(photo_id)
+    return sorted((sorted(group) for group in groups.values() if len(group) > 1), key=len, reverse=True)
+
+
+def backfill_hashes(db: Session, batch_size: int = 100) -> int:
+    """
+    Hash'i olmayan fotoğrafları depolamadan okuyup hash'lerini hesaplar.
+    Okunamayan fotoğraflar atlanır. Hash'i hesaplanan fotoğraf sayısını döndürür.
+    """
+    from models.photo import Photo
+    from storage import get_file
+
+    if Image is None:
+        raise RuntimeError("Pillow is not installed; cannot compute perceptual hashes.")
+    hashed = 0
+    last_id = 0
+    while True:
+        photos = (
+            db.query(Photo)
+            .filter(Photo.id > last_id, Photo.phash.is_(None))
+            .order_by(Photo.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not photos:
+            break
+        for photo in photos:
+            data = get_file(photo.object_name)
+            value = compute_dhash(data) if data is not None else None
+            if value is None:
+                logger.warning(f"Skipping photo {photo.id}: could not read or hash '{photo.object_name}'.")
+                continue
+            for column, column_value in photo_hash_columns(value).items():
+                setattr(photo, column, column_value)
+            hashed += 1
+        db.commit()
+        last_id = photos[-1].id
+        logger.info(f"Perceptual hashes computed for {hashed} photos (last photo id: {last_id}).")
+    return hashed
+
+
+if __name__ == "__main__":
+    # Kullanım: python phash.py backfill --batch-size 100
+    parser = argparse.ArgumentParser(description="Perceptual hash maintenance")
+    parser.add_argument("command", choices=["backfill"], help="backfill: hash photos that have no perceptual hash yet")
+    parser.add_argument("--batch-size", type=int, default=100, help="Number of photos hashed per transaction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from database import SessionLocal, Base, engine, add_missing_columns
+    import models.user, models.photo, models.word  # noqa: F401 - ilişkilerin çözülmesi için
+    from storage import initialize_storage
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(models.photo.Photo.__table__) # Eski veritabanlarında hash sütunları ve indeksleri
+    if not initialize_storage():
+        raise SystemExit("Storage backend failed to initialize.")
+
+    db = SessionLocal()
+    try:
+        count = backfill_hashes(db, batch_size=args.batch_size)
+        logger.info(f"Done. {count} photos hashed.")
+    finally:
+        db.close()
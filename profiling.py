@@ -0,0 +1,337 @@
+# profiling.py
+# Adminler için isteğe bağlı, tek istek bazında profilleme.
+# İstek `X-Profile: inline|store` başlığı veya `?__profile=inline|store` parametresi ile tetiklenir:
+#   - inline: yanıt gövdesi yerine profil raporu (JSON) döner
+#   - store : asıl yanıt döner, rapor bellekte saklanır ve kimliği X-Profile-Id başlığında gelir
+#             (GET /admin/profiles/{profile_id} ile indirilir)
+# Rapor; cProfile fonksiyon dökümü, SQLAlchemy olaylarından SQL sorgu süreleri ve
+# depolama (S3/yerel) çağrılarının sürelerini içerir.
+# Tetiklenmeyen isteklerde sadece başlık/parametre kontrolü yapılır; SQL olay dinleyicileri
+# ve depolama izleyicisi yalnızca profillenen bir istek sürerken bağlıdır.
+
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import storage
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = "__profile"
+PROFILE_MODES = ("inline", "store")
+PROFILE_STORE_SIZE = int(os.getenv("PROFILE_STORE_SIZE", "50")) # Bellekte tutulan en fazla rapor
+PROFILE_TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "40")) # Raporda gösterilen fonksiyon sayısı
+PROFILE_SQL_STATEMENT_LENGTH = 500 # Raporda SQL metninin kısaltılacağı uzunluk
+
+# O an profillenen isteğin raporu. Thread havuzuna aktarılan işler (run_in_threadpool)
+# context'i kopyaladığı için oradaki SQL ve depolama çağrıları da aynı rapora yazılır.
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+# cProfile aynı anda sadece tek bir profilleyiciye izin verir
+_cprofile_lock = threading.Lock()
+
+
+class RequestProfile:
+    """
+    Tek bir isteğin profil verileri.
+    """
+
+    def __init__(self, method: str, path: str, user: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.user = user
+        self.created_at = time.time()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.status_code: Optional[int] = None
+        self.sql: List[dict] = []
+        self.storage: List[dict] = []
+        self.cprofile: Optional[cProfile.Profile] = None
+        self.cprofile_note: Optional[str] = None
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def report(self) -> dict:
+        sql_by_statement: Dict[str, dict] = {}
+        for query in self.sql:
+            entry = sql_by_statement.setdefault(query["statement"], {"statement": query["statement"], "count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += query["duration_ms"]
+            entry["max_ms"] = max(entry["max_ms"], query["duration_ms"])
+        storage_by_operation: Dict[str, dict] = {}
+        for call in self.storage:
+            entry = storage_by_operation.setdefault(call["operation"], {"operation": call["operation"], "count": 0, "total_ms": 0.0, "failures": 0})
+            entry["count"] += 1
+            entry["total_ms"] += call["duration_ms"]
+            entry["failures"] += 0 if call["ok"] else 1
+
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "user": self.user,
+            "status_code": self.status_code,
+            "created_at": self.created_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "sql": {
+                "count": len(self.sql),
+                "total_ms": round(sum(query["duration_ms"] for query in self.sql), 3),
+                "statements": sorted(sql_by_statement.values(), key=lambda entry: entry["total_ms"], reverse=True),
+                "queries": self.sql,
+            },
+            "storage": {
+                "count": len(self.storage),
+                "total_ms": round(sum(call["duration_ms"] for call in self.storage), 3),
+                "operations": sorted(storage_by_operation.values(), key=lambda entry: entry["total_ms"], reverse=True),
+                "calls": self.storage,
+            },
+            "functions": self._function_stats(),
+        }
+
+    def _function_stats(self) -> Optional[str]:
+        if self.cprofile is None:
+            return self.cprofile_note
+        output = io.StringIO()
+        stats = pstats.Stats(self.cprofile, stream=output)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+        return output.getvalue()
+
+
+class ProfileStore:
+    """
+    Saklanan raporlar için boyutu sınırlı, bellek içi depo (en eskiler atılır).
+    Raporlar worker sürecine özeldir; birden çok worker varsa rapor isteği işleyen worker'dadır.
+    """
+
+    def __init__(self, size: int = PROFILE_STORE_SIZE):
+        self.size = size
+        self._reports: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, report: dict):
+        with self._lock:
+            self._reports[report["id"]] = report
+            while len(self._reports) > self.size:
+                self._reports.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._reports.get(profile_id)
+
+    def summaries(self) -> List[dict]:
+        with self._lock:
+            reports = list(self._reports.values())
+        return [
+            {key: report[key] for key in ("id", "method", "path", "user", "status_code", "created_at", "duration_ms")}
+            | {"sql_count": report["sql"]["count"], "storage_count": report["storage"]["count"]}
+            for report in reversed(reports)
+        ]
+
+
+profile_store = ProfileStore()
+
+
+class _Instrumentation:
+    """
+    SQLAlchemy olay dinleyicilerini ve depolama izleyicisini sadece en az bir
+    profillenen istek sürerken bağlı tutar (referans sayımı ile).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = 0
+        self._engine = None
+
+    def acquire(self):
+        with self._lock:
+            self._active += 1
+            if self._active == 1:
+                from database import engine
+                self._engine = engine
+                event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+                storage.add_call_observer(_observe_storage_call)
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            if self._active == 0:
+                event.remove(self._engine, "before_cursor_execute", _before_cursor_execute)
+                event.remove(self._engine, "after_cursor_execute", _after_cursor_execute)
+                storage.remove_call_observer(_observe_storage_call)
+                self._engine = None
+
+
+_instrumentation = _Instrumentation()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is None:
+        return
+    starts = conn.info.get("profile_query_start")
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    profile.sql.append({
+        "statement": statement[:PROFILE_SQL_STATEMENT_LENGTH],
+        "duration_ms": round(duration * 1000, 3),
+        "rows": cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None,
+        "executemany": executemany,
+    })
+
+
+def _observe_storage_call(operation: str, object_name: str, duration: float, ok: bool):
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.storage.append({
+            "operation": operation,
+            "object_name": object_name,
+            "duration_ms": round(duration * 1000, 3),
+            "ok": ok,
+        })
+
+
+def requested_profile_mode(scope: Scope) -> Optional[str]:
+    """
+    İstek profilleme istiyorsa modu ('inline' veya 'store') döndürür.
+    """
+    mode = None
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            mode = value.decode("latin-1").strip().lower()
+            break
+    if mode is None and PROFILE_QUERY_PARAM.encode() in scope.get("query_string", b""):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get(PROFILE_QUERY_PARAM)
+        mode = values[0].strip().lower() if values else None
+    if mode in ("1", "true", "yes"):
+        mode = "store"
+    return mode if mode in PROFILE_MODES else None
+
+
+async def authorize_profiling(scope: Scope) -> Optional[str]:
+    """
+    Bearer token sahibinin admin olduğunu get_current_admin_user ile doğrular.
+    Admin ise kullanıcı adını, değilse None döndürür.
+    """
+    from database import SessionLocal
+    from routers.auth import get_user_from_token, get_current_admin_user
+
+    authorization = ""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            authorization = value.decode("latin-1")
+            break
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    db = SessionLocal()
+    try:
+        admin = await get_current_admin_user(get_user_from_token(token, db))
+        return admin.username
+    except HTTPException:
+        return None
+    finally:
+        db.close()
+
+
+class ProfilingMiddleware:
+    """
+    Saf ASGI profilleme ara katmanı. Admin olmayan kullanıcıların profilleme istekleri
+    yok sayılır ve istek normal şekilde işlenir.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = requested_profile_mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        username = await authorize_profiling(scope)
+        if username is None:
+            logger.warning(f"Ignoring profiling request from a non-admin client for {scope['path']}.")
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], username)
+        await self._run_profiled(profile, mode, scope, receive, send)
+
+    async def _run_profiled(self, profile: RequestProfile, mode: str, scope: Scope, receive: Receive, send: Send):
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                if mode == "inline":
+                    return # Asıl yanıt yerine rapor gönderilecek
+                MutableHeaders(scope=message).append("X-Profile-Id", profile.id)
+            elif message["type"] == "http.response.body" and mode == "inline":
+                return
+            await send(message)
+
+        token = _current_profile.set(profile)
+        _instrumentation.acquire()
+        # cProfile çalıştığı thread'deki tüm kodu ölçer; aynı anda işlenen diğer
+        # isteklerin coroutine'leri de dökümde görünebilir.
+        if _cprofile_lock.acquire(blocking=False):
+            profile.cprofile = cProfile.Profile()
+        else:
+            profile.cprofile_note = "Another request is being profiled; function statistics were skipped."
+        try:
+            if profile.cprofile is not None:
+                profile.cprofile.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                if profile.cprofile is not None:
+                    profile.cprofile.disable()
+                    _cprofile_lock.release()
+        finally:
+            _instrumentation.release()
+            _current_profile.reset(token)
+            profile.finish()
+
+        report = profile.report()
+        if mode == "store":
+            profile_store.add(report)
+            logger.info(f"Stored profile {profile.id} for {profile.method} {profile.path} ({report['duration_ms']} ms).")
+            return
+
+        body = json.dumps(report, default=str).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"x-profile-id", profile.id.encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,270 @@
+# querybudget.py
+# Endpoint başına SQL sorgu bütçeleri ve N+1 tespiti.
+# SQLAlchemy engine olaylarına bağlanarak her isteğin çalıştırdığı sorguları kaydeder,
+# her senaryonun sorgu sayısını QUERY_BUDGETS'taki sınırla karşılaştırır ve aynı
+# SELECT'in (parametreleri hariç) tekrar tekrar çalıştırılmasını N+1 olarak işaretler.
+#
+# Harici servis gerektirmez: geçici bir SQLite veritabanı ve S3 yerine yerel depolama
+# arka ucu kullanılır, bu yüzden CI'da doğrudan çalıştırılabilir:
+#   python querybudget.py              # bütçe aşımı veya N+1 varsa çıkış kodu 1
+#   python querybudget.py --verbose    # her senaryonun sorgularını da yazdır
+#
+# Yeni bir endpoint eklendiğinde SCENARIOS listesine bir senaryo ve QUERY_BUDGETS'a bütçesi eklenmelidir.
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import event
+
+# Fixture'lardaki fotoğraf sayısı; N+1 eşiğinden büyük olmalı ki tekrar eden sorgular görünsün
+FIXTURE_PHOTO_COUNT = 5
+FIXTURE_WORD_COUNT = 5
+N_PLUS_ONE_THRESHOLD = 3 # Aynı SELECT bir istekte bu kadar veya daha fazla çalışırsa N+1 sayılır
+
+# Senaryo adı -> izin verilen en fazla sorgu sayısı (kimlik doğrulama sorgusu dahil)
+QUERY_BUDGETS: Dict[str, int] = {
+    "POST /photos/upload": 6,
+    "GET /photos/": 2,
+    "GET /photos/?fields=id,object_name": 2,
+    "GET /photos/?tags=": 2,
+    "GET /photos/?album_id=": 3,
+    "GET /photos/{photo_id}": 2,
+    "GET /photos/{photo_id}/tags": 3,
+    "PUT /photos/{photo_id}/tags": 4,
+    "GET /photos/archive": 2,
+    "GET /photos/duplicates": 2,
+    "GET /photos/batch": 2,
+    "POST /photos/batch": 2,
+    "DELETE /photos/{photo_id}": 7,
+    "GET /albums/": 2,
+    "GET /albums/{album_id}": 3,
+    "POST /albums/{album_id}/photos": 7,
+    "POST /words/": 4,
+    "GET /words/": 2,
+    "GET /words/changes": 4,
+    "GET /words/snapshot": 3,
+    "PUT /words/{word_id}": 5,
+    "DELETE /words/{word_id}": 6,
+    "GET /users/me": 1,
+    "GET /users/me/stats": 2,
+    "GET /users/stats/top": 2,
+}
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Parametreleri ve değişmezleri atarak sorgunun şeklini döndürür; böylece sadece
+    parametreleri farklı olan sorgular aynı kabul edilir.
+    """
+    statement = re.sub(r"\s+", " ", statement).strip()
+    statement = re.sub(r"'(?:[^']|'')*'", "?", statement) # metin değişmezleri
+    statement = re.sub(r"%\(\w+\)s|:\w+|\$\d+", "?", statement) # adlandırılmış/numaralı parametreler
+    statement = re.sub(r"\b\d+\b", "?", statement) # sayılar
+    statement = re.sub(r"\(\s*\?(?:\s*,\s*\?)*\s*\)", "(?)", statement) # IN (?, ?, ?) listeleri
+    return statement
+
+
+class QueryRecorder:
+    """
+    Bağlı olduğu süre boyunca engine üzerinde çalışan tüm SQL sorgularını kaydeder.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryRecorder":
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+    def reset(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+def detect_n_plus_one(statements: List[str], threshold: int = N_PLUS_ONE_THRESHOLD) -> List[str]:
+    """
+    Aynı şekildeki SELECT sorgusu `threshold` veya daha fazla kez çalıştıysa bu sorguları döndürür.
+    """
+    shapes = Counter(normalize_statement(statement) for statement in statements if statement.lstrip().upper().startswith("SELECT"))
+    return [f"{count}x {shape}" for shape, count in shapes.most_common() if count >= threshold]
+
+
+class ScenarioResult(NamedTuple):
+    name: str
+    status_code: int
+    statements: List[str]
+    budget: Optional[int]
+    n_plus_one: List[str]
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is None or len(self.statements) > self.budget
+
+    @property
+    def failed(self) -> bool:
+        return self.status_code >= 400 or self.over_budget or bool(self.n_plus_one)
+
+
+class Scenario(NamedTuple):
+    name: str # QUERY_BUDGETS anahtarı
+    request: Callable # (client, fixtures) -> response
+
+
+def _photos(fixtures) -> List[int]:
+    return fixtures["photo_ids"]
+
+
+# Her senaryo tek bir HTTP isteğidir; sadece bu isteğin sorguları sayılır
+SCENARIOS: List[Scenario] = [
+    Scenario("POST /photos/upload", lambda c, f: c.post("/photos/upload", files={"file": ("budget.jpg", b"\xff\xd8budget", "image/jpeg")}, headers=f["user"])),
+    Scenario("GET /photos/", lambda c, f: c.get("/photos/", headers=f["admin"])),
+    Scenario("GET /photos/?fields=id,object_name", lambda c, f: c.get("/photos/?fields=id,object_name", headers=f["user"])),
+    Scenario("GET /photos/?tags=", lambda c, f: c.get("/photos/?tags=budget,ci", headers=f["user"])),
+    Scenario("GET /photos/?album_id=", lambda c, f: c.get(f"/photos/?album_id={f['album_id']}", headers=f["user"])),
+    Scenario("GET /photos/{photo_id}", lambda c, f: c.get(f"/photos/{_photos(f)[0]}", headers=f["user"])),
+    Scenario("GET /photos/{photo_id}/tags", lambda c, f: c.get(f"/photos/{_photos(f)[0]}/tags", headers=f["user"])),
+    Scenario("PUT /photos/{photo_id}/tags", lambda c, f: c.put(f"/photos/{_photos(f)[1]}/tags", json={"tags": ["budget", "ci"]}, headers=f["user"])),
+    Scenario("GET /photos/archive", lambda c, f: c.get("/photos/archive", headers=f["user"])),
+    Scenario("GET /photos/duplicates", lambda c, f: c.get("/photos/duplicates", headers=f["user"])),
+    Scenario("GET /photos/batch", lambda c, f: c.get("/photos/batch?ids=" + ",".join(map(str, _photos(f) + [999999])), headers=f["user"])),
+    Scenario("POST /photos/batch", lambda c, f: c.post("/photos/batch", json={"ids": _photos(f)}, headers=f["admin"])),
+    Scenario("GET /albums/", lambda c, f: c.get("/albums/", headers=f["user"])),
+    Scenario("GET /albums/{album_id}", lambda c, f: c.get(f"/albums/{f['album_id']}", headers=f["user"])),
+    Scenario("POST /albums/{album_id}/photos", lambda c, f: c.post(f"/albums/{f['album_id']}/photos", json={"photo_ids": _photos(f)[2:]}, headers=f["user"])),
+    Scenario("POST /words/", lambda c, f: c.post("/words/", json={"word": "butce"}, headers=f["user"])),
+    Scenario("GET /words/", lambda c, f: c.get("/words/", headers=f["user"])),
+    Scenario("GET /words/changes", lambda c, f: c.get("/words/changes?since=0", headers=f["user"])),
+    Scenario("GET /words/snapshot", lambda c, f: c.get("/words/snapshot", headers=f["user"])),
+    Scenario("PUT /words/{word_id}", lambda c, f: c.put(f"/words/{f['word_ids'][0]}", json={"word": "yeni"}, headers=f["user"])),
+    Scenario("DELETE /words/{word_id}", lambda c, f: c.delete(f"/words/{f['word_ids'][1]}", headers=f["user"])),
+    Scenario("GET /users/me", lambda c, f: c.get("/users/me", headers=f["user"])),
+    Scenario("GET /users/me/stats", lambda c, f: c.get("/users/me/stats", headers=f["user"])),
+    Scenario("GET /users/stats/top", lambda c, f: c.get("/users/stats/top", headers=f["admin"])),
+    Scenario("DELETE /photos/{photo_id}", lambda c, f: c.delete(f"/photos/{_photos(f)[-1]}", headers=f["user"])),
+]
+
+
+@contextmanager
+def isolated_environment():
+    """
+    Uygulamayı geçici bir SQLite veritabanı ve yerel depolama ile çalışacak şekilde ayarlar.
+    Modüller ayarlarını import sırasında okuduğu için uygulama bu blok içinde import edilmelidir.
+    """
+    with tempfile.TemporaryDirectory(prefix="querybudget-") as workdir:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'budget.db')}"
+        os.environ["STORAGE_BACKEND"] = "local" # S3 yerine yerel dosya sistemi
+        os.environ["LOCAL_STORAGE_PATH"] = os.path.join(workdir, "media")
+        os.environ["LOCAL_STORAGE_PUBLIC_URL"] = "http://testserver"
+        os.environ["JOB_WORKERS"] = "0" # Arka plan işlerinin sorguları isteklerin sorgularına karışmasın
+        os.environ.setdefault("SECRET_KEY", "querybudget")
+        yield workdir
+
+
+def create_fixtures(client) -> dict:
+    """
+    Bir admin, bir normal kullanıcı, fotoğraflar, bir albüm ve kelimeler oluşturur.
+    """
+    from database import SessionLocal
+    from models.user import User
+    from routers.auth import get_password_hash, create_access_token
+
+    db = SessionLocal()
+    try:
+        for username, is_admin in (("budget_admin", True), ("budget_user", False)):
+            db.add(User(username=username, hashed_password=get_password_hash("budget"), is_admin=is_admin))
+        db.commit()
+    finally:
+        db.close()
+    fixtures = {
+        "admin": {"Authorization": "Bearer " + create_access_token({"sub": "budget_admin", "is_admin": True})},
+        "user": {"Authorization": "Bearer " + create_access_token({"sub": "budget_user", "is_admin": False})},
+    }
+
+    fixtures["photo_ids"] = []
+    for index in range(FIXTURE_PHOTO_COUNT):
+        response = client.post("/photos/upload", files={"file": (f"fixture{index}.jpg", b"\xff\xd8fixture", "image/jpeg")}, headers=fixtures["user"])
+        response.raise_for_status()
+        fixtures["photo_ids"].append(response.json()["id"])
+    client.put(f"/photos/{fixtures['photo_ids'][0]}/tags", json={"tags": ["budget", "ci"]}, headers=fixtures["user"]).raise_for_status()
+
+    response = client.post("/albums/", json={"name": "budget"}, headers=fixtures["user"])
+    response.raise_for_status()
+    fixtures["album_id"] = response.json()["id"]
+    client.post(f"/albums/{fixtures['album_id']}/photos", json={"photo_ids": fixtures["photo_ids"][:2]}, headers=fixtures["user"]).raise_for_status()
+
+    fixtures["word_ids"] = []
+    for index in range(FIXTURE_WORD_COUNT):
+        response = client.post("/words/", json={"word": f"kelime{index}"}, headers=fixtures["user"])
+        response.raise_for_status()
+        fixtures["word_ids"].append(response.json()["id"])
+    return fixtures
+
+
+def run_scenarios(scenarios: List[Scenario] = SCENARIOS, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[ScenarioResult]:
+    """
+    Senaryoları sırayla çalıştırır ve her birinin sorgularını kaydeder.
+    """
+    from fastapi.testclient import TestClient # httpx gerektirir
+    import main
+    from database import engine
+
+    results = []
+    with TestClient(main.app) as client:
+        fixtures = create_fixtures(client)
+        with QueryRecorder(engine) as recorder:
+            for scenario in scenarios:
+                recorder.reset()
+                response = scenario.request(client, fixtures)
+                statements = list(recorder.statements)
+                results.append(ScenarioResult(
+                    name=scenario.name,
+                    status_code=response.status_code,
+                    statements=statements,
+                    budget=QUERY_BUDGETS.get(scenario.name),
+                    n_plus_one=detect_n_plus_one(statements, threshold),
+                ))
+    return results
+
+
+def print_report(results: List[ScenarioResult], verbose: bool = False):
+    for result in results:
+        budget = "-" if result.budget is None else str(result.budget)
+        state = "FAIL" if result.failed else "ok"
+        print(f"{state:4} {len(result.statements):3}/{budget:3} HTTP {result.status_code}  {result.name}")
+        if result.budget is None:
+            print("       no budget declared in QUERY_BUDGETS")
+        for pattern in result.n_plus_one:
+            print(f"       N+1: {pattern}")
+        if verbose or result.over_budget:
+            for statement in result.statements:
+                print(f"       - {normalize_statement(statement)[:200]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-endpoint SQL query budgets and N+1 detection")
+    parser.add_argument("--verbose", action="store_true", help="Print the statements of every scenario")
+    parser.add_argument("--threshold", type=int, default=N_PLUS_ONE_THRESHOLD, help="Repetitions of one SELECT that count as N+1")
+    args = parser.parse_args()
+
+    with isolated_environment():
+        results = run_scenarios(threshold=args.threshold)
+    print_report(results, verbose=args.verbose)
+    failures = [result for result in results if result.failed]
+    print(f"{len(results) - len(failures)} passed, {len(failures)} failed")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,188 @@
+# ratelimit.py
+# İstek kabul kontrolü (admission control): token-bucket hız sınırlayıcılar ve
+# eşzamanlı iş bütçeleri. Aşırı istekler kuyruğa alınmak yerine hızla
+# 429/503 + Retry-After ile reddedilir; böylece diğer endpoint'lerin gecikmesi korunur.
+
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request, status
+
+# Ortam değişkenlerinden limit ayarları (saniye başına token ve kova kapasitesi)
+LOGIN_RATE_PER_IP = float(os.getenv("LOGIN_RATE_PER_IP", "1"))         # IP başına saniyede giriş denemesi
+LOGIN_BURST_PER_IP = float(os.getenv("LOGIN_BURST_PER_IP", "10"))
+LOGIN_RATE_PER_USER = float(os.getenv("LOGIN_RATE_PER_USER", "0.2"))    # Kullanıcı adı başına (5 sn'de bir)
+LOGIN_BURST_PER_USER = float(os.getenv("LOGIN_BURST_PER_USER", "5"))
+UPLOAD_RATE_PER_IP = float(os.getenv("UPLOAD_RATE_PER_IP", "2"))
+UPLOAD_BURST_PER_IP = float(os.getenv("UPLOAD_BURST_PER_IP", "20"))
+UPLOAD_RATE_PER_USER = float(os.getenv("UPLOAD_RATE_PER_USER", "1"))
+UPLOAD_BURST_PER_USER = float(os.getenv("UPLOAD_BURST_PER_USER", "10"))
+
+# Global eşzamanlılık bütçeleri
+MAX_CONCURRENT_BCRYPT = int(os.getenv("MAX_CONCURRENT_BCRYPT", str(os.cpu_count() or 2)))
+MAX_UPLOAD_BYTES_IN_FLIGHT = int(os.getenv("MAX_UPLOAD_BYTES_IN_FLIGHT", str(256 * 1024 * 1024)))  # 256 MiB
+# Content-Length başlığı olmayan yüklemeler için bütçeden düşülecek varsayılan boyut
+DEFAULT_UPLOAD_SIZE_ESTIMATE = int(os.getenv("DEFAULT_UPLOAD_SIZE_ESTIMATE", str(16 * 1024 * 1024)))
+
+# Kova sözlüklerinin sınırsız büyümesini engellemek için üst sınır
+MAX_TRACKED_KEYS = int(os.getenv("RATE_LIMIT_MAX_TRACKED_KEYS", "100000"))
+
+# Bütçe dolu olduğunda istemciye önerilecek bekleme süresi (saniye)
+BUSY_RETRY_AFTER = int(os.getenv("BUSY_RETRY_AFTER", "1"))
+
+# Uygulamanın önündeki güvenilen ters vekil (proxy) sayısı. X-Forwarded-For başlığının sağdan bu kadarıncı
+# adresi istemci IP'si sayılır (Traefik tek vekil: 1). 0 ise başlık yok sayılır ve bağlantının adresi kullanılır.
+TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "1"))
+
+
+class TokenBucket:
+    """
+    Klasik token-bucket: saniyede `rate` token dolar, en fazla `capacity` token birikir.
+    """
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def consume(self, amount: float = 1.0) -> float:
+        """
+        Token harcamayı dener. Başarılı olursa 0, değilse yeterli token birikene
+        kadar beklenmesi gereken süreyi (saniye) döndürür.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (amount - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Anahtar (IP, kullanıcı adı vb.) başına bir TokenBucket tutan hız sınırlayıcı.
+    """
+
+    def __init__(self, rate: float, capacity: float, max_keys: int = MAX_TRACKED_KEYS):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str) -> float:
+        """
+        Anahtar için bir istek kaydeder. İzin verilirse 0, aksi halde Retry-After süresini döndürür.
+        """
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._evict_full_buckets()
+                bucket = TokenBucket(self.rate, self.capacity)
+                self._buckets[key] = bucket
+            return bucket.consume()
+
+    def _evict_full_buckets(self):
+        # Tamamen dolmuş kovalar "hiç görülmemiş" anahtarla aynı durumdadır, güvenle atılabilir.
+        now = time.monotonic()
+        full = [
+            key for key, bucket in self._buckets.items()
+            if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.capacity
+        ]
+        for key in full:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:
+            # Hâlâ doluysa en eski eklenen anahtarları at (dict ekleme sırasını korur)
+            for key in list(self._buckets)[: len(self._buckets) // 10 or 1]:
+                del self._buckets[key]
+
+
+class InFlightBudget:
+    """
+    Aynı anda sürmekte olan işlerin toplam "maliyetini" sınırlar (iş sayısı veya bayt).
+    Bekletmez: bütçe yoksa try_acquire hemen False döner.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, amount: int = 1) -> bool:
+        with self._lock:
+            # Tek başına limitten büyük işler, bütçe boşken kabul edilir ki hiç çalışamaz hale gelmesinler
+            if self.in_use + amount > self.limit and self.in_use > 0:
+                return False
+            self.in_use += amount
+            return True
+
+    def release(self, amount: int = 1):
+        with self._lock:
+            self.in_use = max(0, self.in_use - amount)
+
+
+# Uygulama genelinde paylaşılan sınırlayıcılar
+login_ip_limiter = RateLimiter(LOGIN_RATE_PER_IP, LOGIN_BURST_PER_IP)
+login_user_limiter = RateLimiter(LOGIN_RATE_PER_USER, LOGIN_BURST_PER_USER)
+upload_ip_limiter = RateLimiter(UPLOAD_RATE_PER_IP, UPLOAD_BURST_PER_IP)
+upload_user_limiter = RateLimiter(UPLOAD_RATE_PER_USER, UPLOAD_BURST_PER_USER)
+bcrypt_budget = InFlightBudget(MAX_CONCURRENT_BCRYPT)
+upload_bytes_budget = InFlightBudget(MAX_UPLOAD_BYTES_IN_FLIGHT)
+
+
+def get_client_ip(request: Request) -> str:
+    """
+    İstemcinin IP adresini döndürür. Traefik arkasında çalıştığımız için X-Forwarded-For
+    başlığındaki, güvenilen vekilin eklediği (sağdan TRUSTED_PROXY_HOPS'uncu) adres kullanılır.
+    Soldaki adresleri istemci kendisi gönderebilir; onlara güvenilirse her istekte başlığı
+    değiştirerek IP başına sınırlar atlatılabilir.
+    """
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if forwarded_for and TRUSTED_PROXY_HOPS > 0:
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return hops[-TRUSTED_PROXY_HOPS]
+    return request.client.host if request.client else "unknown"
+
+
+def request_size_estimate(request: Request) -> int:
+    """
+    İsteğin gövde boyutunu Content-Length başlığından tahmin eder.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit():
+        return int(content_length)
+    return DEFAULT_UPLOAD_SIZE_ESTIMATE
+
+
+def enforce_rate_limit(limiter: RateLimiter, key: str, detail: str):
+    """
+    Sınır aşıldıysa 429 Too Many Requests ve Retry-After başlığı ile hata fırlatır.
+    """
+    retry_after = limiter.hit(key)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(min(retry_after, 3600))))},
+        )
+
+
+def server_busy(detail: str, retry_after: Optional[int] = None) -> HTTPException:
+    """
+    Global bütçe dolu olduğunda döndürülecek 503 Service Unavailable hatası.
+    """
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detail,
+        headers={"Retry-After": str(retry_after or BUSY_RETRY_AFTER)},
+    )
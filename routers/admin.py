@@ -0,0 +1,124 @@
+# routers/admin.py
+# Yönetim (admin) endpoint'leri: saklanan istek profil raporları, olay döngüsü bloklanma özeti,
+# tabloların akış halinde dışa aktarımı ve depolama sağlık durumu
+
+import json
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session # Veritabanı oturumu için
+
+from database import get_db # Veritabanı oturumu bağımlılığı
+from models.user import User # User modelini içe aktarın
+from models.job import Job, JobResponse, JOB_DEAD # Arka plan işleri
+from routers.auth import get_current_admin_user # Sadece adminler erişebilir
+from profiling import profile_store # Bellekte saklanan profil raporları
+from loopwatch import loop_watchdog # Olay döngüsü bekçisi
+from exports import EXPORT_SPECS, EXPORT_FORMATS, stream_export # Akış halinde dışa aktarım
+from storage import storage_health # Depolama devre kesicisi ve istemci durumu
+from jobs import queue_summary, retry_dead_job # Kalıcı arka plan iş kuyruğu
+
+router = APIRouter(
+    prefix="/admin", # Tüm endpoint'ler /admin ile başlayacak
+    tags=["Admin"], # Swagger UI'da grup adı
+)
+
+@router.get("/profiles", response_model=List[dict], summary="List stored request profiles (Admin only)")
+async def list_profiles(current_admin: User = Depends(get_current_admin_user)):
+    """
+    `X-Profile: store` ile profillenen isteklerin özetlerini en yeniden eskiye listeler.
+    """
+    return profile_store.summaries()
+
+@router.get("/profiles/{profile_id}", summary="Download a stored request profile (Admin only)")
+async def download_profile(profile_id: str, current_admin: User = Depends(get_current_admin_user)):
+    """
+    Saklanan profil raporunu JSON dosyası olarak indirir.
+    """
+    report = profile_store.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    return Response(
+        content=json.dumps(report, default=str, indent=2),
+        media_type="application/json",
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.json"'}
+    )
+
+@router.get("/loop-stalls", summary="Routes that block the event loop the most (Admin only)")
+async def loop_stalls(current_admin: User = Depends(get_current_admin_user)):
+    """
+    Olay döngüsü bekçisinin (LOOPWATCH_ENABLED) topladığı bloklanmaları route bazında,
+    toplam bloklanma süresine göre sıralı döndürür. Her route için son yakalanan yığın da verilir.
+    """
+    return loop_watchdog.summary()
+
+@router.get("/storage", summary="Storage backend health and circuit breaker state (Admin only)")
+async def storage_status(current_admin: User = Depends(get_current_admin_user)):
+    """
+    Depolama arka ucunun hazır olup olmadığını, devre kesici durumunu (closed/open/half_open),
+    hata sayaçlarını, yeniden başlatma denemelerini ve istemci ayarlarını döndürür.
+    """
+    return storage_health()
+
+@router.get("/jobs", summary="Background job queue depth and worker metrics (Admin only)")
+async def job_queue_status(db: Session = Depends(get_db), current_admin: User = Depends(get_current_admin_user)):
+    """
+    Tür ve durum (queued/running/dead) bazında iş sayılarını, bekleyen en eski işin yaşını
+    ve bu süreçteki worker'ların başarılı/tekrar denenen/dead sayaçlarını ve sürelerini döndürür.
+    """
+    return queue_summary(db)
+
+@router.get("/jobs/dead", response_model=List[JobResponse], summary="List jobs that ran out of attempts (Admin only)")
+async def list_dead_jobs(
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Deneme hakkı biten işleri (dead letter) son hatalarıyla birlikte listeler.
+    """
+    return db.query(Job).filter(Job.status == JOB_DEAD).order_by(Job.id).offset(skip).limit(limit).all()
+
+@router.post("/jobs/{job_id}/retry", response_model=JobResponse, summary="Requeue a dead job (Admin only)")
+async def retry_job(job_id: int, db: Session = Depends(get_db), current_admin: User = Depends(get_current_admin_user)):
+    """
+    'dead' durumundaki bir işi deneme sayacını sıfırlayarak hemen tekrar kuyruğa alır.
+    """
+    job = retry_dead_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dead job not found")
+    return job
+
+@router.get("/export/{resource}", summary="Stream a full export of photos, users or words (Admin only)")
+async def export_resource(
+    resource: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson or csv"),
+    owner_id: Optional[int] = Query(None, description="Only rows owned/created by this user (photos, words)"),
+    since: Optional[datetime] = Query(None, description="Only rows created at or after this time (photos, words)"),
+    until: Optional[datetime] = Query(None, description="Only rows created before this time (photos, words)"),
+    include_urls: bool = Query(False, description="Add a presigned URL column (photos only)"),
+    current_admin: User = Depends(get_current_admin_user)
+):
+    """
+    Tablonun tamamını tek bir istekte NDJSON veya CSV olarak akıtır.
+    Satırlar veritabanından gruplar halinde okunup hemen gönderilir; milyonlarca satırda
+    bile worker belleği sabit kalır.
+    """
+    if resource not in EXPORT_SPECS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown export '{resource}'. Choose from: {', '.join(EXPORT_SPECS)}")
+    if include_urls and resource != "photos":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="include_urls is only supported for photos.")
+    try:
+        content = stream_export(resource, format, owner_id=owner_id, since=since, until=until, include_urls=include_urls)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    filename = f"{resource}-{datetime.utcnow():%Y%m%dT%H%M%S}.{format}"
+    return StreamingResponse(
+        content,
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,194 @@
+# routers/albums.py
+# Albüm yönetimi endpoint'leri. Albümdeki fotoğraflar `GET /photos/?album_id=` ile listelenir.
+
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from database import get_db # Veritabanı oturumu bağımlılığı
+from models.user import User # User modelini içe aktarın (ilişki için)
+from models.photo import Photo # Albüme eklenecek fotoğrafların kontrolü için
+from models.album import Album, AlbumPhoto, AlbumCreate, AlbumPhotosAdd, AlbumResponse # Albüm modelleri ve şemaları
+from routers.auth import get_current_user # Kimlik doğrulama bağımlılığı
+
+router = APIRouter(
+    prefix="/albums", # Tüm endpoint'ler /albums ile başlayacak
+    tags=["Albums"], # Swagger UI'da grup adı
+)
+
+
+def _get_own_album(db: Session, album_id: int, current_user: User, for_update: bool = False) -> Album:
+    """
+    Albümü bulur; yoksa 404, sahibi veya admin değilse 403 fırlatır.
+    `for_update` ise albüm satırı transaction sonuna kadar kilitlenir (SELECT ... FOR UPDATE).
+    """
+    query = db.query(Album).filter(Album.id == album_id)
+    if for_update:
+        query = query.with_for_update()
+    album = query.first()
+    if not album:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Album not found")
+    if album.owner_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to access this album."
+        )
+    return album
+
+
+def _album_response(album: Album, photo_count: int) -> AlbumResponse:
+    return AlbumResponse(
+        id=album.id,
+        name=album.name,
+        owner_id=album.owner_id,
+        created_at=album.created_at,
+        photo_count=photo_count
+    )
+
+
+@router.post("/", response_model=AlbumResponse, status_code=status.HTTP_201_CREATED, summary="Create a new album")
+async def create_album(
+    album_create: AlbumCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user) # Oturum açmış kullanıcı
+):
+    """
+    Oturum açmış kullanıcı için yeni, boş bir albüm oluşturur.
+    """
+    new_album = Album(name=album_create.name, owner_id=current_user.id)
+    db.add(new_album)
+    db.commit()
+    db.refresh(new_album)
+    return _album_response(new_album, 0)
+
+
+@router.get("/", response_model=List[AlbumResponse], summary="List my albums")
+async def list_albums(
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Oturum açmış kullanıcının albümlerini fotoğraf sayılarıyla birlikte listeler.
+    Sayılar tek bir GROUP BY sorgusuyla, sadece kullanıcının albümleri üzerinden hesaplanır.
+    """
+    photo_counts = (
+        db.query(AlbumPhoto.album_id, func.count().label("photo_count"))
+        .join(Album, Album.id == AlbumPhoto.album_id)
+        .filter(Album.owner_id == current_user.id)
+        .group_by(AlbumPhoto.album_id)
+        .subquery()
+    )
+    rows = (
+        db.query(Album, func.coalesce(photo_counts.c.photo_count, 0))
+        .outerjoin(photo_counts, photo_counts.c.album_id == Album.id)
+        .filter(Album.owner_id == current_user.id)
+        .order_by(Album.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return [_album_response(album, photo_count) for album, photo_count in rows]
+
+
+@router.get("/{album_id}", response_model=AlbumResponse, summary="Get details of an album")
+async def get_album(
+    album_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Albümün detaylarını döndürür. Sadece albümün sahibi veya bir admin erişebilir.
+    """
+    album = _get_own_album(db, album_id, current_user)
+    photo_count = db.query(func.count()).select_from(AlbumPhoto).filter(AlbumPhoto.album_id == album_id).scalar()
+    return _album_response(album, photo_count)
+
+
+@router.post("/{album_id}/photos", response_model=AlbumResponse, summary="Append photos to an album")
+async def add_album_photos(
+    album_id: int,
+    photos_add: AlbumPhotosAdd,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Fotoğrafları verilen sırayla albümün sonuna ekler. Albümde zaten olan fotoğraflar atlanır.
+    Sadece albüm sahibinin fotoğrafları eklenebilir.
+    Albüm satırı kilitlenir; aynı albüme eşzamanlı eklemeler sırayla çalışır ve aynı pozisyonu alamaz.
+    """
+    album = _get_own_album(db, album_id, current_user, for_update=True)
+    photo_ids = list(dict.fromkeys(photos_add.photo_ids)) # Sırayı koruyarak tekrarları at
+
+    owned_ids = {
+        row[0] for row in db.query(Photo.id)
+        .filter(Photo.id.in_(photo_ids), Photo.owner_id == album.owner_id)
+        .all()
+    }
+    missing_ids = [photo_id for photo_id in photo_ids if photo_id not in owned_ids]
+    if missing_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Photos not found in the album owner's library: {missing_ids[:20]}"
+        )
+
+    existing_ids = {
+        row[0] for row in db.query(AlbumPhoto.photo_id)
+        .filter(AlbumPhoto.album_id == album_id, AlbumPhoto.photo_id.in_(photo_ids))
+        .all()
+    }
+    last_position = db.query(func.coalesce(func.max(AlbumPhoto.position), 0)).filter(AlbumPhoto.album_id == album_id).scalar()
+    new_links = []
+    for photo_id in photo_ids:
+        if photo_id in existing_ids:
+            continue
+        last_position += 1
+        new_links.append(AlbumPhoto(album_id=album_id, photo_id=photo_id, position=last_position))
+    db.add_all(new_links)
+    db.flush()
+
+    # Yanıt commit'ten önce hazırlanır; commit sonrası albüm tekrar yüklenmez
+    photo_count = db.query(func.count()).select_from(AlbumPhoto).filter(AlbumPhoto.album_id == album_id).scalar()
+    response = _album_response(album, photo_count)
+    db.commit()
+    return response
+
+
+@router.delete("/{album_id}/photos/{photo_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Remove a photo from an album")
+async def remove_album_photo(
+    album_id: int,
+    photo_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Fotoğrafı albümden çıkarır (fotoğrafın kendisi silinmez).
+    """
+    _get_own_album(db, album_id, current_user)
+    deleted = (
+        db.query(AlbumPhoto)
+        .filter(AlbumPhoto.album_id == album_id, AlbumPhoto.photo_id == photo_id)
+        .delete(synchronize_session=False)
+    )
+    if not deleted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo is not in this album")
+    db.commit()
+    return # 204 No Content döndür
+
+
+@router.delete("/{album_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete an album (Owner or Admin only)")
+async def delete_album(
+    album_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Albümü siler. Albümdeki fotoğraflar silinmez, sadece albümle bağlantıları kaldırılır.
+    """
+    album = _get_own_album(db, album_id, current_user)
+    db.query(AlbumPhoto).filter(AlbumPhoto.album_id == album_id).delete(synchronize_session=False)
+    db.delete(album)
+    db.commit()
+    return # 204 No Content döndür
@@ -3,16 +3,26 @@
 
 import os
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, status, Form
+from fastapi import APIRouter, Depends, HTTPException, status, Form, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext # Şifre hashleme için
 from jose import JWTError, jwt # JWT (JSON Web Token) işlemleri için
 
-from database import get_db # Veritabanı oturumu almak için
+from database import get_db, SessionLocal # Veritabanı oturumu almak için
 from models.user import User, UserCreate, UserLogin, Token, TokenData, UserResponse # Kullanıcı modelleri ve Pydantic şemaları
+from ratelimit import ( # Giriş denemeleri için hız sınırlama ve bcrypt bütçesi
+    login_ip_limiter, login_user_limiter, bcrypt_budget,
+    get_client_ip, enforce_rate_limit, server_busy,
+)
+from mediaauth import ( # Traefik forwardAuth ile medya yetkilendirmesi
+    MEDIA_AUTH_COOKIE, MEDIA_COOKIE_DOMAIN, MEDIA_COOKIE_SECURE,
+    media_decisions, parse_media_path, token_digest,
+)
+from storage import MEDIA_URL_MODE, get_storage_backend # Stabil medya URL'leri ve bucket adları
 
 router = APIRouter(
     prefix="/auth", # Tüm endpoint'ler /auth ile başlayacak
@@ -64,6 +74,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM) # Token'ı imzala
     return encoded_jwt
 
+async def login_admission(request: Request, username: str = Form()):
+    """
+    /auth/login için kabul kontrolü bağımlılığı.
+    IP ve kullanıcı adı başına hız sınırı uygular (429), eşzamanlı bcrypt işlerini
+    sınırlar (503). İstekler kuyruğa alınmaz, hemen reddedilir.
+    """
+    enforce_rate_limit(login_ip_limiter, get_client_ip(request), "Too many login attempts from this address. Please try again later.")
+    enforce_rate_limit(login_user_limiter, username.lower(), "Too many login attempts for this user. Please try again later.")
+    if not bcrypt_budget.try_acquire():
+        raise server_busy("Login service is busy. Please try again shortly.")
+    try:
+        yield
+    finally:
+        bcrypt_budget.release()
+
 # Kimlik Doğrulama Endpoint'leri
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED, summary="Register a new user")
@@ -94,17 +119,21 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)):
 
     return new_user
 
-@router.post("/login", response_model=Token, summary="Login and get an access token")
+@router.post("/login", response_model=Token, summary="Login and get an access token", dependencies=[Depends(login_admission)])
 async def login_for_access_token(
+    response: Response,
     username: str = Form(), # Kullanıcı adı form verisinden
     password: str = Form(),  # Şifre form verisinden
     db: Session = Depends(get_db)
 ):
     """
     Kullanıcı adı ve şifre ile giriş yapar ve bir JWT erişim tokenı döndürür.
+    MEDIA_URL_MODE=stable ise token, tarayıcının medya isteklerinde gönderebilmesi için
+    HttpOnly bir çereze de yazılır (bkz. /auth/media-verify).
     """
     user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+    # bcrypt CPU-yoğundur; olay döngüsünü bloklamaması için thread havuzunda çalıştır
+    if not user or not await run_in_threadpool(verify_password, password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -116,14 +145,86 @@ async def login_for_access_token(
         data={"sub": user.username, "is_admin": user.is_admin}, # is_admin bilgisini token'a ekle
         expires_delta=access_token_expires
     )
+    if MEDIA_URL_MODE == "stable":
+        response.set_cookie(
+            MEDIA_AUTH_COOKIE, access_token,
+            max_age=int(access_token_expires.total_seconds()),
+            domain=MEDIA_COOKIE_DOMAIN, secure=MEDIA_COOKIE_SECURE, httponly=True, samesite="lax"
+        )
     return {"access_token": access_token, "token_type": "bearer"}
 
+def _media_token(request: Request) -> Optional[str]:
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token
+    return request.cookies.get(MEDIA_AUTH_COOKIE)
+
+def _media_decision(token: str, path_username: str) -> Tuple[int, str, float]:
+    """
+    Token'ın sahibinin `path_username` önekindeki medyaya erişip erişemeyeceğine karar verir.
+    (durum kodu, kullanıcı adı, kararın geçerli kalabileceği en uzun süre) döndürür.
+    """
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return status.HTTP_401_UNAUTHORIZED, "", 0.0
+    username = payload.get("sub")
+    if username is None:
+        return status.HTTP_401_UNAUTHORIZED, "", 0.0
+    lifetime = float(payload.get("exp", 0)) - datetime.utcnow().timestamp() # Token süresi dolunca karar da düşer
+
+    db = SessionLocal()
+    try:
+        user = db.query(User.username, User.is_admin, User.is_active).filter(User.username == username).first()
+    finally:
+        db.close()
+    if user is None or not user.is_active:
+        return status.HTTP_401_UNAUTHORIZED, "", lifetime
+    if user.is_admin or user.username == path_username:
+        return status.HTTP_200_OK, user.username, lifetime
+    return status.HTTP_403_FORBIDDEN, user.username, lifetime
+
+@router.api_route("/media-verify", methods=["GET", "HEAD"], summary="Authorize a media request (Traefik forwardAuth)")
+async def media_verify(request: Request):
+    """
+    Traefik forwardAuth middleware'i için yetkilendirme endpoint'i. İstenen yol
+    `X-Forwarded-Uri` başlığından (/{bucket}/uploads/{username}/...) okunur; token
+    Authorization başlığından veya medya çerezinden alınır. Kullanıcı sadece kendi önekine,
+    adminler tüm öneklere erişebilir. 200 dışındaki yanıtlar Traefik tarafından istemciye iletilir.
+    Kararlar kısa süre bellekte tutulur; önbellekten dönen kararlar veritabanına gitmez.
+    """
+    if request.headers.get("X-Forwarded-Method", "GET").upper() not in ("GET", "HEAD"):
+        return Response(status_code=status.HTTP_403_FORBIDDEN)
+    media_path = parse_media_path(request.headers.get("X-Forwarded-Uri", ""))
+    buckets = getattr(get_storage_backend(), "buckets", None)
+    if media_path is None or (buckets and media_path.bucket not in buckets):
+        return Response(status_code=status.HTTP_403_FORBIDDEN)
+    token = _media_token(request)
+    if not token:
+        return Response(status_code=status.HTTP_401_UNAUTHORIZED, headers={"WWW-Authenticate": "Bearer"})
+
+    cache_key = (token_digest(token), media_path.username)
+    decision = media_decisions.get(cache_key)
+    if decision is None:
+        status_code, username, lifetime = await run_in_threadpool(_media_decision, token, media_path.username)
+        media_decisions.put(cache_key, status_code, username, ttl=lifetime)
+    else:
+        status_code, username = decision
+
+    if status_code != status.HTTP_200_OK:
+        headers = {"WWW-Authenticate": "Bearer"} if status_code == status.HTTP_401_UNAUTHORIZED else None
+        return Response(status_code=status_code, headers=headers)
+    return Response(status_code=status.HTTP_200_OK, headers={"X-Auth-User": username})
+
 # Kimlik Doğrulama Bağımlılıkları (API Yollarını Korumak İçin)
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+def get_user_from_token(token: str, db: Session) -> User:
     """
-    JWT tokenını doğrular ve mevcut aktif kullanıcı objesini döndürür.
+    JWT tokenını doğrular ve ilgili kullanıcı objesini döndürür.
     Token geçerli olmazsa HTTP 401 hatası fırlatır.
+    Uzun süreli bağlantılar (ör. SSE) gibi, veritabanı oturumunu istek boyunca
+    tutmak istemeyen endpoint'ler tarafından doğrudan kullanılabilir.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -145,7 +246,14 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     user = db.query(User).filter(User.username == token_data.username).first()
     if user is None:
         raise credentials_exception # Kullanıcı veritabanında yoksa hata fırlat
-    return user # Doğrulanmış User objesini döndür (FastAPI'nin daha sonra kullanabilmesi için)
+    return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    """
+    JWT tokenını doğrular ve mevcut aktif kullanıcı objesini döndürür.
+    Token geçerli olmazsa HTTP 401 hatası fırlatır.
+    """
+    return get_user_from_token(token, db) # Doğrulanmış User objesini döndür (FastAPI'nin daha sonra kullanabilmesi için)
 
 async def get_current_admin_user(current_user: User = Depends(get_current_user)) -> User:
     """
@@ -0,0 +1,73 @@
+# routers/media.py
+# Yerel dosya sistemi depolama arka ucundaki dosyaları imzalı URL'ler ile servis eden endpoint
+
+import mimetypes
+import os
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+from storage import get_storage_backend # Aktif depolama arka ucu
+from storage.local import LocalBackend, verify_object_signature, MEDIA_ROUTE_PREFIX
+
+router = APIRouter(
+    prefix=MEDIA_ROUTE_PREFIX, # Tüm endpoint'ler /media ile başlayacak
+    tags=["Media"], # Swagger UI'da grup adı
+)
+
+
+class ZeroCopyFileResponse(FileResponse):
+    """
+    ASGI sunucusu 'http.response.zerocopysend' eklentisini destekliyorsa dosyayı
+    sendfile ile (kullanıcı alanına kopyalamadan) gönderir; desteklemiyorsa
+    standart FileResponse gibi parça parça okuyarak gönderir.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if "http.response.zerocopysend" not in scope.get("extensions", {}):
+            await super().__call__(scope, receive, send)
+            return
+
+        stat_result = os.stat(self.path)
+        self.set_stat_headers(stat_result)
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        with open(self.path, "rb") as file:
+            await send({
+                "type": "http.response.zerocopysend",
+                "file": file.fileno(),
+                "count": stat_result.st_size,
+                "more_body": False,
+            })
+
+
+@router.get("/{object_name:path}", summary="Serve a file from local storage using a signed URL")
+async def serve_media(
+    object_name: str,
+    expires: int = Query(..., description="Expiry time of the signed URL (unix timestamp)"),
+    signature: str = Query(..., description="HMAC signature of the URL"),
+):
+    """
+    Yerel depolama arka ucundaki bir dosyayı döndürür.
+    Sadece get_presigned_url ile üretilmiş, süresi dolmamış imzalı URL'ler kabul edilir.
+    """
+    backend = get_storage_backend()
+    if not isinstance(backend, LocalBackend):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
+
+    if not verify_object_signature(object_name, expires, signature):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired signature.")
+
+    path = backend.path_for(object_name)
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return ZeroCopyFileResponse(path, media_type=media_type, headers={"Cache-Control": "private, max-age=3600"})
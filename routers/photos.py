@@ -1,18 +1,37 @@
 # routers/photos.py
 # Fotoğraf yükleme ve yönetimi endpoint'leri
 
+import asyncio
+import math
+from datetime import datetime
 from typing import List, Optional
 from io import BytesIO
 from uuid import uuid4 # Benzersiz dosya adları oluşturmak için
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import UploadFile as StarletteUploadFile # request.form() dosya alanları
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session, joinedload # Veritabanı oturumu ve ilişki yükleme için
 
-from database import get_db # Veritabanı oturumu bağımlılığı
+from database import get_db, SessionLocal # Veritabanı oturumu bağımlılığı
 from models.user import User # User modelini içe aktarın (ilişki için)
-from models.photo import Photo, PhotoResponse # Photo modeli ve yanıt şeması
-from routers.auth import get_current_user, get_current_admin_user # Kimlik doğrulama bağımlılıkları
-from storage import upload_file, get_presigned_url, delete_file # MinIO depolama işlevleri
+from models.photo import Photo, PhotoTag, PhotoResponse, PhotoTagsUpdate, SimilarPhotoResponse, DuplicateGroupsResponse, PhotoBatchRequest, PhotoBatchResponse # Photo modelleri ve şemaları
+from models.album import Album, AlbumPhoto # Albüm filtresi için
+from routers.auth import get_current_user, get_current_admin_user, get_user_from_token, oauth2_scheme # Kimlik doğrulama bağımlılıkları
+from events import event_broker # Fotoğraf olaylarının abonelere iletilmesi için
+from stats import apply_photo_delta # Kullanıcı istatistik sayaçlarının güncellenmesi
+from storage import upload_file, get_media_url # MinIO depolama işlevleri
+from archive import ArchiveEntry, stream_zip # Anında ZIP arşivi üretimi
+from phash import photo_hash_columns, find_similar, duplicate_groups, BAND_COUNT, DEFAULT_MAX_DISTANCE, MAX_DISTANCE_LIMIT # Yakın kopya tespiti
+from groupcommit import GROUP_COMMIT_ENABLED, photo_group_commit # Eşzamanlı INSERT'lerin toplu yazımı
+from jobs import enqueue # Depolama silme ve yükleme sonrası işlemenin kalıcı kuyruğa eklenmesi
+from fieldsets import FIELDS_QUERY, parse_fields, wants, select_fields, sparse_response # Seyrek alan seçimi
+from ratelimit import ( # Yüklemeler için hız sınırlama ve bellek bütçesi
+    upload_ip_limiter, upload_user_limiter, upload_bytes_budget,
+    get_client_ip, request_size_estimate, enforce_rate_limit, server_busy,
+)
 
 # Loglama için
 import logging
@@ -24,50 +43,138 @@ router = APIRouter(
     tags=["Photos"], # Swagger UI'da grup adı
 )
 
-@router.post("/upload", response_model=PhotoResponse, status_code=status.HTTP_201_CREATED, summary="Upload a new photo")
-async def upload_photo(
-    file: UploadFile = File(...), # Yüklenecek dosya
-    db: Session = Depends(get_db), # Veritabanı oturumu
-    current_user: User = Depends(get_current_user) # Oturum açmış kullanıcı (sahip)
-):
+async def upload_admission(request: Request, current_user: User = Depends(get_current_user)):
     """
-    Kullanıcı tarafından yeni bir fotoğraf yükler.
-    Sadece oturum açmış kullanıcılar fotoğraf yükleyebilir.
+    Yükleme endpoint'leri için kabul kontrolü bağımlılığı.
+    Kullanıcı ve IP başına hız sınırı uygular (429); aynı anda işlenen yüklemelerin
+    toplam boyutunu sınırlar (503), çünkü dosyalar belleğe okunur.
+    Endpoint'ler gövdeyi kendileri okur (gövde parametresi yoktur); böylece FastAPI bu kontrolleri
+    gövde alınmadan önce çalıştırır ve sınırı aşan yükleme, dosya sunucuya aktarılmadan reddedilir.
     """
-    if not file.content_type.startswith('image/'):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only image files are allowed."
-        )
+    enforce_rate_limit(upload_user_limiter, f"user:{current_user.id}", "Too many uploads. Please slow down.")
+    enforce_rate_limit(upload_ip_limiter, get_client_ip(request), "Too many uploads from this address. Please slow down.")
+    size = request_size_estimate(request)
+    if not upload_bytes_budget.try_acquire(size):
+        raise server_busy("Upload capacity is exhausted. Please try again shortly.")
+    try:
+        yield
+    finally:
+        upload_bytes_budget.release(size)
 
-    # Benzersiz bir dosya adı oluştur
-    file_extension = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-    object_name = f"uploads/{current_user.username}/{uuid4()}.{file_extension}" # Örn: uploads/testuser/a1b2c3d4-e5f6-7890-1234-567890abcdef.jpg
+# PhotoResponse alanlarının nasıl hesaplanacağı; `fields` ile istenmeyen alanlar hiç hesaplanmaz
+PHOTO_FIELD_GETTERS = {
+    "id": lambda photo: photo.id,
+    "object_name": lambda photo: photo.object_name,
+    "url": lambda photo: get_media_url(photo.object_name), # En pahalı alan: ön-imzalı URL (MEDIA_URL_MODE=stable ise imzasız)
+    "uploaded_at": lambda photo: photo.uploaded_at,
+    "owner_id": lambda photo: photo.owner_id,
+    "owner_username": lambda photo: photo.owner.username if photo.owner else None,
+}
 
-    # Dosya içeriğini belleğe oku
-    file_content = await file.read()
-    file_data_io = BytesIO(file_content)
+MAX_TAG_LENGTH = 50 # PhotoTag.tag sütun uzunluğu
+
+def normalize_tags(tags: List[str]) -> List[str]:
+    """
+    Etiketleri küçük harfe çevirir, boşlukları kırpar, tekrarları ve boşları atar.
+    """
+    normalized = []
+    for tag in tags:
+        tag = tag.strip().lower()
+        if not tag:
+            continue
+        if len(tag) > MAX_TAG_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Tags can be at most {MAX_TAG_LENGTH} characters long."
+            )
+        if tag not in normalized:
+            normalized.append(tag)
+    return normalized
 
-    # MinIO'ya yükle
-    uploaded_object_name = upload_file(file_data_io, object_name, file.content_type)
+MAX_ID_LIST_LENGTH = 1000 # Virgülle ayrılmış ID listelerinde izin verilen en fazla eleman
+PHOTO_BATCH_URL_WORKERS = 4 # Toplu sorguda URL'lerin paralel üretildiği thread sayısı
 
-    if not uploaded_object_name:
+def parse_id_list(ids: str) -> List[int]:
+    """
+    "1,2,3" biçimindeki ID listesini sırayı koruyarak ve tekrarları atarak çözer.
+    """
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to upload photo to storage."
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers."
         )
+    return check_id_list(parsed)
 
-    # Veritabanına fotoğraf kaydını oluştur
+def check_id_list(ids: List[int]) -> List[int]:
+    """
+    ID listesindeki tekrarları sırayı koruyarak atar ve uzunluğunu doğrular.
+    """
+    parsed = list(dict.fromkeys(ids))
+    if not parsed or len(parsed) > MAX_ID_LIST_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must contain between 1 and {MAX_ID_LIST_LENGTH} ids."
+        )
+    return parsed
+
+def build_object_name(username: str, filename: Optional[str]) -> str:
+    """
+    Yüklenecek dosya için benzersiz bir obje adı oluşturur.
+    Örn: uploads/testuser/a1b2c3d4-e5f6-7890-1234-567890abcdef.jpg
+    """
+    file_extension = filename.split(".")[-1] if filename and "." in filename else "jpg"
+    return f"uploads/{username}/{uuid4()}.{file_extension}"
+
+def photo_insert_values(owner: User, object_name: str, size: int, phash: Optional[int] = None) -> dict:
+    """
+    Toplu INSERT için fotoğraf satırının değerleri. Gruptaki tüm satırların aynı
+    sütunları içermesi gerektiğinden hash sütunları hash yoksa da (None) eklenir.
+    """
+    values = {"object_name": object_name, "size": size, "owner_id": owner.id, "phash": None,
+              **{f"phash_band{index}": None for index in range(BAND_COUNT)}}
+    values.update(photo_hash_columns(phash))
+    return values
+
+def create_photo_record(db: Session, owner: User, object_name: str, size: int, phash: Optional[int] = None) -> Photo:
+    """
+    Depolamaya yazılmış bir obje için fotoğraf kaydını oluşturur.
+    `phash` biliniyorsa (bkz. phash.py) yakın kopya araması için kayda yazılır; bilinmiyorsa
+    hash'i hesaplayacak 'photo.process' işi (bkz. jobs.py) aynı transaction içinde kuyruğa eklenir.
+    Kullanıcı sayaçları aynı transaction içinde güncellenir, commit sonrası
+    abonelere 'photo.created' olayı gönderilir.
+    """
     new_photo = Photo(
-        object_name=uploaded_object_name,
-        owner_id=current_user.id
+        object_name=object_name,
+        size=size,
+        owner_id=owner.id,
+        **photo_hash_columns(phash)
     )
     db.add(new_photo)
+    if phash is None:
+        db.flush() # İş için fotoğraf ID'si gerekli
+        enqueue(db, "photo.process", {"photo_id": new_photo.id})
+    # Kullanıcı sayaçlarını aynı transaction içinde güncelle
+    apply_photo_delta(db, owner.id, 1, size)
     db.commit()
     db.refresh(new_photo)
 
-    # Ön-imzalı URL oluştur ve yanıtla
-    photo_url = get_presigned_url(new_photo.object_name)
+    # Commit sonrası abonelere yeni fotoğraf olayını gönder
+    event_broker.publish(
+        "photo.created",
+        owner_id=new_photo.owner_id,
+        photo_id=new_photo.id,
+        object_name=new_photo.object_name,
+        uploaded_at=new_photo.uploaded_at
+    )
+    return new_photo
+
+def uploaded_photo_response(new_photo: Photo, owner: User) -> PhotoResponse:
+    """
+    Yeni yüklenen fotoğraf için ön-imzalı URL içeren yanıtı oluşturur.
+    """
+    photo_url = get_media_url(new_photo.object_name)
     if not photo_url:
         logger.error(f"Failed to generate presigned URL for {new_photo.object_name} after successful upload.")
         raise HTTPException(
@@ -77,22 +184,97 @@ async def upload_photo(
 
     # Pydantic yanıt modelini, tüm gerekli alanları manuel olarak sağlayarak oluşturun.
     # new_photo'yu doğrudan PhotoResponse'a vermek yerine, alanları eşleştirelim.
-    response_data = PhotoResponse(
+    return PhotoResponse(
         id=new_photo.id,
         object_name=new_photo.object_name,
         url=photo_url, # URL'i burada sağlıyoruz
         uploaded_at=new_photo.uploaded_at,
         owner_id=new_photo.owner_id,
-        owner_username=current_user.username # Sahip kullanıcı adını ekle
+        owner_username=owner.username # Sahip kullanıcı adını ekle
     )
 
-    return response_data
+# upload_photo multipart gövdeyi kendisi okuduğu için form alanı OpenAPI şemasına elle eklenir
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+@router.post("/upload", response_model=PhotoResponse, status_code=status.HTTP_201_CREATED, summary="Upload a new photo", dependencies=[Depends(upload_admission)], openapi_extra=UPLOAD_FORM_SCHEMA)
+async def upload_photo(
+    request: Request,
+    db: Session = Depends(get_db), # Veritabanı oturumu
+    current_user: User = Depends(get_current_user) # Oturum açmış kullanıcı (sahip)
+):
+    """
+    Kullanıcı tarafından yeni bir fotoğraf yükler (multipart form, `file` alanı).
+    Sadece oturum açmış kullanıcılar fotoğraf yükleyebilir.
+    Gövde, kabul kontrolünden (upload_admission) sonra okunur.
+    """
+    form = await request.form()
+    try:
+        return await _store_uploaded_photo(form.get("file"), db, current_user)
+    finally:
+        await form.close()
+
+async def _store_uploaded_photo(file, db: Session, current_user: User) -> PhotoResponse:
+    if not isinstance(file, StarletteUploadFile):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A 'file' form field is required."
+        )
+    if not (file.content_type or "").startswith('image/'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only image files are allowed."
+        )
+
+    # Benzersiz bir dosya adı oluştur
+    object_name = build_object_name(current_user.username, file.filename)
+
+    # Dosya içeriğini belleğe oku
+    file_content = await file.read()
+    file_data_io = BytesIO(file_content)
+
+    # MinIO'ya yükle (zaman aşımı ve yeniden denemelerle saniyeler sürebilir; olay döngüsünü bloklamasın)
+    uploaded_object_name = await run_in_threadpool(upload_file, file_data_io, object_name, file.content_type)
+
+    if not uploaded_object_name:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to upload photo to storage."
+        )
+
+    # Veritabanına fotoğraf kaydını oluştur ve yanıtla.
+    # Algısal hash yanıtı bekletmeden arka plan işinde hesaplanır (bkz. jobs.py).
+    if GROUP_COMMIT_ENABLED:
+        # Eşzamanlı yüklemelerle aynı transaction'da toplu yazılır (bkz. groupcommit.py)
+        new_photo = await photo_group_commit.submit(
+            photo_insert_values(current_user, uploaded_object_name, len(file_content))
+        )
+    else:
+        new_photo = create_photo_record(db, current_user, uploaded_object_name, len(file_content))
+    return uploaded_photo_response(new_photo, current_user)
 
 @router.get("/", response_model=List[PhotoResponse], summary="List all photos or photos by a specific user")
 async def list_photos(
+    response: Response,
     owner_id: Optional[int] = Query(None, description="Filter photos by owner ID"),
+    album_id: Optional[int] = Query(None, description="Only photos in this album, in album order"),
+    tags: Optional[str] = Query(None, description="Comma-separated tags; only photos having ALL of them"),
+    cursor: Optional[int] = Query(None, description="Value of the X-Next-Cursor header from the previous page"),
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = FIELDS_QUERY,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user) # Oturum açmış her kullanıcı bu listeye erişebilir
 ):
@@ -100,8 +282,16 @@ async def list_photos(
     Sistemdeki tüm fotoğrafları listeler.
     Eğer `owner_id` sağlanırsa, sadece belirli bir kullanıcıya ait fotoğrafları listeler.
     Admin olmayan kullanıcılar sadece kendi fotoğraflarını listeleyebilir.
+    `album_id` ve `tags` filtreleri birlikte kullanılabilir. Sonuçlar albüm sırasına
+    (albüm filtresi varsa) veya en yeniden eskiye sıralanır; bir sonraki sayfa için
+    yanıttaki `X-Next-Cursor` başlığı `cursor` parametresi olarak gönderilir.
+    `fields` verilirse sadece istenen alanlar döndürülür; `url` istenmezse presign yapılmaz,
+    `owner_username` istenmezse kullanıcı tablosu ile join yapılmaz.
     """
-    query = db.query(Photo).options(joinedload(Photo.owner)) # owner ilişkisini de yükle
+    selected = parse_fields(fields, PhotoResponse)
+    query = db.query(Photo)
+    if wants(selected, "owner_username"):
+        query = query.options(joinedload(Photo.owner)) # owner ilişkisini de yükle
 
     if owner_id:
         # Admin olmayan kullanıcılar sadece kendi fotoğraflarını isteyebilir
@@ -116,37 +306,242 @@ async def list_photos(
         if not current_user.is_admin:
             query = query.filter(Photo.owner_id == current_user.id)
 
-    photos = query.offset(skip).limit(limit).all()
+    tag_list = normalize_tags(tags.split(",")) if tags else []
+    if tag_list:
+        # Tüm etiketlere sahip fotoğraflar: (tag, photo_id) birincil anahtar indeksi üzerinden
+        tagged_photo_ids = (
+            select(PhotoTag.photo_id)
+            .where(PhotoTag.tag.in_(tag_list))
+            .group_by(PhotoTag.photo_id)
+            .having(func.count() == len(tag_list))
+        )
+        query = query.filter(Photo.id.in_(tagged_photo_ids))
+
+    if album_id is not None:
+        album = db.query(Album).filter(Album.id == album_id).first()
+        if album is None or (album.owner_id != current_user.id and not current_user.is_admin):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Album not found")
+        # Albüm sırası (album_id, position) indeksinden okunur
+        query = query.join(AlbumPhoto, AlbumPhoto.photo_id == Photo.id).filter(AlbumPhoto.album_id == album_id)
+        query = query.add_columns(AlbumPhoto.position)
+        if cursor is not None:
+            query = query.filter(AlbumPhoto.position > cursor)
+        rows = query.order_by(AlbumPhoto.position).offset(skip).limit(limit).all()
+        photos = [photo for photo, _ in rows]
+        next_cursor = rows[-1][1] if len(rows) == limit else None
+    else:
+        if cursor is not None:
+            query = query.filter(Photo.id < cursor)
+        photos = query.order_by(Photo.id.desc()).offset(skip).limit(limit).all()
+        next_cursor = photos[-1].id if len(photos) == limit else None
 
     response_photos = []
     for photo in photos:
-        photo_url = get_presigned_url(photo.object_name)
-        if photo_url:
-            # PhotoResponse'ı manuel olarak doldur
-            photo_response = PhotoResponse(
-                id=photo.id,
-                object_name=photo.object_name,
-                url=photo_url,
-                uploaded_at=photo.uploaded_at,
-                owner_id=photo.owner_id,
-                owner_username=photo.owner.username if photo.owner else None
+        photo_data = select_fields(photo, PHOTO_FIELD_GETTERS, selected)
+        if "url" in photo_data and not photo_data["url"]:
+            logger.warning(f"Could not generate URL for photo ID {photo.id}. Skipping.")
+            continue
+        # Tüm alanlar isteniyorsa PhotoResponse'ı doldur, aksi halde seçili alanları olduğu gibi döndür
+        response_photos.append(PhotoResponse(**photo_data) if selected is None else photo_data)
+
+    result = response_photos if selected is None else sparse_response(response_photos)
+    if next_cursor is not None:
+        (response if selected is None else result).headers["X-Next-Cursor"] = str(next_cursor)
+    return result
+
+@router.get("/archive", summary="Download photos as a ZIP archive streamed on the fly")
+async def download_archive(
+    ids: Optional[str] = Query(None, description="Comma-separated photo ids"),
+    album_id: Optional[int] = Query(None, description="All photos of this album, in album order"),
+    owner_id: Optional[int] = Query(None, description="All photos of this user (defaults to the current user)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Seçilen fotoğrafları (ID listesi, albüm veya kullanıcının tüm fotoğrafları) tek bir ZIP
+    dosyası olarak indirir. Arşiv depolamadan okunurken üretilir; bellekte veya diskte tutulmaz.
+    JPEG/PNG gibi zaten sıkıştırılmış dosyalar tekrar sıkıştırılmaz.
+    Admin olmayan kullanıcılar sadece kendi fotoğraflarını indirebilir.
+    """
+    if sum(value is not None for value in (ids, album_id, owner_id)) > 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Use only one of ids, album_id or owner_id."
+        )
+
+    query = db.query(Photo.id, Photo.object_name, Photo.uploaded_at, Photo.owner_id)
+    if ids is not None:
+        photo_ids = parse_id_list(ids)
+        rows = query.filter(Photo.id.in_(photo_ids)).all()
+        by_id = {row.id: row for row in rows}
+        missing = [photo_id for photo_id in photo_ids if photo_id not in by_id]
+        if missing:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Photos not found: {missing[:20]}")
+        rows = [by_id[photo_id] for photo_id in photo_ids] # İstenen sırayı koru
+        if not current_user.is_admin and any(row.owner_id != current_user.id for row in rows):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You can only download your own photos."
             )
-            response_photos.append(photo_response)
+    elif album_id is not None:
+        album = db.query(Album).filter(Album.id == album_id).first()
+        if album is None or (album.owner_id != current_user.id and not current_user.is_admin):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Album not found")
+        rows = (
+            query.join(AlbumPhoto, AlbumPhoto.photo_id == Photo.id)
+            .filter(AlbumPhoto.album_id == album_id)
+            .order_by(AlbumPhoto.position)
+            .all()
+        )
+        archive_label = f"album-{album_id}"
+    else:
+        owner_id = owner_id or current_user.id
+        if owner_id != current_user.id and not current_user.is_admin:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="You can only download your own photos."
+            )
+        rows = query.filter(Photo.owner_id == owner_id).order_by(Photo.id).all()
+        archive_label = f"user-{owner_id}"
+    if ids is not None:
+        archive_label = "photos"
+
+    entries = [ArchiveEntry(row.object_name, row.uploaded_at) for row in rows]
+    # İndirme uzun sürebilir; veritabanı bağlantısını akış boyunca tutma
+    db.close()
+
+    filename = f"{archive_label}-{datetime.utcnow():%Y%m%d}.zip"
+    return StreamingResponse(
+        stream_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/duplicates", response_model=DuplicateGroupsResponse, summary="Report groups of near-duplicate photos of a user")
+async def list_duplicate_groups(
+    owner_id: Optional[int] = Query(None, description="User whose library is checked (defaults to the current user)"),
+    max_distance: int = Query(DEFAULT_MAX_DISTANCE, ge=0, le=MAX_DISTANCE_LIMIT, description="Maximum Hamming distance between perceptual hashes"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Kullanıcının birbirinin yakın kopyası olan (yeniden boyutlandırılmış, yeniden kodlanmış)
+    fotoğraflarını gruplar halinde döndürür. Admin olmayan kullanıcılar sadece kendi kütüphanelerini görebilir.
+    """
+    owner_id = owner_id or current_user.id
+    if owner_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view your own duplicates."
+        )
+    groups = await run_in_threadpool(duplicate_groups, db, owner_id, max_distance)
+    return DuplicateGroupsResponse(owner_id=owner_id, max_distance=max_distance, groups=groups)
+
+def _select_photo_fields(photos: List[Photo], selected) -> List[dict]:
+    return [select_fields(photo, PHOTO_FIELD_GETTERS, selected) for photo in photos]
+
+async def lookup_photos(ids: List[int], fields: Optional[str], db: Session, current_user: User):
+    """
+    ID listesindeki fotoğrafları tek bir IN sorgusuyla yükler ve her satır için sahip/admin
+    kontrolü yapar. URL'ler (presign) thread havuzunda gruplar halinde paralel üretilir.
+    """
+    selected = parse_fields(fields, PhotoResponse)
+    query = db.query(Photo)
+    if wants(selected, "owner_username"):
+        query = query.options(joinedload(Photo.owner)) # Sahipler aynı sorguda yüklenir
+    found = {photo.id: photo for photo in query.filter(Photo.id.in_(ids)).all()}
+
+    visible, not_found, forbidden = [], [], []
+    for photo_id in ids:
+        photo = found.get(photo_id)
+        if photo is None:
+            not_found.append(photo_id)
+        elif photo.owner_id != current_user.id and not current_user.is_admin:
+            forbidden.append(photo_id)
         else:
+            visible.append(photo)
+
+    chunk_size = max(1, math.ceil(len(visible) / PHOTO_BATCH_URL_WORKERS))
+    chunks = [visible[start:start + chunk_size] for start in range(0, len(visible), chunk_size)]
+    results = await asyncio.gather(*(run_in_threadpool(_select_photo_fields, chunk, selected) for chunk in chunks))
+
+    photos = {}
+    for photo, photo_data in zip(visible, (photo_data for result in results for photo_data in result)):
+        if "url" in photo_data and not photo_data["url"]:
             logger.warning(f"Could not generate URL for photo ID {photo.id}. Skipping.")
-    return response_photos
+            continue
+        photos[photo.id] = PhotoResponse(**photo_data) if selected is None else photo_data
+
+    if selected is None:
+        return PhotoBatchResponse(photos=photos, not_found=not_found, forbidden=forbidden)
+    return sparse_response({"photos": photos, "not_found": not_found, "forbidden": forbidden})
+
+@router.get("/batch", response_model=PhotoBatchResponse, summary="Get details of many photos by id in one request")
+async def get_photos_batch(
+    ids: str = Query(..., description="Comma-separated photo ids (max 1000)"),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Birden çok fotoğrafın detaylarını tek istekte döndürür (ör. bir ekrandaki küçük resimler).
+    Yanıt fotoğraf ID'sine göre anahtarlıdır; bulunamayan ve kullanıcının göremeyeceği
+    ID'ler ayrı listelerde döner. Çok uzun listeler için `POST /photos/batch` kullanılabilir.
+    """
+    return await lookup_photos(parse_id_list(ids), fields, db, current_user)
+
+@router.post("/batch", response_model=PhotoBatchResponse, summary="Get details of many photos by id (ids in the request body)")
+async def post_photos_batch(
+    batch: PhotoBatchRequest,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    `GET /photos/batch` ile aynıdır; ID listesi URL uzunluğu sınırına takılmasın diye gövdede gönderilir.
+    """
+    return await lookup_photos(check_id_list(batch.ids), fields, db, current_user)
+
+@router.get("/events", summary="Stream photo created/deleted events (Server-Sent Events)")
+async def stream_photo_events(token: str = Depends(oauth2_scheme)):
+    """
+    Yeni yüklenen ve silinen fotoğrafları Server-Sent Events olarak anlık iletir.
+    Kullanıcılar sadece kendi fotoğraflarının olaylarını, adminler tüm olayları alır.
+    `GET /photos/` üzerinde periyodik sorgulama (polling) yapmak yerine kullanılmalıdır.
+    """
+    # Kullanıcıyı kısa ömürlü bir oturumla doğrula; get_db bağımlılığı kullanılsaydı
+    # veritabanı bağlantısı akış açık kaldığı sürece havuzdan alınmış kalırdı.
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(token, db)
+        user_id, is_admin = user.id, user.is_admin
+    finally:
+        db.close()
+
+    subscription = event_broker.subscribe(user_id, is_admin)
+    return StreamingResponse(
+        event_broker.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/{photo_id}", response_model=PhotoResponse, summary="Get details of a specific photo")
 async def get_photo(
     photo_id: int,
+    fields: Optional[str] = FIELDS_QUERY,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user) # Oturum açmış her kullanıcı erişebilir
 ):
     """
     Belirli bir fotoğrafın detaylarını döndürür.
     Sadece fotoğrafın sahibi veya bir admin erişebilir.
+    `fields` ile sadece istenen alanlar döndürülebilir (bkz. `GET /photos/`).
     """
-    photo = db.query(Photo).options(joinedload(Photo.owner)).filter(Photo.id == photo_id).first()
+    selected = parse_fields(fields, PhotoResponse)
+    query = db.query(Photo)
+    if wants(selected, "owner_username"):
+        query = query.options(joinedload(Photo.owner))
+    photo = query.filter(Photo.id == photo_id).first()
     if not photo:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
 
@@ -157,25 +552,97 @@ async def get_photo(
             detail="You are not authorized to view this photo."
         )
 
-    photo_url = get_presigned_url(photo.object_name)
-    if not photo_url:
+    photo_data = select_fields(photo, PHOTO_FIELD_GETTERS, selected)
+    if "url" in photo_data and not photo_data["url"]:
         logger.error(f"Failed to generate presigned URL for photo ID {photo.id}.")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to generate URL for photo."
         )
 
-    # PhotoResponse'ı manuel olarak doldur
-    response_data = PhotoResponse(
-        id=photo.id,
-        object_name=photo.object_name,
-        url=photo_url,
-        uploaded_at=photo.uploaded_at,
-        owner_id=photo.owner_id,
-        owner_username=photo.owner.username if photo.owner else None
-    )
+    # Tüm alanlar isteniyorsa PhotoResponse'ı doldur
+    if selected is None:
+        return PhotoResponse(**photo_data)
+    return sparse_response(photo_data)
+
+def _get_own_photo(db: Session, photo_id: int, current_user: User, for_update: bool = False) -> Photo:
+    """
+    Fotoğrafı bulur; yoksa 404, sahibi veya admin değilse 403 fırlatır.
+    `for_update` ise fotoğraf satırı transaction sonuna kadar kilitlenir (SELECT ... FOR UPDATE).
+    """
+    query = db.query(Photo).filter(Photo.id == photo_id)
+    if for_update:
+        query = query.with_for_update()
+    photo = query.first()
+    if not photo:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Photo not found")
+    if photo.owner_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not authorized to access this photo."
+        )
+    return photo
+
+@router.get("/{photo_id}/tags", response_model=List[str], summary="Get the tags of a photo")
+async def get_photo_tags(
+    photo_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Fotoğrafın etiketlerini döndürür. Sadece fotoğrafın sahibi veya bir admin erişebilir.
+    """
+    _get_own_photo(db, photo_id, current_user)
+    return [row[0] for row in db.query(PhotoTag.tag).filter(PhotoTag.photo_id == photo_id).order_by(PhotoTag.tag).all()]
 
-    return response_data
+@router.get("/{photo_id}/similar", response_model=List[SimilarPhotoResponse], summary="Find near-duplicates of a photo")
+async def list_similar_photos(
+    photo_id: int,
+    max_distance: int = Query(DEFAULT_MAX_DISTANCE, ge=0, le=MAX_DISTANCE_LIMIT, description="Maximum Hamming distance between perceptual hashes"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Fotoğrafın aynı kullanıcıya ait yakın kopyalarını en benzerden başlayarak döndürür.
+    Fotoğrafın algısal hash'i henüz hesaplanmadıysa (bkz. `python phash.py backfill`) 409 döner.
+    """
+    photo = _get_own_photo(db, photo_id, current_user)
+    if photo.phash is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Perceptual hash of this photo has not been computed yet."
+        )
+    matches = find_similar(db, photo.phash, max_distance, owner_id=photo.owner_id, exclude_id=photo.id)[:limit]
+    if not matches:
+        return []
+    distances = dict(matches)
+    rows = db.query(Photo.id, Photo.object_name, Photo.uploaded_at).filter(Photo.id.in_(distances)).all()
+    similar = [
+        SimilarPhotoResponse(id=row.id, object_name=row.object_name, uploaded_at=row.uploaded_at, distance=distances[row.id])
+        for row in rows
+    ]
+    return sorted(similar, key=lambda item: (item.distance, item.id))
+
+@router.put("/{photo_id}/tags", response_model=List[str], summary="Replace the tags of a photo")
+async def set_photo_tags(
+    photo_id: int,
+    tags_update: PhotoTagsUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Fotoğrafın etiketlerini verilen listeyle değiştirir.
+    Etiketler küçük harfe çevrilir; sadece fotoğrafın sahibi veya bir admin değiştirebilir.
+    Fotoğraf satırı kilitlenir; aynı fotoğrafa eşzamanlı PUT'lar sırayla uygulanır ve
+    sil-ekle adımları birbirine karışıp (tag, photo_id) anahtarında çakışmaz.
+    """
+    _get_own_photo(db, photo_id, current_user, for_update=True)
+    new_tags = normalize_tags(tags_update.tags)
+    db.query(PhotoTag).filter(PhotoTag.photo_id == photo_id).delete(synchronize_session=False)
+    db.add_all([PhotoTag(tag=tag, photo_id=photo_id) for tag in new_tags])
+    db.commit()
+    return sorted(new_tags)
 
 @router.delete("/{photo_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a photo by ID (Owner or Admin only)")
 async def delete_photo(
@@ -186,6 +653,8 @@ async def delete_photo(
     """
     Belirtilen ID'ye sahip bir fotoğrafı siler.
     Sadece fotoğrafın sahibi veya bir admin silebilir.
+    Dosya depolamadan yanıtı bekletmeden, kayıt silinmesiyle aynı transaction'da kuyruğa
+    eklenen 'storage.delete' işiyle silinir (bkz. jobs.py).
     """
     photo_to_delete = db.query(Photo).filter(Photo.id == photo_id).first()
     if not photo_to_delete:
@@ -198,15 +667,14 @@ async def delete_photo(
             detail="You are not authorized to delete this photo."
         )
 
-    # MinIO'dan dosyayı sil
-    if not delete_file(photo_to_delete.object_name):
-        logger.error(f"Failed to delete file {photo_to_delete.object_name} from MinIO.")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to delete photo from storage."
-        )
-
-    # Veritabanından kaydı sil
+    # Veritabanından kaydı (etiketleri ve albüm bağlantılarıyla) sil, kullanıcı sayaçlarını azalt
+    # ve depolamadaki dosyanın silinmesini aynı transaction içinde kuyruğa ekle
+    db.query(PhotoTag).filter(PhotoTag.photo_id == photo_id).delete(synchronize_session=False)
+    db.query(AlbumPhoto).filter(AlbumPhoto.photo_id == photo_id).delete(synchronize_session=False)
     db.delete(photo_to_delete)
+    apply_photo_delta(db, photo_to_delete.owner_id, -1, -(photo_to_delete.size or 0))
+    enqueue(db, "storage.delete", {"object_name": photo_to_delete.object_name})
     db.commit()
+
+    event_broker.publish("photo.deleted", owner_id=photo_to_delete.owner_id, photo_id=photo_id)
     return # 204 No Content döndür
\ No newline at end of file
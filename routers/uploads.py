@@ -0,0 +1,306 @@
+# routers/uploads.py
+# Devam ettirilebilir (resumable) parçalı fotoğraf yükleme endpoint'leri.
+# Akış: oturum oluştur -> parçaları ofsetlerine PUT et (paralel olabilir) ->
+# mevcut durumu sorgula -> tamamla. Her parça depolamadaki bir multipart parçasına karşılık gelir.
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from database import get_db, SessionLocal # Veritabanı oturumu bağımlılığı
+from models.user import User # User modelini içe aktarın (ilişki için)
+from models.photo import PhotoResponse # Fotoğraf yanıt şeması
+from models.upload_session import UploadSession, UploadSessionPart, UploadSessionCreate, UploadSessionResponse
+from routers.auth import get_current_user # Kimlik doğrulama bağımlılığı
+from routers.photos import upload_admission, build_object_name, create_photo_record, uploaded_photo_response
+from storage import create_multipart_upload, upload_part, complete_multipart_upload, abort_multipart_upload
+from stats import _upsert_insert # Diyalekte özgü INSERT ... ON CONFLICT
+
+# Loglama için
+import logging
+logger = logging.getLogger(__name__)
+
+# S3, son parça hariç parçaların en az 5 MiB olmasını ve en fazla 10000 parça olmasını şart koşar
+MIN_CHUNK_SIZE = 5 * 1024 * 1024
+MAX_CHUNK_SIZE = int(os.getenv("UPLOAD_MAX_CHUNK_SIZE", str(64 * 1024 * 1024)))
+DEFAULT_CHUNK_SIZE = int(os.getenv("UPLOAD_DEFAULT_CHUNK_SIZE", str(8 * 1024 * 1024)))
+MAX_PARTS = 10000
+UPLOAD_SESSION_TTL_HOURS = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")) # Tamamlanmayan oturumların ömrü
+UPLOAD_SESSION_SWEEP_SECONDS = int(os.getenv("UPLOAD_SESSION_SWEEP_SECONDS", "600")) # Süresi dolanları temizleme aralığı
+
+router = APIRouter(
+    prefix="/uploads", # Tüm endpoint'ler /uploads ile başlayacak
+    tags=["Uploads"], # Swagger UI'da grup adı
+)
+
+
+def _part_count(session: UploadSession) -> int:
+    return (session.total_size + session.chunk_size - 1) // session.chunk_size
+
+
+def _expected_part_size(session: UploadSession, part_number: int) -> int:
+    if part_number < _part_count(session):
+        return session.chunk_size
+    return session.total_size - session.chunk_size * (part_number - 1)
+
+
+def _session_response(session: UploadSession, response: Response = None) -> UploadSessionResponse:
+    """
+    Oturumun durumunu hesaplar. `offset`, baştan itibaren boşluksuz alınmış bayt sayısıdır
+    (tus protokolündeki Upload-Offset'e karşılık gelir).
+    """
+    received = {part.part_number: part.size for part in session.parts}
+    offset = 0
+    part_number = 1
+    while part_number in received:
+        offset += received[part_number]
+        part_number += 1
+    missing = [number for number in range(1, _part_count(session) + 1) if number not in received]
+
+    if response is not None:
+        response.headers["Upload-Offset"] = str(offset)
+        response.headers["Upload-Length"] = str(session.total_size)
+    return UploadSessionResponse(
+        id=session.id,
+        total_size=session.total_size,
+        chunk_size=session.chunk_size,
+        offset=offset,
+        received_parts=sorted(received),
+        missing_parts=missing,
+        expires_at=session.expires_at
+    )
+
+
+def _get_own_session(db: Session, session_id: str, current_user: User, for_update: bool = False) -> UploadSession:
+    """
+    Oturumu bulur; yoksa, süresi dolmuşsa veya başka bir kullanıcıya aitse 404 döndürür.
+    `for_update` ise oturum satırı transaction sonuna kadar kilitlenir (SELECT ... FOR UPDATE).
+    """
+    query = db.query(UploadSession).filter(UploadSession.id == session_id)
+    if for_update:
+        query = query.with_for_update()
+    session = query.first()
+    if session is None or session.owner_id != current_user.id or session.expires_at < datetime.utcnow():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload session not found")
+    return session
+
+
+@router.post("/", response_model=UploadSessionResponse, status_code=status.HTTP_201_CREATED, summary="Create a resumable upload session")
+async def create_upload_session(
+    session_create: UploadSessionCreate,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Yeni bir parçalı yükleme oturumu oluşturur.
+    Dosya `chunk_size` büyüklüğünde parçalara bölünerek gönderilir (son parça daha küçük olabilir).
+    """
+    if not session_create.content_type.startswith('image/'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only image files are allowed."
+        )
+
+    chunk_size = session_create.chunk_size or DEFAULT_CHUNK_SIZE
+    if not MIN_CHUNK_SIZE <= chunk_size <= MAX_CHUNK_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"chunk_size must be between {MIN_CHUNK_SIZE} and {MAX_CHUNK_SIZE} bytes."
+        )
+    if (session_create.total_size + chunk_size - 1) // chunk_size > MAX_PARTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"File is too large for chunk_size {chunk_size}; use a larger chunk_size."
+        )
+
+    object_name = build_object_name(current_user.username, session_create.filename)
+    storage_upload_id = await run_in_threadpool(create_multipart_upload, object_name, session_create.content_type)
+    if not storage_upload_id:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to start upload in storage."
+        )
+
+    session = UploadSession(
+        id=str(uuid4()),
+        owner_id=current_user.id,
+        object_name=object_name,
+        content_type=session_create.content_type,
+        total_size=session_create.total_size,
+        chunk_size=chunk_size,
+        storage_upload_id=storage_upload_id,
+        expires_at=datetime.utcnow() + timedelta(hours=UPLOAD_SESSION_TTL_HOURS)
+    )
+    db.add(session)
+    db.commit()
+
+    response.headers["Location"] = f"{router.prefix}/{session.id}"
+    return _session_response(session, response)
+
+
+@router.get("/{session_id}", response_model=UploadSessionResponse, summary="Get the current offset and received parts of an upload")
+async def get_upload_session(
+    session_id: str,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Yükleme oturumunun durumunu döndürür. Bağlantısı kopan istemciler buradan
+    hangi parçaları tekrar göndermeleri gerektiğini öğrenir.
+    """
+    return _session_response(_get_own_session(db, session_id, current_user), response)
+
+
+@router.put("/{session_id}", response_model=UploadSessionResponse, summary="Upload a chunk at the given offset", dependencies=[Depends(upload_admission)])
+async def put_upload_chunk(
+    session_id: str,
+    request: Request,
+    response: Response,
+    offset: int = Query(..., ge=0, description="Byte offset of the chunk; must be a multiple of chunk_size"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Ham istek gövdesindeki parçayı verilen ofsete yazar.
+    Farklı ofsetlerdeki parçalar paralel gönderilebilir; aynı parça tekrar gönderilirse üzerine yazılır.
+    """
+    session = _get_own_session(db, session_id, current_user)
+    if offset % session.chunk_size != 0 or offset >= session.total_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="offset must be a multiple of chunk_size and smaller than total_size."
+        )
+    part_number = offset // session.chunk_size + 1
+    expected_size = _expected_part_size(session, part_number)
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) != expected_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Chunk at offset {offset} must be exactly {expected_size} bytes."
+        )
+    data = await request.body()
+    if len(data) != expected_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Chunk at offset {offset} must be exactly {expected_size} bytes."
+        )
+
+    etag = await run_in_threadpool(upload_part, session.object_name, session.storage_upload_id, part_number, data)
+    if not etag:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to store chunk."
+        )
+
+    # Oturum satırı kilitlenir: eşzamanlı tamamlama/iptal bitene kadar beklenir, oturum bu arada
+    # silindiyse parça kaydedilmez. Aynı parçanın eşzamanlı PUT'ları tek bir upsert ile birleşir.
+    if db.query(UploadSession.id).filter(UploadSession.id == session.id).with_for_update().first() is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Upload session was finalized or cancelled.")
+    insert = _upsert_insert(db)
+    statement = insert(UploadSessionPart).values(session_id=session.id, part_number=part_number, etag=etag, size=len(data))
+    statement = statement.on_conflict_do_update(
+        index_elements=[UploadSessionPart.session_id, UploadSessionPart.part_number],
+        set_={"etag": statement.excluded.etag, "size": statement.excluded.size},
+    )
+    db.execute(statement)
+    db.commit()
+    return _session_response(session, response)
+
+
+@router.post("/{session_id}/finalize", response_model=PhotoResponse, status_code=status.HTTP_201_CREATED, summary="Finish the upload and create the photo")
+async def finalize_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Tüm parçalar alındıysa depolamadaki yüklemeyi tamamlar ve fotoğraf kaydını
+    `POST /photos/upload` ile aynı şekilde oluşturur.
+    Oturum satırı kilitlenir; sürmekte olan parça kayıtları beklenir, sonrakiler 409 alır.
+    """
+    session = _get_own_session(db, session_id, current_user, for_update=True)
+    state = _session_response(session)
+    if state.missing_parts:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload is incomplete. Missing parts: {state.missing_parts[:20]}"
+        )
+
+    parts = [(part.part_number, part.etag) for part in session.parts]
+    completed = await run_in_threadpool(complete_multipart_upload, session.object_name, session.storage_upload_id, parts)
+    if not completed:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to assemble upload in storage."
+        )
+
+    object_name, total_size = session.object_name, session.total_size
+    db.delete(session)
+    new_photo = create_photo_record(db, current_user, object_name, total_size) # Oturumun silinmesi de bu commit'e dahildir
+    return uploaded_photo_response(new_photo, current_user)
+
+
+@router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Cancel an upload session")
+async def cancel_upload_session(
+    session_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Yükleme oturumunu iptal eder ve depolamadaki yüklenmiş parçaları siler.
+    """
+    session = _get_own_session(db, session_id, current_user, for_update=True)
+    await run_in_threadpool(abort_multipart_upload, session.object_name, session.storage_upload_id)
+    db.delete(session)
+    db.commit()
+    return
+
+
+def expire_upload_sessions(db: Session, batch_size: int = 100) -> int:
+    """
+    Süresi dolmuş oturumların depolamadaki yüklemelerini iptal eder ve kayıtlarını siler.
+    Silinen oturum sayısını döndürür.
+    """
+    expired_count = 0
+    while True:
+        sessions = (
+            db.query(UploadSession)
+            .filter(UploadSession.expires_at < datetime.utcnow())
+            .limit(batch_size)
+            .all()
+        )
+        if not sessions:
+            break
+        for session in sessions:
+            if not abort_multipart_upload(session.object_name, session.storage_upload_id):
+                logger.warning(f"Could not abort storage upload for expired session {session.id}; deleting record anyway.")
+            db.delete(session)
+        db.commit()
+        expired_count += len(sessions)
+    return expired_count
+
+
+async def run_upload_session_sweeper():
+    """
+    Süresi dolmuş yükleme oturumlarını periyodik olarak temizleyen arka plan görevi.
+    """
+    while True:
+        try:
+            db = SessionLocal()
+            try:
+                expired_count = await run_in_threadpool(expire_upload_sessions, db)
+            finally:
+                db.close()
+            if expired_count:
+                logger.info(f"Expired {expired_count} abandoned upload sessions.")
+        except Exception as e:
+            logger.error(f"Upload session sweep failed: {e}")
+        await asyncio.sleep(UPLOAD_SESSION_SWEEP_SECONDS)
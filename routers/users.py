@@ -2,13 +2,20 @@
 # Kullanıcı yönetimi endpoint'leri
 
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session # Veritabanı oturumu için
 
 from database import get_db # Veritabanı oturumu bağımlılığı
 from models.user import User, UserResponse # User modeli ve yanıt şeması
+from models.user_stats import UserStats, UserStatsResponse # Kullanıcı istatistikleri modeli ve yanıt şeması
+from models.photo import Photo, PhotoTag # Silinen kullanıcının fotoğrafları
+from models.album import Album, AlbumPhoto # Silinen kullanıcının albümleri
+from models.upload_session import UploadSession, UploadSessionPart # Silinen kullanıcının yarım kalan yüklemeleri
 # Kimlik doğrulama bağımlılıklarını auth router'ından içe aktarın
 from routers.auth import get_current_user, get_current_admin_user
+from wordsync import mark_words_changed # Silinen kullanıcının kelimeleri senkronizasyonda güncellenmiş sayılır
+from mediaauth import media_decisions # Silinen kullanıcının önbellekteki medya erişim kararları
+from jobs import enqueue_user_purge # Silinen kullanıcının depolamadaki dosyalarının temizlenmesi
 
 router = APIRouter(
     prefix="/users", # Tüm endpoint'ler /users ile başlayacak
@@ -22,6 +29,59 @@ async def read_users_me(current_user: User = Depends(get_current_user)):
     """
     return current_user # get_current_user zaten User objesini döndürüyor
 
+def _stats_response(db: Session, user: User) -> UserStatsResponse:
+    """
+    Kullanıcının sayaç satırını okur; henüz satır yoksa sıfır değerli yanıt döndürür.
+    """
+    stats = db.query(UserStats).filter(UserStats.user_id == user.id).first()
+    if stats is None:
+        return UserStatsResponse(user_id=user.id, username=user.username)
+    return UserStatsResponse(
+        user_id=user.id,
+        username=user.username,
+        photo_count=stats.photo_count,
+        total_bytes=stats.total_bytes,
+        updated_at=stats.updated_at
+    )
+
+@router.get("/me/stats", response_model=UserStatsResponse, summary="Get photo count and storage usage of the current user")
+async def read_users_me_stats(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Oturum açmış kullanıcının fotoğraf sayısını ve toplam depolama kullanımını döndürür.
+    """
+    return _stats_response(db, current_user)
+
+@router.get("/stats/top", response_model=List[UserStatsResponse], summary="List top users by storage usage (Admin only)")
+async def read_top_users_by_usage(
+    limit: int = Query(10, ge=1, le=100, description="Number of users to return"),
+    db: Session = Depends(get_db),
+    current_admin: User = Depends(get_current_admin_user) # Sadece adminler erişebilir
+):
+    """
+    Depolama kullanımına göre en çok yer kaplayan kullanıcıları listeler.
+    Sıralama, user_stats.total_bytes indeksi üzerinden yapılır.
+    """
+    rows = (
+        db.query(UserStats, User.username)
+        .join(User, User.id == UserStats.user_id)
+        .order_by(UserStats.total_bytes.desc())
+        .limit(limit)
+        .all()
+    )
+    return [
+        UserStatsResponse(
+            user_id=stats.user_id,
+            username=username,
+            photo_count=stats.photo_count,
+            total_bytes=stats.total_bytes,
+            updated_at=stats.updated_at
+        )
+        for stats, username in rows
+    ]
+
 @router.get("/{user_id}", response_model=UserResponse, summary="Get details of a specific user by ID (Admin only)")
 async def read_user(
     user_id: int,
@@ -37,6 +97,26 @@ async def read_user(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
 
+@router.get("/{user_id}/stats", response_model=UserStatsResponse, summary="Get photo count and storage usage of a user (Owner or Admin only)")
+async def read_user_stats(
+    user_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Belirli bir kullanıcının fotoğraf sayısını ve toplam depolama kullanımını döndürür.
+    Sadece kullanıcının kendisi veya bir admin erişebilir.
+    """
+    if user_id != current_user.id and not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You can only view your own stats unless you are an admin."
+        )
+    user = current_user if user_id == current_user.id else db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return _stats_response(db, user)
+
 @router.get("/", response_model=List[UserResponse], summary="List all users (Admin only)")
 async def read_users(
     skip: int = 0, # Sayfalama için kaç kullanıcıyı atlayacağımızı belirler
@@ -60,6 +140,9 @@ async def delete_user(
     """
     Belirtilen ID'ye sahip bir kullanıcıyı sistemden siler.
     Sadece yönetici (admin) yetkisine sahip kullanıcılar erişebilir.
+    Kullanıcının fotoğrafları, albümleri ve yükleme oturumları aynı transaction içinde silinir;
+    depolamadaki dosyaları ise yine aynı transaction'da kuyruğa eklenen 'user.purge' işleriyle
+    (bkz. jobs.py) yanıtı bekletmeden temizlenir.
     """
     user_to_delete = db.query(User).filter(User.id == user_id).first()
     if user_to_delete is None:
@@ -72,8 +155,26 @@ async def delete_user(
             detail="Cannot delete your own admin account directly through this endpoint."
         )
 
+    # Kullanıcıya ait kayıtlar toplu silinir; depolama objelerinin adları önce temizleme işi için okunur
+    user_photo_ids = db.query(Photo.id).filter(Photo.owner_id == user_to_delete.id).scalar_subquery()
+    user_album_ids = db.query(Album.id).filter(Album.owner_id == user_to_delete.id).scalar_subquery()
+    user_session_ids = db.query(UploadSession.id).filter(UploadSession.owner_id == user_to_delete.id).scalar_subquery()
+    object_names = [name for (name,) in db.query(Photo.object_name).filter(Photo.owner_id == user_to_delete.id)]
+    uploads = db.query(UploadSession.object_name, UploadSession.storage_upload_id).filter(UploadSession.owner_id == user_to_delete.id).all()
+
+    db.query(PhotoTag).filter(PhotoTag.photo_id.in_(user_photo_ids)).delete(synchronize_session=False)
+    db.query(AlbumPhoto).filter(AlbumPhoto.photo_id.in_(user_photo_ids) | AlbumPhoto.album_id.in_(user_album_ids)).delete(synchronize_session=False)
+    db.query(Album).filter(Album.owner_id == user_to_delete.id).delete(synchronize_session=False)
+    db.query(Photo).filter(Photo.owner_id == user_to_delete.id).delete(synchronize_session=False)
+    db.query(UploadSessionPart).filter(UploadSessionPart.session_id.in_(user_session_ids)).delete(synchronize_session=False)
+    db.query(UploadSession).filter(UploadSession.owner_id == user_to_delete.id).delete(synchronize_session=False)
+    db.query(UserStats).filter(UserStats.user_id == user_to_delete.id).delete(synchronize_session=False)
+    enqueue_user_purge(db, user_to_delete.id, object_names, [tuple(upload) for upload in uploads])
+    # Kullanıcının kelimeleri silinmez, created_by_user_id alanları boşaltılır; bu da bir değişikliktir
+    mark_words_changed(db, list(user_to_delete.words))
     db.delete(user_to_delete)
     db.commit()
+    media_decisions.clear() # Silinen kullanıcının tokenları önbellekten medyaya erişmeye devam etmesin
     # 204 No Content döndürdüğümüz için herhangi bir yanıt modeli belirtmiyoruz.
     # FastAPI otomatik olarak uygun HTTP yanıtını oluşturur.
     return
\ No newline at end of file
@@ -2,19 +2,32 @@
 # Kelime dağarcığı yönetimi endpoint'leri
 
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload # Veritabanı oturumu ve ilişki yükleme için
 
 from database import get_db # Veritabanı oturumu bağımlılığı
 from models.user import User # User modelini içe aktarın (ilişki için)
-from models.word import Word, WordCreate, WordResponse # Word modeli ve yanıt şemaları
+from models.word import Word, WordCreate, WordResponse, WordChangesResponse, WordSnapshotResponse # Word modeli ve yanıt şemaları
 from routers.auth import get_current_user # Kimlik doğrulama bağımlılığı
+from fieldsets import FIELDS_QUERY, parse_fields, wants, select_fields, sparse_response # Seyrek alan seçimi
+from wordsync import next_change_seq, current_version, record_tombstone, get_changes, get_snapshot # Artımlı senkronizasyon
+from groupcommit import GROUP_COMMIT_ENABLED, word_group_commit # Eşzamanlı INSERT'lerin toplu yazımı
 
 router = APIRouter(
     prefix="/words", # Tüm endpoint'ler /words ile başlayacak
     tags=["Words"], # Swagger UI'da grup adı
 )
 
+# WordResponse alanlarının nasıl hesaplanacağı; `fields` ile istenmeyen alanlar hiç hesaplanmaz
+WORD_FIELD_GETTERS = {
+    "id": lambda word: word.id,
+    "word": lambda word: word.word,
+    "create_date": lambda word: word.create_date,
+    "created_by_user_id": lambda word: word.created_by_user_id,
+    "created_by_username": lambda word: word.created_by_user.username if word.created_by_user else None,
+}
+
 @router.post("/", response_model=WordResponse, status_code=status.HTTP_201_CREATED, summary="Add a new word to the vocabulary")
 async def create_word(
     word_create: WordCreate, # Yeni kelime verileri (Pydantic modeli)
@@ -33,14 +46,31 @@ async def create_word(
             detail="Word already exists in the vocabulary."
         )
 
+    if GROUP_COMMIT_ENABLED:
+        # Eşzamanlı eklemelerle aynı transaction'da toplu yazılır; sıra numarasını grup ayırır
+        try:
+            new_word = await word_group_commit.submit({"word": word_create.word, "created_by_user_id": current_user.id})
+        except IntegrityError: # Aynı kelime bu arada (veya aynı grupta) eklendi
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Word already exists in the vocabulary."
+            )
+        return WordResponse(
+            id=new_word.id,
+            word=new_word.word,
+            create_date=new_word.create_date,
+            created_by_user_id=new_word.created_by_user_id,
+            created_by_username=current_user.username
+        )
+
     # Yeni kelime kaydını oluştur
     new_word = Word(
         word=word_create.word,
-        created_by_user_id=current_user.id
+        created_by_user_id=current_user.id,
+        change_seq=next_change_seq(db)
     )
     db.add(new_word)
-    db.commit()
-    db.refresh(new_word)
+    db.flush() # ID'yi almak için; commit sonrası nesneler expire olacağından yanıt commit'ten önce hazırlanır
 
     # Yanıt modeli için kullanıcı adını ekle
     response_data = WordResponse(
@@ -50,34 +80,80 @@ async def create_word(
         created_by_user_id=new_word.created_by_user_id,
         created_by_username=current_user.username # Oluşturan kullanıcı adını ekle
     )
+    db.commit()
     return response_data
 
 @router.get("/", response_model=List[WordResponse], summary="List all words in the vocabulary (max 100)")
 async def list_words(
     skip: int = 0,
     limit: int = 100, # Maksimum 100 kayıt
+    fields: Optional[str] = FIELDS_QUERY,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user) # Herhangi bir oturum açmış kullanıcı görüntüleyebilir
 ):
     """
     Kelime dağarcığındaki tüm kelimeleri listeler.
     Kimin eklediğine bakılmaksızın tüm kayıtlara erişilebilir.
+    `fields` verilirse sadece istenen alanlar döndürülür; `created_by_username`
+    istenmezse kullanıcı tablosu ile join yapılmaz.
     """
-    # created_by_user ilişkisini de yükle
-    words = db.query(Word).options(joinedload(Word.created_by_user)).offset(skip).limit(limit).all()
+    selected = parse_fields(fields, WordResponse)
+    query = db.query(Word)
+    if wants(selected, "created_by_username"):
+        query = query.options(joinedload(Word.created_by_user)) # created_by_user ilişkisini de yükle
+    words = query.offset(skip).limit(limit).all()
+
+    if selected is not None:
+        return sparse_response([select_fields(word, WORD_FIELD_GETTERS, selected) for word in words])
 
     response_words = []
     for word in words:
-        word_response = WordResponse(
-            id=word.id,
-            word=word.word,
-            create_date=word.create_date,
-            created_by_user_id=word.created_by_user_id,
-            created_by_username=word.created_by_user.username if word.created_by_user else None
-        )
+        word_response = WordResponse(**select_fields(word, WORD_FIELD_GETTERS, None))
         response_words.append(word_response)
     return response_words
 
+@router.get("/changes", response_model=WordChangesResponse, summary="Get vocabulary changes since a version")
+async def list_word_changes(
+    since: int = Query(0, ge=0, description="Last change_seq the client has applied (next_since of the previous call)"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    `since` sıra numarasından sonra eklenen, güncellenen ve silinen kelimeleri sırasıyla döndürür.
+    Çevrimdışı istemciler önce `/words/snapshot` ile tam listeyi alır, sonra sadece bu endpoint ile
+    değişiklikleri çeker. `has_more` true ise `next_since` ile tekrar çağrılmalıdır.
+    """
+    version = current_version(db)
+    changes, has_more = get_changes(db, since, limit)
+    return WordChangesResponse(
+        changes=changes,
+        next_since=changes[-1].change_seq if changes else max(since, 0),
+        has_more=has_more,
+        version=version
+    )
+
+@router.get("/snapshot", response_model=WordSnapshotResponse, summary="Get the full vocabulary with its version")
+async def get_word_snapshot(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Tüm kelime dağarcığını sürüm numarasıyla döndürür. Sürüm ETag olarak da gönderilir;
+    istemci `If-None-Match` ile sorarsa ve sürüm değişmediyse 304 döner.
+    Sürüm kelimelerden önce okunur; bu yüzden anlık görüntü sürümden daha yeni
+    değişiklikler içerebilir, bunlar `/words/changes?since=<version>` ile tekrar gelir (tekrar uygulamak zararsızdır).
+    """
+    version = current_version(db)
+    etag = f'W/"words-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [value.strip() for value in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    snapshot = WordSnapshotResponse(version=version, words=get_snapshot(db))
+    return Response(content=snapshot.model_dump_json(), media_type="application/json", headers=headers)
+
 @router.put("/{word_id}", response_model=WordResponse, summary="Update a word by ID (Only owner can update)")
 async def update_word(
     word_id: int,
@@ -109,10 +185,10 @@ async def update_word(
                 detail="New word value already exists for another entry."
             )
 
-    word_to_update.word = word_update.word
-    db.commit()
-    db.refresh(word_to_update)
-
+    if word_to_update.word != word_update.word:
+        word_to_update.word = word_update.word
+        word_to_update.change_seq = next_change_seq(db)
+    # Yanıt commit'ten önce hazırlanır; commit sonrası kelime ve kullanıcı tekrar yüklenmez
     response_data = WordResponse(
         id=word_to_update.id,
         word=word_to_update.word,
@@ -120,6 +196,7 @@ async def update_word(
         created_by_user_id=word_to_update.created_by_user_id,
         created_by_username=word_to_update.created_by_user.username if word_to_update.created_by_user else None
     )
+    db.commit()
     return response_data
 
 @router.delete("/{word_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete a word by ID (Only owner can delete)")
@@ -143,6 +220,7 @@ async def delete_word(
             detail="You are not authorized to delete this word."
         )
 
+    record_tombstone(db, word_to_delete) # Senkronize olan istemciler silmeyi buradan öğrenir
     db.delete(word_to_delete)
     db.commit()
     return # 204 No Content döndür
\ No newline at end of file
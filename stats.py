@@ -0,0 +1,147 @@
+# stats.py
+# Kullanıcı başına fotoğraf sayacı ve depolama kullanımı istatistiklerinin bakımı.
+# Sayaçlar fotoğraf ekleme/silme ile aynı transaction içinde artırılıp azaltılır;
+# tutarsızlık olursa `python stats.py rebuild` ile sıfırdan yeniden hesaplanabilir.
+
+import argparse
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models.user_stats import UserStats
+
+logger = logging.getLogger(__name__)
+
+# Diyalekte özgü INSERT ... ON CONFLICT desteği (PostgreSQL ve SQLite)
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def _upsert_insert(db: Session):
+    dialect_name = db.get_bind().dialect.name
+    try:
+        return _UPSERT_INSERTS[dialect_name]
+    except KeyError:
+        raise RuntimeError(f"User stats upsert is not supported for dialect '{dialect_name}'.")
+
+
+def apply_photo_delta(db: Session, user_id: int, count_delta: int, bytes_delta: int):
+    """
+    Kullanıcının sayaçlarını verilen farklar kadar günceller.
+    Commit ETMEZ; çağıran tarafın transaction'ına katılır.
+    Satır yoksa oluşturur (INSERT ... ON CONFLICT DO UPDATE), böylece eşzamanlı
+    yüklemelerde artışlar kaybolmaz.
+    """
+    insert = _upsert_insert(db)
+    statement = insert(UserStats).values(
+        user_id=user_id,
+        photo_count=max(count_delta, 0),
+        total_bytes=max(bytes_delta, 0),
+        updated_at=func.now(),
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            "photo_count": UserStats.photo_count + count_delta,
+            "total_bytes": UserStats.total_bytes + bytes_delta,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(statement)
+
+
+def rebuild_user_stats(db: Session, batch_size: int = 1000) -> int:
+    """
+    Tüm kullanıcıların sayaçlarını photos tablosundan yeniden hesaplar.
+    Kullanıcılar ID aralıklarına göre gruplar halinde işlenir ve her grup ayrı
+    commit edilir; böylece uzun süren tek bir transaction ve büyük kilitler oluşmaz.
+    Grubun sayaç satırları toplamlar okunmadan önce kilitlenir (SELECT ... FOR UPDATE);
+    eşzamanlı yükleme/silmelerin apply_photo_delta güncellemeleri yeniden hesaplamanın
+    commit'ini bekler ve üzerine yazılıp kaybolmaz.
+    İşlenen kullanıcı sayısını döndürür.
+    """
+    from models.user import User
+    from models.photo import Photo
+
+    insert = _upsert_insert(db)
+    processed = 0
+    last_user_id = 0
+    while True:
+        user_ids = [
+            row[0] for row in db.query(User.id)
+            .filter(User.id > last_user_id)
+            .order_by(User.id)
+            .limit(batch_size)
+            .all()
+        ]
+        if not user_ids:
+            break
+
+        # Eksik sayaç satırlarını oluştur ve grubun tüm satırlarını kilitle (sabit sırada: kilitlenmeyi önler).
+        # Kilit alındıktan sonra okunan toplamlar, kilitten önce commit edilmiş tüm değişiklikleri içerir;
+        # sonraki değişikliklerin farkları ise bu transaction commit edildikten sonra uygulanır.
+        db.execute(
+            insert(UserStats)
+            .values([{"user_id": user_id, "photo_count": 0, "total_bytes": 0} for user_id in user_ids])
+            .on_conflict_do_nothing(index_elements=[UserStats.user_id])
+        )
+        db.query(UserStats.user_id).filter(UserStats.user_id.in_(user_ids)).order_by(UserStats.user_id).with_for_update().all()
+
+        totals = {
+            owner_id: (photo_count, total_bytes)
+            for owner_id, photo_count, total_bytes in db.query(
+                Photo.owner_id, func.count(Photo.id), func.coalesce(func.sum(Photo.size), 0)
+            )
+            .filter(Photo.owner_id.in_(user_ids))
+            .group_by(Photo.owner_id)
+            .all()
+        }
+
+        rows = [
+            {
+                "user_id": user_id,
+                "photo_count": totals.get(user_id, (0, 0))[0],
+                "total_bytes": int(totals.get(user_id, (0, 0))[1]),
+            }
+            for user_id in user_ids
+        ]
+        statement = insert(UserStats).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserStats.user_id],
+            set_={
+                "photo_count": statement.excluded.photo_count,
+                "total_bytes": statement.excluded.total_bytes,
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(statement)
+        db.commit()
+
+        processed += len(user_ids)
+        last_user_id = user_ids[-1]
+        logger.info(f"User stats rebuilt for {processed} users (last user id: {last_user_id}).")
+    return processed
+
+
+if __name__ == "__main__":
+    # Kullanım: python stats.py rebuild --batch-size 1000
+    parser = argparse.ArgumentParser(description="User stats maintenance")
+    parser.add_argument("command", choices=["rebuild"], help="rebuild: recompute all counters from the photos table")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Number of users processed per transaction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from database import SessionLocal, Base, engine
+    import models.user, models.photo, models.word  # noqa: F401 - ilişkilerin çözülmesi için
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        count = rebuild_user_stats(db, batch_size=args.batch_size)
+        logger.info(f"Done. Stats rebuilt for {count} users.")
+    finally:
+        db.close()
@@ -0,0 +1,309 @@
+# storage/__init__.py
+# Obje depolama katmanı. Router'lar sadece bu modüldeki fonksiyonları kullanır;
+# gerçek işi STORAGE_BACKEND ortam değişkeniyle seçilen arka uç yapar:
+#   - "s3"    : MinIO / S3 uyumlu depolama (varsayılan, storage/s3.py)
+#   - "local" : Yerel dosya sistemi (storage/local.py), MinIO gerektirmez
+# Tüm çağrılar bir devre kesiciden geçer (storage/breaker.py): depolama sağlıksızken istekler
+# zaman aşımlarını beklemek yerine hemen StorageUnavailableError (503) alır. Başlatma başarısız
+# olduysa arka uç, sonraki çağrılarda artan bekleme süreleriyle (backoff) yeniden başlatılır.
+
+import os
+import threading
+import time
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv # .env dosyasını yüklemek için
+import logging # Loglama için
+
+# .env dosyasını yükle (arka uç modülleri ayarlarını import sırasında okur)
+load_dotenv()
+
+from storage.base import StorageBackend, DEFAULT_CHUNK_SIZE, MEDIA_URL_MODE
+from storage.breaker import CircuitBreaker, StorageUnavailableError
+
+# Loglama ayarları
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "s3").lower()
+STORAGE_REINIT_MIN_SECONDS = float(os.getenv("STORAGE_REINIT_MIN_SECONDS", "1")) # İlk yeniden başlatma denemesine kadar bekleme
+STORAGE_REINIT_MAX_SECONDS = float(os.getenv("STORAGE_REINIT_MAX_SECONDS", "60")) # Denemeler arası en uzun bekleme
+
+# Aktif arka uç, initialize_storage() çağrıldığında oluşturulur
+_backend: Optional[StorageBackend] = None
+_backend_ready = False # initialize() ve ensure_ready() başarılı oldu mu
+_reinit_lock = threading.Lock()
+_reinit_state = {"attempts": 0, "next_attempt_at": 0.0, "delay": STORAGE_REINIT_MIN_SECONDS, "last_success_at": None}
+
+# Depolama çağrılarının devre kesicisi
+breaker = CircuitBreaker()
+
+_LIST_END = object() # list_files: liste bitti işareti
+
+# Depolama çağrılarını izleyen fonksiyonlar: observer(operation, object_name, duration_seconds, ok).
+# Liste boşken çağrılar doğrudan arka uca gider, ölçüm yapılmaz.
+_call_observers: List[Callable[[str, str, float, bool], None]] = []
+
+
+def add_call_observer(observer: Callable[[str, str, float, bool], None]):
+    """
+    Her depolama çağrısından sonra çağrılacak bir izleyici ekler (ör. istek profilleme).
+    """
+    _call_observers.append(observer)
+
+
+def remove_call_observer(observer: Callable[[str, str, float, bool], None]):
+    if observer in _call_observers:
+        _call_observers.remove(observer)
+
+
+def _ensure_available():
+    """
+    Başlatılamamış arka ucu (backoff süresi dolduysa) yeniden başlatmayı dener ve devre
+    kesicinin çağrıya izin verdiğini doğrular. Depolama kullanılamıyorsa StorageUnavailableError fırlatır.
+    """
+    if not _backend_ready:
+        _reinitialize()
+        if not _backend_ready:
+            retry_after = max(0.0, _reinit_state["next_attempt_at"] - time.monotonic())
+            raise StorageUnavailableError("Storage backend is not initialized.", retry_after=retry_after)
+    breaker.before_call()
+
+
+def _reinitialize():
+    # Yeniden başlatma ağ çağrıları yapar; başka bir thread zaten deniyorsa beklemeden dönülür
+    # ve çağıran StorageUnavailableError alır (olay döngüsünden çağrılsa bile bloklanmaz).
+    if not _reinit_lock.acquire(blocking=False):
+        return
+    try:
+        if _backend_ready or time.monotonic() < _reinit_state["next_attempt_at"]:
+            return
+        _reinit_state["attempts"] += 1
+        logger.info(f"Re-initializing storage backend (attempt {_reinit_state['attempts']})...")
+        # Aynı arka uç nesnesi yeniden başlatılır; çağıranların elindeki metot referansları geçerli kalır
+        if _backend.initialize() and ensure_storage_ready():
+            return
+        # Başarısız: bir sonraki denemeye kadar bekleme süresini ikiye katla
+        delay = _reinit_state["delay"]
+        _reinit_state["next_attempt_at"] = time.monotonic() + delay
+        _reinit_state["delay"] = min(delay * 2, STORAGE_REINIT_MAX_SECONDS)
+        logger.error(f"Storage re-initialization failed; next attempt in {delay:.0f} s.")
+    finally:
+        _reinit_lock.release()
+
+
+def _call(operation: str, object_name: str, method, *args):
+    """
+    Arka uç metodunu devre kesici üzerinden çağırır; izleyici varsa süresini ve sonucunu bildirir.
+    Arka uçtan kaçan istisnalar (bağlantı hatası, zaman aşımı) hata sayılır ve
+    StorageUnavailableError olarak fırlatılır. None/False sonuçlar (ör. obje yok) hata sayılmaz.
+    """
+    _ensure_available()
+    started = time.perf_counter()
+    result = None
+    try:
+        result = method(*args)
+        breaker.record_success()
+        return result
+    except Exception as e:
+        breaker.record_failure(e)
+        logger.error(f"Storage {operation} of '{object_name}' failed: {e}")
+        raise StorageUnavailableError(f"Storage {operation} failed.", retry_after=breaker.retry_after() or None) from e
+    finally:
+        if _call_observers:
+            duration = time.perf_counter() - started
+            for observer in list(_call_observers):
+                observer(operation, object_name, duration, result is not None and result is not False)
+
+
+def create_backend(name: str = STORAGE_BACKEND) -> StorageBackend:
+    """
+    Adı verilen depolama arka ucunu oluşturur.
+    """
+    if name == "s3":
+        from storage.s3 import S3Backend
+        return S3Backend()
+    if name == "local":
+        from storage.local import LocalBackend
+        return LocalBackend()
+    raise ValueError(f"Unknown STORAGE_BACKEND '{name}'. Expected 's3' or 'local'.")
+
+
+def get_storage_backend() -> Optional[StorageBackend]:
+    """
+    Aktif depolama arka ucunu döndürür. Henüz başlatılmadıysa None döndürür.
+    """
+    return _backend
+
+
+def initialize_storage() -> bool:
+    """
+    Yapılandırılmış depolama arka ucunu oluşturur ve başlatır.
+    """
+    global _backend, _backend_ready
+    _backend = create_backend()
+    _backend_ready = False
+    logger.info(f"Using storage backend: {_backend.name}")
+    return _backend.initialize()
+
+
+def ensure_storage_ready() -> bool:
+    """
+    Depolama alanının (bucket'lar / dizinler) var olduğundan emin olur, yoksa oluşturur.
+    """
+    global _backend_ready
+    if _backend is None:
+        logger.error("Storage backend is not initialized.")
+        return False
+    _backend_ready = _backend.ensure_ready()
+    if _backend_ready:
+        _reinit_state.update(delay=STORAGE_REINIT_MIN_SECONDS, next_attempt_at=0.0, last_success_at=time.time())
+    return _backend_ready
+
+
+def storage_health() -> dict:
+    """
+    İzleme için depolama durumunu döndürür: arka uç, hazır olup olmadığı, devre kesici ve
+    yeniden başlatma denemeleri, istemci ayarları.
+    """
+    return {
+        "backend": _backend.name if _backend is not None else None,
+        "ready": _backend_ready,
+        "breaker": breaker.snapshot(),
+        "reinitialization": {
+            "attempts": _reinit_state["attempts"],
+            "next_attempt_in_seconds": round(max(0.0, _reinit_state["next_attempt_at"] - time.monotonic()), 1),
+            "last_success_at": _reinit_state["last_success_at"],
+        },
+        "client": _backend.client_settings() if _backend is not None else {},
+    }
+
+
+def get_s3_client():
+    """
+    S3 arka ucu kullanılıyorsa başlatılmış boto3 istemcisini döndürür, aksi halde None.
+    """
+    return getattr(_backend, "client", None)
+
+
+def upload_file(file_data: BinaryIO, object_name: str, content_type: str) -> Optional[str]:
+    """
+    Dosyayı depolamaya yükler. Başarılı olursa dosyanın adını (object_name) döndürür.
+    """
+    if _backend is None:
+        logger.error("Storage backend is not initialized. Cannot upload file.")
+        return None
+    return _call("put", object_name, _backend.put, object_name, file_data, content_type)
+
+
+def stream_file(object_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Optional[Iterator[bytes]]:
+    """
+    Dosyanın içeriğini parça parça okuyan bir iterator döndürür. Dosya yoksa None.
+    """
+    if _backend is None:
+        logger.error("Storage backend is not initialized. Cannot read file.")
+        return None
+    return _call("stream", object_name, _backend.stream, object_name, chunk_size)
+
+
+def get_file(object_name: str) -> Optional[bytes]:
+    """
+    Dosyanın tüm içeriğini bellekte döndürür. Dosya yoksa None.
+    """
+    if _backend is None:
+        logger.error("Storage backend is not initialized. Cannot read file.")
+        return None
+    return _call("get", object_name, _backend.get, object_name)
+
+
+def get_presigned_url(object_name: str, expiration: int = 3600) -> Optional[str]:
+    """
+    Bir obje için geçici olarak geçerli, ön-imzalı (presigned) bir URL oluşturur.
+    Varsayılan olarak 1 saat (3600 saniye) geçerlidir.
+    """
+    if _backend is None:
+        logger.error("Storage backend is not initialized. Cannot get presigned URL.")
+        return None
+    return _call("presign", object_name, _backend.presign, object_name, expiration)
+
+
+def get_media_url(object_name: str) -> Optional[str]:
+    """
+    Fotoğraf yanıtlarında kullanılacak URL. MEDIA_URL_MODE=stable ve arka uç destekliyorsa
+    imzasız, değişmeyen URL döner (depolamaya çağrı yapılmaz); aksi halde ön-imzalı URL.
+    """
+    if MEDIA_URL_MODE == "stable" and _backend is not None:
+        url = _backend.stable_url(object_name)
+        if url is not None:
+            return url
+    return get_presigned_url(object_name)
+
+
+def delete_file(object_name: str) -> bool:
+    """
+    Depolamadan belirtilen objeyi siler.
+    """
+    if _backend is None:
+        logger.error("Storage backend is not initialized. Cannot delete file.")
+        return False
+    return _call("delete", object_name, _backend.delete, object_name)
+
+
+def list_files(prefix: str = "") -> Iterator[str]:
+    """
+    Verilen önek ile başlayan obje adlarını listeler. Liste tembel (lazy) okunur; arka uç
+    sayfaları ilerledikçe çektiği için her adım devre kesici üzerinden (_call) yapılır.
+    """
+    if _backend is None:
+        logger.error("Storage backend is not initialized. Cannot list files.")
+        return
+    names = _call("list", prefix, lambda: iter(_backend.list(prefix)))
+    while True:
+        name = _call("list", prefix, next, names, _LIST_END)
+        if name is _LIST_END:
+            return
+        yield name
+
+
+def create_multipart_upload(object_name: str, content_type: str) -> Optional[str]:
+    """
+    Parçalı (multipart) bir yükleme başlatır ve yükleme ID'sini döndürür.
+    """
+    if _backend is None:
+        logger.error("Storage backend is not initialized. Cannot start multipart upload.")
+        return None
+    return _call("create_multipart_upload", object_name, _backend.create_multipart_upload, object_name, content_type)
+
+
+def upload_part(object_name: str, upload_id: str, part_number: int, data: bytes) -> Optional[str]:
+    """
+    Parçalı yüklemenin bir parçasını yükler ve ETag değerini döndürür.
+    """
+    if _backend is None:
+        logger.error("Storage backend is not initialized. Cannot upload part.")
+        return None
+    return _call("upload_part", object_name, _backend.upload_part, object_name, upload_id, part_number, data)
+
+
+def complete_multipart_upload(object_name: str, upload_id: str, parts: List[Tuple[int, str]]) -> bool:
+    """
+    Parçalı yüklemeyi tamamlar; parçalar numara sırasıyla birleştirilerek obje oluşturulur.
+    """
+    if _backend is None:
+        logger.error("Storage backend is not initialized. Cannot complete multipart upload.")
+        return False
+    return _call("complete_multipart_upload", object_name, _backend.complete_multipart_upload, object_name, upload_id, parts)
+
+
+def abort_multipart_upload(object_name: str, upload_id: str) -> bool:
+    """
+    Yarım kalan parçalı yüklemeyi iptal eder.
+    """
+    if _backend is None:
+        logger.error("Storage backend is not initialized. Cannot abort multipart upload.")
+        return False
+    return _call("abort_multipart_upload", object_name, _backend.abort_multipart_upload, object_name, upload_id)
+
+
+# NOT: Depolama arka ucunun başlatılması ve bucket'ın oluşturulması gibi işlemler,
+# FastAPI uygulaması başladığında (main.py'de) çağrılmalıdır.
+# Burada doğrudan çağırmıyoruz ki import edildiğinde hemen çalışmasın.
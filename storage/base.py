@@ -0,0 +1,111 @@
+# storage/base.py
+# Depolama arka uçları (backend) için ortak arayüz
+
+import os
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+# Akış (stream) okumalarında varsayılan parça boyutu
+DEFAULT_CHUNK_SIZE = 1024 * 1024 # 1 MiB
+
+# Fotoğraf yanıtlarındaki URL'ler: "presigned" (her çağrıda imzalanan, süreli URL) veya
+# "stable" (imzasız, önbelleklenebilir URL; erişimi Traefik forwardAuth + /auth/media-verify denetler)
+MEDIA_URL_MODE = os.getenv("MEDIA_URL_MODE", "presigned").lower()
+
+
+class StorageBackend(ABC):
+    """
+    Obje depolama arka ucu arayüzü. Hata durumunda metotlar istisna fırlatmak yerine
+    None/False döndürür; mevcut router'lar bu sözleşmeye göre yazılmıştır.
+    """
+    name = "base"
+
+    @abstractmethod
+    def initialize(self) -> bool:
+        """
+        Arka ucu başlatır (istemci oluşturma, bağlantı testi vb.). Başarılıysa True döner.
+        """
+
+    @abstractmethod
+    def ensure_ready(self) -> bool:
+        """
+        Depolama alanının (bucket'lar, dizinler) var olduğundan emin olur, yoksa oluşturur.
+        """
+
+    @abstractmethod
+    def put(self, object_name: str, data: BinaryIO, content_type: str) -> Optional[str]:
+        """
+        Objeyi yazar. Başarılı olursa objenin adını döndürür.
+        """
+
+    @abstractmethod
+    def stream(self, object_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Optional[Iterator[bytes]]:
+        """
+        Objenin içeriğini parça parça okuyan bir iterator döndürür. Obje yoksa None.
+        """
+
+    def stable_url(self, object_name: str) -> Optional[str]:
+        """
+        Obje için imzasız, değişmeyen (önbelleklenebilir) URL. Erişim kontrolünü ters vekil
+        (Traefik forwardAuth) yapar. Arka uç desteklemiyorsa None döner.
+        """
+        return None
+
+    def client_settings(self) -> dict:
+        """
+        İzleme için istemci ayarları (zaman aşımları, yeniden deneme, bağlantı havuzu).
+        """
+        return {}
+
+    def get(self, object_name: str) -> Optional[bytes]:
+        """
+        Objenin tüm içeriğini bellekte döndürür. Küçük objeler için kullanılmalıdır.
+        """
+        chunks = self.stream(object_name)
+        if chunks is None:
+            return None
+        return b"".join(chunks)
+
+    @abstractmethod
+    def delete(self, object_name: str) -> bool:
+        """
+        Objeyi siler.
+        """
+
+    @abstractmethod
+    def presign(self, object_name: str, expiration: int = 3600) -> Optional[str]:
+        """
+        Obje için belirli bir süre geçerli, doğrudan erişilebilir bir URL üretir.
+        """
+
+    @abstractmethod
+    def list(self, prefix: str = "") -> Iterator[str]:
+        """
+        Verilen önek (prefix) ile başlayan obje adlarını listeler.
+        """
+
+    # Parçalı (multipart) yükleme: büyük dosyalar parça parça, istenirse paralel yüklenir.
+
+    @abstractmethod
+    def create_multipart_upload(self, object_name: str, content_type: str) -> Optional[str]:
+        """
+        Yeni bir parçalı yükleme başlatır ve yükleme ID'sini döndürür.
+        """
+
+    @abstractmethod
+    def upload_part(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> Optional[str]:
+        """
+        Bir parçayı yükler ve ETag değerini döndürür. Aynı parça tekrar yüklenirse üzerine yazılır.
+        """
+
+    @abstractmethod
+    def complete_multipart_upload(self, object_name: str, upload_id: str, parts: List[Tuple[int, str]]) -> bool:
+        """
+        (parça numarası, ETag) listesiyle yüklemeyi tamamlar ve objeyi oluşturur.
+        """
+
+    @abstractmethod
+    def abort_multipart_upload(self, object_name: str, upload_id: str) -> bool:
+        """
+        Yarım kalan yüklemeyi iptal eder ve yüklenmiş parçaları siler.
+        """
@@ -0,0 +1,102 @@
+# storage/breaker.py
+# Depolama çağrıları için devre kesici (circuit breaker).
+# Art arda STORAGE_BREAKER_FAILURES çağrı bağlantı/zaman aşımı hatasıyla biterse devre açılır ve
+# STORAGE_BREAKER_RESET_SECONDS boyunca depolama çağrıları beklemeden StorageUnavailableError
+# ile reddedilir (istemcilere 503). Süre dolunca tek bir deneme çağrısına izin verilir (half-open);
+# başarılı olursa devre kapanır, olmazsa tekrar açılır.
+
+import os
+import threading
+import time
+from typing import Optional
+
+STORAGE_BREAKER_FAILURES = int(os.getenv("STORAGE_BREAKER_FAILURES", "5")) # Devreyi açan art arda hata sayısı
+STORAGE_BREAKER_RESET_SECONDS = float(os.getenv("STORAGE_BREAKER_RESET_SECONDS", "30")) # Açık kalma süresi
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class StorageUnavailableError(Exception):
+    """
+    Depolama şu an kullanılamıyor (devre açık, arka uç başlatılamadı veya çağrı zaman aşımına uğradı).
+    main.py bu hatayı 503 Service Unavailable yanıtına çevirir.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after # İstemcinin tekrar denemeden önce beklemesi önerilen süre (saniye)
+
+
+class CircuitBreaker:
+    """
+    Thread güvenli, sayaç tabanlı devre kesici.
+    """
+
+    def __init__(self, failure_threshold: int = STORAGE_BREAKER_FAILURES, reset_seconds: float = STORAGE_BREAKER_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.rejected = 0 # Devre açıkken reddedilen çağrı sayısı
+        self.opened_count = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def retry_after(self) -> float:
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def before_call(self):
+        """
+        Çağrıdan önce çağrılır; devre açıksa StorageUnavailableError fırlatır.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            if self.state == OPEN and self.retry_after() > 0:
+                self.rejected += 1
+                raise StorageUnavailableError("Storage is temporarily unavailable.", retry_after=self.retry_after())
+            if self._trial_in_flight: # Half-open: deneme çağrısı sürerken diğerleri beklemeden reddedilir
+                self.rejected += 1
+                raise StorageUnavailableError("Storage is temporarily unavailable.", retry_after=1.0)
+            self.state = HALF_OPEN
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+            if self.state != CLOSED:
+                self.state = CLOSED
+                self.opened_at = None
+
+    def record_failure(self, error: Exception):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            self._trial_in_flight = False
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opened_count += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "total_failures": self.total_failures,
+                "rejected_calls": self.rejected,
+                "opened_count": self.opened_count,
+                "retry_after_seconds": round(self.retry_after(), 1) if self.state == OPEN else 0.0,
+                "last_error": self.last_error,
+            }
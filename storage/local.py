@@ -0,0 +1,221 @@
+# storage/local.py
+# Yerel dosya sistemi depolama arka ucu (testler ve tek sunuculu kurulumlar için)
+
+import hashlib
+import hmac
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+from uuid import uuid4
+
+from storage.base import StorageBackend, DEFAULT_CHUNK_SIZE
+
+logger = logging.getLogger(__name__)
+
+LOCAL_STORAGE_PATH = os.getenv("LOCAL_STORAGE_PATH", "./media") # Dosyaların saklanacağı kök dizin
+# İmzalı URL'lerin başına eklenecek, API'nin dışarıdan erişilebilir adresi
+LOCAL_STORAGE_PUBLIC_URL = os.getenv("LOCAL_STORAGE_PUBLIC_URL", "http://localhost:8000")
+# İmzalı URL'ler, JWT'lerle aynı gizli anahtarla imzalanır
+SIGNING_KEY = (os.getenv("SECRET_KEY") or "").encode("utf-8")
+
+# Yarım kalan parçalı yüklemelerin parçalarının tutulduğu alt dizin
+MULTIPART_DIR = ".multipart"
+
+# Dosyaları servis eden endpoint'in yolu (routers/media.py)
+MEDIA_ROUTE_PREFIX = "/media"
+
+
+def sign_object_url(object_name: str, expires: int) -> str:
+    """
+    Obje adı ve son geçerlilik zamanı için HMAC-SHA256 imzası üretir.
+    """
+    message = f"{object_name}\n{expires}".encode("utf-8")
+    return hmac.new(SIGNING_KEY, message, hashlib.sha256).hexdigest()
+
+
+def verify_object_signature(object_name: str, expires: int, signature: str) -> bool:
+    """
+    İmzalı URL'nin geçerli ve süresinin dolmamış olduğunu doğrular.
+    """
+    if expires < int(time.time()):
+        return False
+    return hmac.compare_digest(sign_object_url(object_name, expires), signature)
+
+
+class LocalBackend(StorageBackend):
+    """
+    Objeleri yerel bir dizinde dosya olarak saklayan arka uç.
+    Yazmalar önce aynı dizindeki geçici bir dosyaya yapılır, ardından os.replace ile
+    atomik olarak yerine taşınır; okuyucular hiçbir zaman yarım yazılmış dosya görmez.
+    """
+    name = "local"
+
+    def __init__(self, root: str = LOCAL_STORAGE_PATH, public_url: str = LOCAL_STORAGE_PUBLIC_URL):
+        self.root = os.path.realpath(root)
+        self.public_url = public_url.rstrip("/")
+
+    def path_for(self, object_name: str) -> Optional[str]:
+        """
+        Obje adını kök dizin altındaki mutlak dosya yoluna çevirir.
+        Kök dizinin dışına çıkan adlar (örn. '../') için None döndürür.
+        """
+        path = os.path.realpath(os.path.join(self.root, object_name))
+        if os.path.commonpath([path, self.root]) != self.root or path == self.root:
+            logger.warning(f"Rejected object name outside storage root: '{object_name}'")
+            return None
+        return path
+
+    def initialize(self) -> bool:
+        if not SIGNING_KEY:
+            logger.critical("SECRET_KEY is not set. Cannot sign local storage URLs.")
+            return False
+        logger.info(f"Local storage backend initialized at '{self.root}'.")
+        return True
+
+    def ensure_ready(self) -> bool:
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            return True
+        except OSError as e:
+            logger.critical(f"FATAL ERROR: Cannot create local storage directory '{self.root}': {e}")
+            return False
+
+    def put(self, object_name: str, data: BinaryIO, content_type: str) -> Optional[str]:
+        path = self.path_for(object_name)
+        if path is None:
+            return None
+        directory = os.path.dirname(path)
+        temp_path = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".upload-")
+            with os.fdopen(fd, "wb") as temp_file:
+                while True:
+                    chunk = data.read(DEFAULT_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    temp_file.write(chunk)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, path) # Atomik yeniden adlandırma
+            logger.info(f"File '{object_name}' written successfully to local storage.")
+            return object_name
+        except OSError as e:
+            logger.error(f"Error writing file '{object_name}': {e}")
+            if temp_path and os.path.exists(temp_path):
+                os.unlink(temp_path)
+            return None
+
+    def stream(self, object_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Optional[Iterator[bytes]]:
+        path = self.path_for(object_name)
+        if path is None or not os.path.isfile(path):
+            return None
+
+        def chunks():
+            with open(path, "rb") as file:
+                while True:
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+
+        return chunks()
+
+    def delete(self, object_name: str) -> bool:
+        path = self.path_for(object_name)
+        if path is None:
+            return False
+        try:
+            os.unlink(path)
+            logger.info(f"File '{object_name}' deleted successfully from local storage.")
+            return True
+        except FileNotFoundError:
+            return True # S3 davranışıyla uyumlu: olmayan objeyi silmek hata değildir
+        except OSError as e:
+            logger.error(f"Error deleting file '{object_name}': {e}")
+            return False
+
+    def presign(self, object_name: str, expiration: int = 3600) -> Optional[str]:
+        expires = int(time.time()) + expiration
+        signature = sign_object_url(object_name, expires)
+        return f"{self.public_url}{MEDIA_ROUTE_PREFIX}/{quote(object_name)}?expires={expires}&signature={signature}"
+
+    def list(self, prefix: str = "") -> Iterator[str]:
+        for directory, subdirectories, files in os.walk(self.root):
+            if directory == self.root and MULTIPART_DIR in subdirectories:
+                subdirectories.remove(MULTIPART_DIR) # Yarım kalan yüklemeler obje değildir
+            for file_name in files:
+                if file_name.startswith(".upload-"):
+                    continue # Yazımı sürmekte olan geçici dosyalar
+                object_name = os.path.relpath(os.path.join(directory, file_name), self.root).replace(os.sep, "/")
+                if object_name.startswith(prefix):
+                    yield object_name
+
+    def _multipart_dir(self, upload_id: str) -> Optional[str]:
+        if not upload_id.isalnum(): # Sadece create_multipart_upload'ın ürettiği ID'ler
+            return None
+        return os.path.join(self.root, MULTIPART_DIR, upload_id)
+
+    def create_multipart_upload(self, object_name: str, content_type: str) -> Optional[str]:
+        if self.path_for(object_name) is None:
+            return None
+        upload_id = uuid4().hex
+        try:
+            os.makedirs(self._multipart_dir(upload_id))
+            return upload_id
+        except OSError as e:
+            logger.error(f"Error starting multipart upload for '{object_name}': {e}")
+            return None
+
+    def upload_part(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> Optional[str]:
+        directory = self._multipart_dir(upload_id)
+        if directory is None or not os.path.isdir(directory):
+            logger.error(f"Unknown multipart upload '{upload_id}' for '{object_name}'.")
+            return None
+        part_path = os.path.join(directory, f"{part_number:05d}")
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".part-")
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, part_path)
+            return hashlib.md5(data).hexdigest()
+        except OSError as e:
+            logger.error(f"Error writing part {part_number} of '{object_name}': {e}")
+            return None
+
+    def complete_multipart_upload(self, object_name: str, upload_id: str, parts: List[Tuple[int, str]]) -> bool:
+        directory = self._multipart_dir(upload_id)
+        path = self.path_for(object_name)
+        if directory is None or path is None or not os.path.isdir(directory):
+            return False
+        temp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".upload-")
+            with os.fdopen(fd, "wb") as temp_file:
+                for part_number, _ in sorted(parts):
+                    with open(os.path.join(directory, f"{part_number:05d}"), "rb") as part_file:
+                        shutil.copyfileobj(part_file, temp_file, DEFAULT_CHUNK_SIZE)
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+            os.replace(temp_path, path) # Atomik yeniden adlandırma
+            shutil.rmtree(directory, ignore_errors=True)
+            logger.info(f"Multipart upload of '{object_name}' completed with {len(parts)} parts.")
+            return True
+        except OSError as e:
+            logger.error(f"Error completing multipart upload for '{object_name}': {e}")
+            if temp_path and os.path.exists(temp_path):
+                os.unlink(temp_path)
+            return False
+
+    def abort_multipart_upload(self, object_name: str, upload_id: str) -> bool:
+        directory = self._multipart_dir(upload_id)
+        if directory is None:
+            return False
+        shutil.rmtree(directory, ignore_errors=True)
+        logger.info(f"Multipart upload of '{object_name}' aborted.")
+        return True
@@ -0,0 +1,371 @@
+# storage/s3.py
+# MinIO (S3 uyumlu) depolama arka ucu
+
+import json
+import logging
+import os
+import hashlib
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import boto3 # AWS SDK, S3 uyumlu MinIO ile etkileşim için
+from botocore.config import Config # İstemci zaman aşımı, yeniden deneme ve bağlantı havuzu ayarları
+from botocore.exceptions import ClientError # Boto3 istemci hatalarını yakalamak için
+
+from storage.base import StorageBackend, DEFAULT_CHUNK_SIZE, MEDIA_URL_MODE
+
+logger = logging.getLogger(__name__)
+
+# Ortam değişkenlerinden MinIO ayarlarını al
+MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT") # örn: minio:9000
+MINIO_ROOT_USER = os.getenv("MINIO_ROOT_USER")
+MINIO_ROOT_PASSWORD = os.getenv("MINIO_ROOT_PASSWORD")
+MINIO_BUCKET_NAME = os.getenv("MINIO_BUCKET_NAME")
+# Obje anahtarlarını birden çok bucket'a dağıtmak için shard sayısı.
+# 1'den büyükse bucket adları '<MINIO_BUCKET_NAME>-0', '<MINIO_BUCKET_NAME>-1', ... olur.
+# DİKKAT: Bu değeri sonradan değiştirmek mevcut objelerin bucket eşleşmesini bozar.
+MINIO_BUCKET_SHARDS = int(os.getenv("MINIO_BUCKET_SHARDS", "1"))
+# MEDIA_URL_MODE=stable iken objelerin Traefik üzerinden servis edildiği genel adres (örn: https://media.superisi.net).
+# Bu adres Traefik'in media-auth (forwardAuth) middleware'i arkasındadır; bucket'lar uploads/ altı için
+# anonim okumaya açılır, yetkilendirmeyi /auth/media-verify yapar.
+MEDIA_PUBLIC_BASE_URL = os.getenv("MEDIA_PUBLIC_BASE_URL", "").rstrip("/")
+MEDIA_PUBLIC_PREFIX = "uploads/" # Stabil URL ile servis edilen objelerin öneki
+# Genel S3 API host'unun (minio-api) Traefik'te kısıtlandığı adres aralıkları (bkz. docker-compose.yml).
+# Stabil mod uploads/ altını anonim okumaya açtığı için bu liste yoksa veya tüm internete açıksa
+# stabil mod kullanılmaz (ön-imzalı URL'lere dönülür).
+MINIO_API_ALLOWED_IPS = [ip_range.strip() for ip_range in os.getenv("MINIO_API_ALLOWED_IPS", "").split(",") if ip_range.strip()]
+OPEN_IP_RANGES = {"0.0.0.0/0", "::/0"}
+
+# İstemci ayarları: MinIO yavaşladığında isteklerin onlarca saniye asılı kalmaması için açık sınırlar.
+# Bir çağrının en kötü süresi yaklaşık STORAGE_MAX_ATTEMPTS * (bağlantı + okuma zaman aşımı) + bekleme olur.
+STORAGE_CONNECT_TIMEOUT = float(os.getenv("STORAGE_CONNECT_TIMEOUT", "2")) # Bağlantı kurma zaman aşımı (saniye)
+STORAGE_READ_TIMEOUT = float(os.getenv("STORAGE_READ_TIMEOUT", "10")) # Soket okuma zaman aşımı (saniye)
+STORAGE_MAX_ATTEMPTS = int(os.getenv("STORAGE_MAX_ATTEMPTS", "3")) # İlk deneme dahil toplam deneme sayısı
+# Bağlantı havuzu, depolamayı çağıran thread sayısı kadar olmalı (FastAPI thread havuzu varsayılan 40 thread)
+STORAGE_MAX_POOL_CONNECTIONS = int(os.getenv("STORAGE_MAX_POOL_CONNECTIONS", "50"))
+
+
+def build_client_config() -> Config:
+    """
+    boto3 istemcisinin ayarları. "adaptive" yeniden deneme kipi, jitter'lı üstel bekleme yapar ve
+    sunucu yavaşlama (throttling) yanıtlarında istek hızını istemci tarafında düşürür.
+    """
+    return Config(
+        connect_timeout=STORAGE_CONNECT_TIMEOUT,
+        read_timeout=STORAGE_READ_TIMEOUT,
+        retries={"mode": "adaptive", "max_attempts": STORAGE_MAX_ATTEMPTS},
+        max_pool_connections=STORAGE_MAX_POOL_CONNECTIONS,
+    )
+
+
+def _raise_if_unavailable(error: ClientError):
+    # Yeniden denemelere rağmen süren sunucu hataları (5xx) devre kesiciye hata olarak bildirilir;
+    # obje yok gibi istemci hataları (4xx) bildirilmez, çağıran None/False alır.
+    if error.response.get("ResponseMetadata", {}).get("HTTPStatusCode", 0) >= 500:
+        raise error
+
+
+def _as_list(value) -> list:
+    # Bucket politikalarında tek değer ve liste aynı anlama gelir
+    return value if isinstance(value, list) else [value]
+
+
+def shard_bucket_names(base_name: str, shards: int) -> List[str]:
+    """
+    Shard sayısına göre kullanılacak bucket adlarını döndürür.
+    """
+    if shards <= 1:
+        return [base_name]
+    return [f"{base_name}-{index}" for index in range(shards)]
+
+
+class S3Backend(StorageBackend):
+    """
+    boto3 istemcisi üzerinden MinIO/S3 ile çalışan depolama arka ucu.
+    Birden fazla bucket tanımlıysa her obje, anahtarının hash değerine göre
+    sabit bir bucket'a yazılır; böylece tek bucket'ın istek hızı bir tavan olmaz.
+    """
+    name = "s3"
+
+    def __init__(self, bucket_name: Optional[str] = MINIO_BUCKET_NAME, shards: int = MINIO_BUCKET_SHARDS):
+        self.client = None
+        self.bucket_name = bucket_name
+        self.buckets = shard_bucket_names(bucket_name, shards) if bucket_name else []
+        self.stable_media = False # Stabil medya URL'leri kullanılıyor mu (bkz. initialize)
+
+    def bucket_for(self, object_name: str) -> str:
+        """
+        Objenin hangi bucket'ta tutulduğunu döndürür.
+        """
+        if len(self.buckets) == 1:
+            return self.buckets[0]
+        digest = hashlib.blake2b(object_name.encode("utf-8"), digest_size=8).digest()
+        return self.buckets[int.from_bytes(digest, "big") % len(self.buckets)]
+
+    def initialize(self) -> bool:
+        """
+        MinIO istemcisini ortam değişkenlerinden gelen bilgilerle başlatır.
+        """
+        logger.info("Attempting to initialize MinIO client...")
+        logger.info(f"MINIO_ENDPOINT: {MINIO_ENDPOINT}")
+        logger.info(f"MINIO_ROOT_USER: {MINIO_ROOT_USER}")
+        # logger.info(f"MINIO_ROOT_PASSWORD: {MINIO_ROOT_PASSWORD}") # Güvenlik nedeniyle şifreyi loglamayın
+        logger.info(f"MINIO_BUCKET_NAME: {self.bucket_name} (shards: {len(self.buckets)})")
+
+        if not all([MINIO_ENDPOINT, MINIO_ROOT_USER, MINIO_ROOT_PASSWORD, self.bucket_name]):
+            logger.critical("MinIO environment variables are NOT fully set. Cannot initialize client.")
+            self.client = None # Hata durumunda istemciyi None olarak bırak
+            return False
+
+        self.stable_media = MEDIA_URL_MODE == "stable" and bool(MEDIA_PUBLIC_BASE_URL)
+        if self.stable_media and (not MINIO_API_ALLOWED_IPS or OPEN_IP_RANGES.intersection(MINIO_API_ALLOWED_IPS)):
+            # Kapalı kalarak başarısız ol: anonim okuma politikası, kısıtlanmamış genel S3 API'si üzerinden
+            # media-verify yetkilendirmesini atlatmaya izin verirdi.
+            logger.error("MEDIA_URL_MODE=stable requires MINIO_API_ALLOWED_IPS to restrict the public S3 API host; "
+                         "falling back to presigned media URLs.")
+            self.stable_media = False
+
+        try:
+            # boto3 istemcisini oluştur
+            temp_s3_client = boto3.client(
+                's3',
+                endpoint_url=f"http://{MINIO_ENDPOINT}", # Docker içinden erişim için http://minio:9000 gibi
+                aws_access_key_id=MINIO_ROOT_USER,
+                aws_secret_access_key=MINIO_ROOT_PASSWORD,
+                region_name='us-east-1', # MinIO için bölge adı önemli değil, bir placeholder
+                config=build_client_config()
+            )
+            # İstemci başarılı bir şekilde oluşturulduktan sonra bir test işlemi yapalım
+            temp_s3_client.list_buckets() # Bu, bağlantının çalışıp çalışmadığını test eder
+            self.client = temp_s3_client # Test başarılıysa istemciyi ata
+            logger.info("MinIO client initialized successfully and connected to MinIO server.")
+            return True
+        except Exception as e:
+            logger.critical(f"FATAL ERROR: MinIO client initialization failed: {e}")
+            self.client = None
+            return False
+
+    def stable_url(self, object_name: str) -> Optional[str]:
+        if not self.stable_media or not object_name.startswith(MEDIA_PUBLIC_PREFIX):
+            return None
+        return f"{MEDIA_PUBLIC_BASE_URL}/{self.bucket_for(object_name)}/{quote(object_name)}"
+
+    def client_settings(self) -> dict:
+        return {
+            "connect_timeout": STORAGE_CONNECT_TIMEOUT,
+            "read_timeout": STORAGE_READ_TIMEOUT,
+            "retry_mode": "adaptive",
+            "max_attempts": STORAGE_MAX_ATTEMPTS,
+            "max_pool_connections": STORAGE_MAX_POOL_CONNECTIONS,
+        }
+
+    def ensure_ready(self) -> bool:
+        """
+        Tüm shard bucket'larının MinIO'da varlığını kontrol eder, yoksa oluşturur.
+        """
+        if self.client is None:
+            logger.error("MinIO client is not initialized for bucket operation.")
+            return False
+        if not all(self._create_bucket_if_not_exists(bucket) for bucket in self.buckets):
+            return False
+        if self.stable_media:
+            return all(self._allow_anonymous_media_read(bucket) for bucket in self.buckets)
+        return all(self._revoke_anonymous_media_read(bucket) for bucket in self.buckets)
+
+    def _allow_anonymous_media_read(self, bucket: str) -> bool:
+        # Traefik forwardAuth'tan geçen istekler imzasız olduğu için MinIO'nun uploads/ altını
+        # anonim okumaya izin vermesi gerekir. Kullanıcılar medyaya sadece media-auth arkasındaki media router'ından
+        # erişir; genel S3 API host'u (minio-api) MINIO_API_ALLOWED_IPS ile kısıtlanmıştır (bkz. initialize).
+        try:
+            self.client.put_bucket_policy(Bucket=bucket, Policy=json.dumps(self._media_read_policy(bucket)))
+            logger.info(f"Anonymous read on '{bucket}/{MEDIA_PUBLIC_PREFIX}*' enabled for stable media URLs.")
+            return True
+        except ClientError as e:
+            logger.critical(f"FATAL ERROR: Could not set media read policy on bucket '{bucket}': {e}")
+            return False
+
+    def _media_read_policy(self, bucket: str) -> dict:
+        return {
+            "Version": "2012-10-17",
+            "Statement": [{
+                "Effect": "Allow",
+                "Principal": {"AWS": ["*"]},
+                "Action": ["s3:GetObject"],
+                "Resource": [f"arn:aws:s3:::{bucket}/{MEDIA_PUBLIC_PREFIX}*"],
+            }],
+        }
+
+    def _revoke_anonymous_media_read(self, bucket: str) -> bool:
+        # Stabil mod kapalıyken (veya güvenli olmadığı için kapatıldıysa) önceki çalıştırmadan kalan
+        # anonim okuma politikası kaldırılır. Başka bir politika varsa dokunulmaz.
+        try:
+            policy = json.loads(self.client.get_bucket_policy(Bucket=bucket)["Policy"])
+        except ClientError:
+            return True # Politika yok
+        resource = f"arn:aws:s3:::{bucket}/{MEDIA_PUBLIC_PREFIX}*"
+        statements = policy.get("Statement") or []
+        if not statements or not all(resource in _as_list(statement.get("Resource")) for statement in statements):
+            return True
+        try:
+            self.client.delete_bucket_policy(Bucket=bucket)
+            logger.info(f"Anonymous read on '{bucket}/{MEDIA_PUBLIC_PREFIX}*' disabled.")
+            return True
+        except ClientError as e:
+            logger.critical(f"FATAL ERROR: Could not remove media read policy from bucket '{bucket}': {e}")
+            return False
+
+    def _create_bucket_if_not_exists(self, bucket: str) -> bool:
+        logger.info(f"Attempting to check/create bucket: {bucket}")
+        try:
+            self.client.head_bucket(Bucket=bucket) # Bucket'ın varlığını kontrol et
+            logger.info(f"Bucket '{bucket}' already exists.")
+        except ClientError as e:
+            error_code = e.response.get('Error', {}).get('Code')
+            logger.warning(f"Bucket '{bucket}' does not exist or access error: {error_code}. Attempting to create.")
+            if error_code == '404' or error_code == 'NoSuchBucket': # Bucket bulunamadı hatası
+                try:
+                    self.client.create_bucket(Bucket=bucket)
+                    logger.info(f"Bucket '{bucket}' created successfully.")
+                except ClientError as ce:
+                    logger.critical(f"FATAL ERROR: Error creating bucket '{bucket}': {ce}")
+                    return False
+            else: # Diğer hatalar
+                logger.critical(f"FATAL ERROR: Error checking bucket '{bucket}': {e}")
+                return False
+        return True
+
+    def put(self, object_name: str, data: BinaryIO, content_type: str) -> Optional[str]:
+        if self.client is None:
+            logger.error("MinIO client is not initialized. Cannot upload file.")
+            return None
+        bucket = self.bucket_for(object_name)
+        try:
+            self.client.put_object(
+                Bucket=bucket,
+                Key=object_name, # MinIO'daki dosya yolu/adı (örn: 'fotoğraflar/resim.jpg')
+                Body=data, # Yüklenecek dosya verisi
+                ContentType=content_type # Dosyanın MIME tipi (örn: 'image/jpeg')
+            )
+            logger.info(f"File '{object_name}' uploaded successfully to bucket '{bucket}'.")
+            return object_name
+        except ClientError as e:
+            _raise_if_unavailable(e)
+            logger.error(f"Error uploading file '{object_name}': {e}")
+            return None
+
+    def stream(self, object_name: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Optional[Iterator[bytes]]:
+        if self.client is None:
+            logger.error("MinIO client is not initialized. Cannot read file.")
+            return None
+        try:
+            response = self.client.get_object(Bucket=self.bucket_for(object_name), Key=object_name)
+        except ClientError as e:
+            _raise_if_unavailable(e)
+            logger.error(f"Error reading file '{object_name}': {e}")
+            return None
+        return response["Body"].iter_chunks(chunk_size=chunk_size)
+
+    def delete(self, object_name: str) -> bool:
+        if self.client is None:
+            logger.error("MinIO client is not initialized. Cannot delete file.")
+            return False
+        bucket = self.bucket_for(object_name)
+        try:
+            self.client.delete_object(Bucket=bucket, Key=object_name)
+            logger.info(f"File '{object_name}' deleted successfully from bucket '{bucket}'.")
+            return True
+        except ClientError as e:
+            _raise_if_unavailable(e)
+            logger.error(f"Error deleting file '{object_name}': {e}")
+            return False
+
+    def presign(self, object_name: str, expiration: int = 3600) -> Optional[str]:
+        if self.client is None:
+            logger.error("MinIO client is not initialized. Cannot get presigned URL.")
+            return None
+        try:
+            url = self.client.generate_presigned_url(
+                'get_object', # Alınacak objeler için URL
+                Params={'Bucket': self.bucket_for(object_name), 'Key': object_name},
+                ExpiresIn=expiration # URL'nin geçerlilik süresi (saniye)
+            )
+            logger.info(f"Presigned URL generated for '{object_name}'.")
+            return url
+        except ClientError as e:
+            _raise_if_unavailable(e)
+            logger.error(f"Error generating presigned URL for '{object_name}': {e}")
+            return None
+
+    def list(self, prefix: str = "") -> Iterator[str]:
+        if self.client is None:
+            logger.error("MinIO client is not initialized. Cannot list files.")
+            return
+        paginator = self.client.get_paginator("list_objects_v2")
+        for bucket in self.buckets:
+            try:
+                for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+                    for item in page.get("Contents", []):
+                        yield item["Key"]
+            except ClientError as e:
+                logger.error(f"Error listing files with prefix '{prefix}' in bucket '{bucket}': {e}")
+
+    def create_multipart_upload(self, object_name: str, content_type: str) -> Optional[str]:
+        if self.client is None:
+            logger.error("MinIO client is not initialized. Cannot start multipart upload.")
+            return None
+        try:
+            response = self.client.create_multipart_upload(
+                Bucket=self.bucket_for(object_name), Key=object_name, ContentType=content_type
+            )
+            return response["UploadId"]
+        except ClientError as e:
+            _raise_if_unavailable(e)
+            logger.error(f"Error starting multipart upload for '{object_name}': {e}")
+            return None
+
+    def upload_part(self, object_name: str, upload_id: str, part_number: int, data: bytes) -> Optional[str]:
+        if self.client is None:
+            logger.error("MinIO client is not initialized. Cannot upload part.")
+            return None
+        try:
+            response = self.client.upload_part(
+                Bucket=self.bucket_for(object_name), Key=object_name,
+                UploadId=upload_id, PartNumber=part_number, Body=data
+            )
+            return response["ETag"]
+        except ClientError as e:
+            _raise_if_unavailable(e)
+            logger.error(f"Error uploading part {part_number} of '{object_name}': {e}")
+            return None
+
+    def complete_multipart_upload(self, object_name: str, upload_id: str, parts: List[Tuple[int, str]]) -> bool:
+        if self.client is None:
+            logger.error("MinIO client is not initialized. Cannot complete multipart upload.")
+            return False
+        try:
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket_for(object_name), Key=object_name, UploadId=upload_id,
+                MultipartUpload={"Parts": [{"PartNumber": number, "ETag": etag} for number, etag in parts]}
+            )
+            logger.info(f"Multipart upload of '{object_name}' completed with {len(parts)} parts.")
+            return True
+        except ClientError as e:
+            _raise_if_unavailable(e)
+            logger.error(f"Error completing multipart upload for '{object_name}': {e}")
+            return False
+
+    def abort_multipart_upload(self, object_name: str, upload_id: str) -> bool:
+        if self.client is None:
+            logger.error("MinIO client is not initialized. Cannot abort multipart upload.")
+            return False
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket_for(object_name), Key=object_name, UploadId=upload_id)
+            logger.info(f"Multipart upload of '{object_name}' aborted.")
+            return True
+        except ClientError as e:
+            _raise_if_unavailable(e)
+            error_code = e.response.get('Error', {}).get('Code')
+            if error_code == 'NoSuchUpload': # Zaten tamamlanmış veya iptal edilmiş
+                return True
+            logger.error(f"Error aborting multipart upload for '{object_name}': {e}")
+            return False
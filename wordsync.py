@@ -0,0 +1,148 @@
+# wordsync.py
+# Kelime dağarcığı için artımlı senkronizasyon yardımcıları.
+# Her ekleme, güncelleme ve silme word_sync_state sayacından yeni bir sıra numarası alır.
+# Sayaç satırı INSERT ... ON CONFLICT DO UPDATE ile artırıldığı için transaction commit
+# edilene kadar kilitli kalır; böylece sıra numaraları commit sırasıyla aynıdır ve
+# `since` değerinden sonraki değişiklikleri okuyan bir istemci araya giren bir yazmayı kaçırmaz.
+
+import argparse
+import logging
+from typing import List, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.word import Word, WordTombstone, WordSyncState, WordChange
+from stats import _upsert_insert # Diyalekte özgü INSERT ... ON CONFLICT
+
+logger = logging.getLogger(__name__)
+
+SYNC_STATE_ID = 1 # word_sync_state tablosundaki tek satır
+
+
+def next_change_seq(db: Session, count: int = 1) -> int:
+    """
+    Sayacı `count` kadar artırır ve son verilen sıra numarasını döndürür
+    (verilen numaralar: sonuç - count + 1 ... sonuç).
+    Commit ETMEZ; çağıran tarafın transaction'ına katılır.
+    """
+    insert = _upsert_insert(db)
+    statement = insert(WordSyncState).values(id=SYNC_STATE_ID, last_seq=count)
+    statement = statement.on_conflict_do_update(
+        index_elements=[WordSyncState.id],
+        set_={"last_seq": WordSyncState.last_seq + count},
+    ).returning(WordSyncState.last_seq)
+    return db.execute(statement).scalar_one()
+
+
+def current_version(db: Session) -> int:
+    """
+    Kelime dağarcığının güncel sürümünü (son verilen sıra numarasını) döndürür.
+    """
+    return db.query(WordSyncState.last_seq).filter(WordSyncState.id == SYNC_STATE_ID).scalar() or 0
+
+
+def record_tombstone(db: Session, word: Word):
+    """
+    Silinen kelime için bir iz bırakır. Commit ETMEZ.
+    """
+    db.merge(WordTombstone(word_id=word.id, word=word.word, change_seq=next_change_seq(db)))
+
+
+def mark_words_changed(db: Session, words: List[Word]):
+    """
+    Toplu değiştirilen kelimelere (ör. sahibi silinen kelimeler) yeni sıra numaraları verir. Commit ETMEZ.
+    """
+    if not words:
+        return
+    last_seq = next_change_seq(db, len(words))
+    for offset, word in enumerate(words):
+        word.change_seq = last_seq - len(words) + 1 + offset
+
+
+def _word_columns():
+    return (Word.id, Word.word, Word.change_seq, Word.create_date, Word.created_by_user_id)
+
+
+def _word_change(row) -> WordChange:
+    return WordChange(
+        id=row.id,
+        word=row.word,
+        change_seq=row.change_seq,
+        create_date=row.create_date,
+        created_by_user_id=row.created_by_user_id
+    )
+
+
+def get_changes(db: Session, since: int, limit: int) -> Tuple[List[WordChange], bool]:
+    """
+    `since` sıra numarasından sonraki ekleme/güncelleme ve silmeleri sıra numarasına göre döndürür.
+    İki sorgu da change_seq indeksleri üzerinden sadece değişen satırları okur.
+    (değişiklikler, daha fazlası var mı) döndürür.
+    """
+    word_rows = (
+        db.query(*_word_columns())
+        .filter(Word.change_seq > since)
+        .order_by(Word.change_seq)
+        .limit(limit + 1)
+        .all()
+    )
+    tombstone_rows = (
+        db.query(WordTombstone.word_id, WordTombstone.word, WordTombstone.change_seq)
+        .filter(WordTombstone.change_seq > since)
+        .order_by(WordTombstone.change_seq)
+        .limit(limit + 1)
+        .all()
+    )
+    changes = [_word_change(row) for row in word_rows]
+    changes += [
+        WordChange(id=row.word_id, word=row.word, change_seq=row.change_seq, deleted=True)
+        for row in tombstone_rows
+    ]
+    changes.sort(key=lambda change: change.change_seq)
+    return changes[:limit], len(changes) > limit
+
+
+def get_snapshot(db: Session) -> List[WordChange]:
+    """
+    Tüm kelimeleri ORM nesnesi oluşturmadan, sadece gereken sütunlarla döndürür.
+    """
+    return [_word_change(row) for row in db.query(*_word_columns()).order_by(Word.id).all()]
+
+
+def backfill_change_seq(db: Session, batch_size: int = 1000) -> int:
+    """
+    Sıra numarası olmayan (bu özellikten önce eklenmiş) kelimelere numara verir.
+    Gruplar halinde commit eder; numaralandırılan kelime sayısını döndürür.
+    """
+    processed = 0
+    while True:
+        words = db.query(Word).filter(Word.change_seq.is_(None)).order_by(Word.id).limit(batch_size).all()
+        if not words:
+            break
+        mark_words_changed(db, words)
+        db.commit()
+        processed += len(words)
+    if processed:
+        logger.info(f"Assigned change sequence numbers to {processed} existing words.")
+    return processed
+
+
+if __name__ == "__main__":
+    # Kullanım: python wordsync.py backfill --batch-size 1000
+    parser = argparse.ArgumentParser(description="Word sync maintenance")
+    parser.add_argument("command", choices=["backfill"], help="backfill: number words that have no change sequence yet")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Number of words numbered per transaction")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from database import SessionLocal, Base, engine, add_missing_columns
+    import models.user, models.photo  # noqa: F401 - ilişkilerin çözülmesi için
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(Word.__table__) # Eski veritabanlarında change_seq sütunu ve indeksi
+
+    db = SessionLocal()
+    try:
+        count = backfill_change_seq(db, batch_size=args.batch_size)
+        logger.info(f"Done. {count} words numbered.")
+    finally:
+        db.close()